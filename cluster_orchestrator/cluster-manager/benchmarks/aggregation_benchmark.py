@@ -0,0 +1,79 @@
+"""Compares the pure Python and the NumPy aggregation engines on synthetic workers.
+
+Run from the cluster-manager directory:
+    python benchmarks/aggregation_benchmark.py [--sizes 100 1000 10000 50000]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+for variable in ["SYSTEM_MANAGER_URL", "SYSTEM_MANAGER_GRPC_PORT"]:
+    os.environ.setdefault(variable, "localhost")
+
+from clients.resource_aggregation import aggregate_workers  # noqa: E402
+from clients.vectorized_aggregation import aggregate_workers_by_architecture  # noqa: E402
+
+ARCHITECTURES = ["amd64", "arm64", "arm"]
+
+
+def synthetic_worker(i):
+    return {
+        "_id": f"{i:024x}",
+        "candidate_name": f"worker-{i}",
+        "ip": "10.0.0.1",
+        "port": "50011",
+        "architecture": random.choice(ARCHITECTURES),
+        "cpu_percent": random.choice([0.0, random.uniform(0, 100)]),
+        "memory_percent": random.uniform(0, 100),
+        "vcpus": random.choice([2, 4, 8, 16]),
+        "memory": random.choice([2048, 4096, 8192]),
+        "vram": 0,
+        "vram_percent": 0.0,
+        "gpu_temp": 0.0,
+        "gpu_percent": 0.0,
+        "vgpus": 0,
+        "virtualization": ["docker"],
+        "supported_addons": [],
+        "csi_drivers": [{"csi_driver_name": "csi-hostpath", "csi_driver_endpoint": "/x"}],
+    }
+
+
+def python_engine(workers):
+    per_arch = {}
+    for w in workers:
+        per_arch.setdefault(w["architecture"], []).append(w)
+    return aggregate_workers(workers), {a: aggregate_workers(g) for a, g in per_arch.items()}
+
+
+def timed(fn, workers, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(workers)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000, 50000])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'workers':>8} {'python [ms]':>12} {'numpy [ms]':>12} {'speedup':>8}")
+    for size in args.sizes:
+        workers = [synthetic_worker(i) for i in range(size)]
+        python_time = timed(python_engine, workers, args.repeat)
+        numpy_time = timed(aggregate_workers_by_architecture, workers, args.repeat)
+        print(
+            f"{size:>8} {python_time * 1000:>12.1f} {numpy_time * 1000:>12.1f} "
+            f"{python_time / numpy_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,18 @@
 import logging
+import time
 import traceback
 
 from bson import json_util
 from clients import job_management
 from clients.job_management import deploy_job
 from clients.mqtt_client import mqtt_publish_edge_deploy
-from ext_requests.network_manager_requests import network_notify_deployment
+from clients.my_prometheus_client import placement_latency_seconds
+from ext_requests.network_manager_requests import network_notify_deployment_async
 from flask import Response, request
 from flask.views import MethodView
 from flask_smorest import Blueprint, abort
 from oakestra_utils.types.statuses import (
+    NegativeSchedulingStatus,
     PositiveSchedulingStatus,
     convert_to_status,
 )
@@ -85,6 +88,7 @@ class SchedulingController(MethodView):
         content_type="application/json",
     )
     def post(self):
+        received_at = time.perf_counter()
         data = request.get_json()
         logger.debug(data)
         id = data.get("job_id").split("/")
@@ -105,13 +109,29 @@ class SchedulingController(MethodView):
             job_operations.update_job_status(job_id, status)
             return Response(json_util.dumps({"status": "ok"}), mimetype="application/json")
 
-        # update job instance
-        job_management.update_instance_node(job_id, int(instance_number), node_id)
-        job_management.update_status(
-            job_id, int(instance_number), PositiveSchedulingStatus.NODE_SCHEDULED.value
-        )
-
-        job = job_operations.get_job_by_id(job_id)
+        # worker and status of the instance in one update, returns the job to deploy
+        try:
+            job = job_management.commit_placement(
+                job_id,
+                int(instance_number),
+                node_id,
+                PositiveSchedulingStatus.NODE_SCHEDULED.value,
+            )
+        except job_management.UnknownWorker:
+            logger.error(
+                f"Instance {instance_number} of job {job_id} was scheduled to unknown worker "
+                f"{node_id}"
+            )
+            # a failed scheduling instead of an instance that stays pending
+            job_operations.set_job_instance_status(
+                job_id,
+                int(instance_number),
+                NegativeSchedulingStatus.NO_NODE_FOUND.value,
+                f"Scheduled worker {node_id} is unknown",
+            )
+            return Response(
+                json_util.dumps({"status": "worker_not_found"}), mimetype="application/json"
+            )
         if job is None:
             logger.error("Job " + job_id + " has been deleted")
             return Response(
@@ -119,8 +139,9 @@ class SchedulingController(MethodView):
             )
 
         # update network component
-        network_notify_deployment(job_id, job)
+        network_notify_deployment_async(job_id, job)
 
         # publish job
         mqtt_publish_edge_deploy(node_id, job, instance_number)
+        placement_latency_seconds.observe(time.perf_counter() - received_at)
         return Response(json_util.dumps({"status": "ok"}), mimetype="application/json")
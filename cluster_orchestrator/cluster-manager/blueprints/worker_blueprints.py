@@ -2,6 +2,7 @@ import logging
 import os
 
 from bson import json_util
+from clients.job_management import candidate_cache
 from flask import Response, request
 from flask.views import MethodView
 from flask_smorest import Blueprint, abort
@@ -39,6 +40,7 @@ class ServiceController(MethodView):
             logger.error("Failed to register node")
             abort(500, "Failed to register node")
 
+        candidate_cache.add(worker)
         worker_id = str(worker["_id"])
         response = {
             "id": str(worker_id),
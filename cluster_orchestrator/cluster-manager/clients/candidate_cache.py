@@ -0,0 +1,64 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from resource_abstractor_client import candidate_operations
+
+logger = logging.getLogger("cluster_manager")
+
+# port of the node engine of workers that did not report one
+DEFAULT_WORKER_PORT = 50011
+
+
+class CandidateCache:
+    """Local worker_id -> (ip, port) cache for placing instances on workers.
+
+    Filled by worker registrations and by lookups through the resource abstractor on a
+    miss. Entries are read again after ttl seconds and kept in least recently used
+    order, bounded by max_size.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, candidate):
+        if not candidate or candidate.get("_id") is None or candidate.get("ip") is None:
+            return
+
+        port = candidate.get("port")
+        address = (candidate["ip"], DEFAULT_WORKER_PORT if port in (None, "") else port)
+        worker_id = str(candidate["_id"])
+        with self._lock:
+            self._entries[worker_id] = (address, time.monotonic())
+            self._entries.move_to_end(worker_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def remove(self, worker_id):
+        with self._lock:
+            self._entries.pop(str(worker_id), None)
+
+    def address(self, worker_id):
+        """Returns (ip, port) of the worker or None if it is unknown."""
+        worker_id = str(worker_id)
+        with self._lock:
+            entry = self._entries.get(worker_id)
+            if entry is not None and time.monotonic() - entry[1] < self.ttl:
+                self._entries.move_to_end(worker_id)
+                return entry[0]
+
+        candidate = candidate_operations.get_candidate_by_id(
+            worker_id, fields=["_id", "ip", "port"]
+        )
+        if candidate is None:
+            logger.warning(f"Unable to resolve the address of worker {worker_id}")
+            return None
+
+        self.add({**candidate, "_id": worker_id})
+        with self._lock:
+            entry = self._entries.get(worker_id)
+            return entry[0] if entry else None
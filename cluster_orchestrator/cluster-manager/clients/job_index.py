@@ -0,0 +1,81 @@
+import logging
+import threading
+from collections import OrderedDict
+
+from resource_abstractor_client import job_operations
+
+logger = logging.getLogger("cluster_manager")
+
+INDEXED_JOB_FIELDS = ["_id", "job_name", "instance_list.instance_number"]
+
+
+class JobIndex:
+    """Local job_name -> (job_id, instance numbers) index.
+
+    Filled on startup and kept current by deployments and deletions of this cluster
+    manager. Names that are not indexed are resolved once through the resource
+    abstractor and kept in least recently used order, bounded by max_size.
+    """
+
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load(self):
+        jobs = job_operations.get_jobs(fields=INDEXED_JOB_FIELDS)
+        if jobs is None:
+            logger.warning("Unable to load the job index, falling back to lookups")
+            return
+
+        for job in jobs:
+            self.add(job)
+        logger.info(f"Job index loaded with {len(self._entries)} jobs")
+
+    def add(self, job):
+        if not job or job.get("job_name") is None:
+            return
+
+        instances = {i.get("instance_number") for i in job.get("instance_list") or []}
+        with self._lock:
+            self._entries[job["job_name"]] = (str(job.get("_id")), instances)
+            self._entries.move_to_end(job["job_name"])
+            self._evict()
+
+    def remove_instance(self, job_name, instance_number):
+        with self._lock:
+            entry = self._entries.get(job_name)
+            if entry is not None:
+                job_id, instances = entry
+                self._entries[job_name] = (job_id, instances - {instance_number})
+
+    def remove(self, job_name):
+        with self._lock:
+            self._entries.pop(job_name, None)
+
+    def _evict(self):
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def lookup(self, job_name):
+        """Returns (job_id, instance numbers) or None if the job does not exist."""
+        with self._lock:
+            entry = self._entries.get(job_name)
+            if entry is not None:
+                self._entries.move_to_end(job_name)
+                return entry
+
+        jobs = job_operations.get_jobs(job_name=job_name, fields=INDEXED_JOB_FIELDS)
+        if not jobs:
+            return None
+
+        self.add(jobs[0])
+        with self._lock:
+            return self._entries.get(job_name)
+
+    def instance_job_id(self, job_name, instance_number):
+        """Returns the job_id if the job has the instance, None for unknown instances."""
+        entry = self.lookup(job_name)
+        if entry is None or instance_number not in entry[1]:
+            return None
+        return entry[0]
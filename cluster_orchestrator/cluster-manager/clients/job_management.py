@@ -1,74 +1,45 @@
 import logging
 from datetime import datetime, timedelta
 
+import config
 from ext_requests.scheduler_requests import scheduler_request_deploy
 from oakestra_utils.types.statuses import (
     DeploymentStatus,
     LegacyStatus,
     NegativeSchedulingStatus,
     PositiveSchedulingStatus,
-    convert_to_status,
 )
-from resource_abstractor_client import candidate_operations, job_operations
+from resource_abstractor_client import job_operations
+
+from clients.candidate_cache import CandidateCache
+from clients.job_index import JobIndex
+from clients.redeploy_queue import redeploy_queue
 
 logger = logging.getLogger("cluster_manager")
 
+job_index = JobIndex(config.JOB_INDEX_SIZE)
+candidate_cache = CandidateCache(config.CANDIDATE_CACHE_SIZE, config.CANDIDATE_CACHE_TTL)
 
-def mark_inactive_as_failed(time_interval):
-    cutoff = (datetime.now() - timedelta(seconds=time_interval)).timestamp()
-    query = {
-        "instance_list": {
-            "$elemMatch": {
-                "$or": [
-                    {"last_modified_timestamp": {"$lt": cutoff}},
-                ]
-            }
-        }
-    }
+# fields of the jobs reported to the system manager
+REPORTED_JOB_FIELDS = ["_id", "job_name", "status", "instance_list"]
 
-    jobs = job_operations.get_jobs(**query)
-    if jobs is None:
-        return
 
-    for job in jobs:
-        failed_instances = []
-
-        for instance in job["instance_list"]:
-            job_status = convert_to_status(instance.get("status", None)) or LegacyStatus.LEGACY_0
-
-            timestamp = instance.get("last_modified_timestamp", datetime.now().timestamp())
-
-            if (
-                timestamp < cutoff
-                and job_status not in PositiveSchedulingStatus
-                and job_status != DeploymentStatus.COMPLETED
-            ):
-                update_instance(
-                    job.get("_id"),
-                    instance.get("instance_number"),
-                    {
-                        "status": DeploymentStatus.FAILED.value,
-                        "status_detail": "No suitable worker found",
-                    },
-                )
-                failed_instances.append(instance.get("instance_number"))
-
-        if failed_instances:
-            job_operations.update_job(
-                job.get("_id"),
-                {
-                    "status": DeploymentStatus.FAILED.value,
-                    "status_detail": "Failed instance(s): "
-                    + ", ".join(str(x) for x in failed_instances),
-                },
-            )
+def mark_inactive_as_failed(time_interval):
+    cutoff = (datetime.now() - timedelta(seconds=time_interval)).timestamp()
+    # instances that are still being scheduled or that completed do not report anymore
+    excluded_statuses = [status.value for status in PositiveSchedulingStatus]
+    excluded_statuses.append(DeploymentStatus.COMPLETED.value)
 
-    return
+    expired = job_operations.expire_stale_instances(
+        cutoff, "No suitable worker found", excluded_statuses
+    )
+    for job_id, instance_numbers in (expired or {}).items():
+        logger.info(f"Marked inactive instance(s) {instance_numbers} of job {job_id} as failed")
 
 
 def aggregate_info(time_interval):
     mark_inactive_as_failed(time_interval)
-    jobs = job_operations.get_jobs() or []
+    jobs = job_operations.get_jobs(fields=REPORTED_JOB_FIELDS) or []
 
     return [
         {
@@ -93,118 +64,124 @@ def create_new_job_instance(job: dict, instance_number: int):
 
 
 def update_deployed_instance_worker(job_name, instance_number, status, status_detail, public_ip):
-    jobs = job_operations.get_jobs(job_name=job_name)
-    if not jobs:
+    # reports of instances this cluster does not know need no resource abstractor request
+    job_id = job_index.instance_job_id(job_name, int(instance_number))
+    if job_id is None:
         return
 
-    job_id = jobs[0].get("_id")
+    instance_number = int(instance_number)
+    fields = {"publicip": public_ip} if public_ip is not None else {}
+    if status == DeploymentStatus.CREATED.value:
+        # the status stays with the scheduling result, see update_status
+        result = update_instance(job_id, instance_number, fields)
+    else:
+        # status and public ip in a single update
+        result = job_operations.set_job_instance_status(
+            job_id, instance_number, status, status_detail, fields=fields
+        )
 
-    update_status(job_id, int(instance_number), status, status_detail)
-    update_instance(job_id, int(instance_number), {"publicip": public_ip})
+    if status == DeploymentStatus.RUNNING.value:
+        redeploy_queue.recovered(job_id, instance_number)
+    if result is None:
+        # the indexed job is gone, resolve it again on the next report
+        job_index.remove(job_name)
 
 
 def update_status(job_id, instance_number, status, status_detail=None):
     if status == DeploymentStatus.CREATED.value:
         return
 
-    job = job_operations.get_job_by_id(job_id)
-    if job is None:
-        return
+    # the job-level status is rolled up by the resource abstractor, it is only set to
+    # RUNNING once all instances are running
+    job_operations.set_job_instance_status(job_id, instance_number, status, status_detail)
 
-    if job.get("instance_list") is not None:
-        for instance in job.get("instance_list"):
-            if instance["instance_number"] == instance_number:
-                instance["status"] = status
-                if status_detail is not None:
-                    instance["status_detail"] = status_detail
 
-    # Update job-level status, but only set RUNNING once all instances are running
-    if status != DeploymentStatus.RUNNING.value:
-        job["status"] = status
-    elif all(i["status"] == DeploymentStatus.RUNNING.value for i in job.get("instance_list", [])):
-        job["status"] = status
-
-    job_operations.update_job(job_id, job)
+def update_deployed_instances(services):
+    """Store the resource reports of a worker's services with a single bulk request.
 
+    Returns the reported services that are unknown to the cluster, None if the update failed.
+    """
+    reports = [
+        {
+            "job_name": service.get("job_name"),
+            "instance_number": int(service.get("instance", 0)),
+            "status": DeploymentStatus.RUNNING.value,
+            "status_detail": service.get("status_detail"),
+            "cpu_percent": service.get("cpu_percent"),
+            "memory_percent": service.get("memory_percent"),
+            "disk": service.get("disk"),
+            "logs": service.get("logs", ""),
+        }
+        for service in services
+    ]
+    # Filter none value
+    reports = [{k: v for k, v in report.items() if v is not None} for report in reports]
 
-def update_deployed_instance_job(job_name, instance_number, service, worker_id):
-    jobs = job_operations.get_jobs(job_name=job_name)
-    if not jobs:
+    result = job_operations.update_job_instances(reports)
+    if result is None:
         return None
 
-    job_id = jobs[0].get("_id")
-    update_status(
-        job_id,
-        int(instance_number),
-        DeploymentStatus.RUNNING.value,
-        service.get("status_detail", None),
-    )
-    data = {
-        "cpu_percent": service.get("cpu_percent"),
-        "memory_percent": service.get("memory_percent"),
-        "disk": service.get("disk"),
-        "logs": service.get("logs", ""),
-    }
-    return update_instance(job_id, int(instance_number), data)
+    missing = {(m.get("job_name"), m.get("instance_number")) for m in result.get("missing", [])}
+    return [
+        service
+        for service in services
+        if (service.get("job_name"), int(service.get("instance", 0))) in missing
+    ]
 
 
 def update_instance_node(job_id, instance_number, worker_id):
-    node = candidate_operations.get_candidate_by_id(worker_id)
-    data = {
-        "host_ip": node.get("ip"),
-        "host_port": 50011 if node.get("port", "") == "" else node.get("port"),
-        "worker_id": worker_id,
-    }
+    address = candidate_cache.address(worker_id)
+    if address is None:
+        return None
+
+    host_ip, host_port = address
+    data = {"host_ip": host_ip, "host_port": host_port, "worker_id": worker_id}
     return update_instance(job_id, instance_number, data)
 
 
-def update_instance(job_id, instance_number, data):
-    job = job_operations.get_job_by_id(job_id)
-    if job is None:
-        return None
+class UnknownWorker(Exception):
+    """The worker an instance was scheduled to is not a known candidate of the cluster."""
 
-    updated_instance = None
 
-    # Filter none value
-    data = {k: v for k, v in data.items() if v is not None}
-    data["last_modified_timestamp"] = datetime.now().timestamp()
+def commit_placement(job_id, instance_number, worker_id, status):
+    """Record the scheduled worker and status of an instance with a single request.
 
-    if job.get("instance_list", None) is None:
-        data["instance_number"] = instance_number
-        job["instance_list"] = [data]
-        updated_instance = data
-    else:
-        found = False
-        for instance in job["instance_list"]:
-            if instance["instance_number"] == instance_number:
-                instance.update(data)
-                updated_instance = instance
-                found = True
-                break
+    Returns the updated job to be sent to the worker, None if the job is unknown.
+    Raises UnknownWorker if the address of the worker cannot be resolved.
+    """
+    address = candidate_cache.address(worker_id)
+    if address is None:
+        raise UnknownWorker(worker_id)
 
-        if not found:
-            data["instance_number"] = instance_number
-            job["instance_list"].append(data)
-            updated_instance = data
+    host_ip, host_port = address
+    return job_operations.place_job_instance(
+        job_id, instance_number, worker_id, host_ip, host_port, status
+    )
 
-    return job_operations.update_job_instance(job_id, instance_number, updated_instance)
+
+def update_instance(job_id, instance_number, data):
+    # Filter none value
+    data = {k: v for k, v in data.items() if v is not None}
+    # merged into the instance by the resource abstractor, the instance is appended if the
+    # job has none with this number
+    return job_operations.upsert_job_instance(job_id, instance_number, data)
 
 
 def deploy_job(job, instance_number):
     job_obj = create_new_job_instance(job, int(instance_number))
+    job_index.add(job_obj)
     scheduler_request_deploy(job_obj, int(instance_number))
     return "ok"
 
 
 def get_jobs_with_failed_instances():
-    query = {
-        "$or": [
-            {"instance_list.status": DeploymentStatus.FAILED.value},
-            {"instance_list.status": DeploymentStatus.DEAD.value},
-            {"instance_list.status": NegativeSchedulingStatus.NO_WORKER_CAPACITY.value},
+    return job_operations.get_jobs(
+        instance_status=[
+            DeploymentStatus.FAILED.value,
+            DeploymentStatus.DEAD.value,
+            NegativeSchedulingStatus.NO_WORKER_CAPACITY.value,
         ]
-    }
-    return job_operations.get_jobs(**query)
+    )
 
 
 def delete_job_instance(job_id: int, instance_number: int, erase: bool = True):
@@ -232,12 +209,15 @@ def delete_job_instance(job_id: int, instance_number: int, erase: bool = True):
             # remove from db if erase is true
             if erase:
                 job_operations.delete_job_instance(job_id, instance["instance_number"])
+                job_index.remove_instance(job.get("job_name"), instance["instance_number"])
+                redeploy_queue.forget(job_id, instance["instance_number"])
                 logger.info(
                     f"Deleted instance {instance['instance_number']} of job {job_id} from DB"
                 )
 
     if erase and len(instance_list) <= deleted_job:
         job_operations.delete_job(job_id)
+        job_index.remove(job.get("job_name"))
         logger.info(f"Deleted job {job_id} from DB as all instances were removed")
         return {}
 
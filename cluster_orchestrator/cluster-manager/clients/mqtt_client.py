@@ -1,17 +1,21 @@
 import json
 import logging
 import os
-import re
 
+import config
 import paho.mqtt.client as paho_mqtt
 from oakestra_utils.types.statuses import convert_to_status
-from resource_abstractor_client import candidate_operations
 
-from clients.job_management import update_deployed_instance_job, update_deployed_instance_worker
+from clients.job_management import update_deployed_instance_worker, update_deployed_instances
+from clients.mqtt_ingestion import TopicPipeline
+from clients.node_information_buffer import NodeInformationBuffer
+from clients.resource_aggregation import cluster_aggregator
 
 logger = logging.getLogger("cluster_manager")
 
 mqtt = None
+pipelines = {}
+node_information = None
 
 
 def handle_connect(client, userdata, flags, rc):
@@ -26,62 +30,107 @@ def handle_logging(client, userdata, level, buf):
         logger.info("Error: {}".format(buf))
 
 
-def handle_mqtt_message(client, userdata, message):
-    data = dict(topic=message.topic, payload=message.payload.decode())
-    logger.info("MQTT - Received from worker: ")
-    logger.info(data)
+TOPIC_NODE_INFORMATION = "information"
+TOPIC_JOB_DEPLOYMENT = "job"
+TOPIC_JOB_RESOURCES = "jobs/resources"
+
+
+def handle_node_information(client_id, payload):
+    payload = {k: v for k, v in payload.items() if v is not None}
+    cluster_aggregator.update(client_id, payload)
+    node_information.put(client_id, payload)
+
+
+def mqtt_publish_node_not_registered(client_id):
+    cluster_aggregator.remove(client_id)
+    mqtt.publish(
+        "nodes/" + client_id + "/control/error",
+        json.dumps({"message": "Node not registered to the cluster"}),
+    )
+
 
-    topic = data["topic"]
+def handle_job_deployment(client_id, payload):
+    job_name = payload.get("sname")
+    status = convert_to_status(payload.get("status"))
+    status_detail = payload.get("status_detail", None)
+    instance = payload.get("instance")
+    publicip = payload.get("publicip", "--")
+    update_deployed_instance_worker(job_name, instance, status.value, status_detail, publicip)
+
+
+def handle_job_resources(client_id, payload):
+    services = payload.get("services") or []
+    outdated = update_deployed_instances(services)
+    if outdated is None:
+        logger.error("MQTT - unable to update service resources")
+        return
+
+    # The worker has outdated information and these services must be undeployed
+    for service in outdated:
+        mqtt_publish_edge_delete(
+            client_id,
+            service.get("job_name"),
+            service.get("instance", 0),
+            service.get("virtualization"),
+        )
+
+
+def _decoded(handler):
+    def wrapper(client_id, raw_payload):
+        handler(client_id, json.loads(raw_payload))
+
+    return wrapper
+
+
+def init_pipelines():
+    global pipelines
+    pipelines = {
+        TOPIC_NODE_INFORMATION: TopicPipeline(
+            TOPIC_NODE_INFORMATION,
+            _decoded(handle_node_information),
+            config.MQTT_INFORMATION_WORKERS,
+            config.MQTT_QUEUE_SIZE,
+        ),
+        TOPIC_JOB_DEPLOYMENT: TopicPipeline(
+            TOPIC_JOB_DEPLOYMENT,
+            _decoded(handle_job_deployment),
+            config.MQTT_JOB_WORKERS,
+            config.MQTT_QUEUE_SIZE,
+        ),
+        TOPIC_JOB_RESOURCES: TopicPipeline(
+            TOPIC_JOB_RESOURCES,
+            _decoded(handle_job_resources),
+            config.MQTT_JOB_WORKERS,
+            config.MQTT_QUEUE_SIZE,
+        ),
+    }
+    for pipeline in pipelines.values():
+        pipeline.start()
+
+
+def handle_mqtt_message(client, userdata, message):
+    # Runs on the paho network thread: only classify and enqueue, never block here.
+    logger.debug(f"MQTT - Received from worker on {message.topic}")
 
-    re_nodes_information_topic = re.search("^nodes/.*/information$", topic)
-    re_job_deployment_topic = re.search("^nodes/.*/job$", topic)
-    re_job_resources_topic = re.search("^nodes/.*/jobs/resources$", topic)
+    topic_split = message.topic.split("/", 2)
+    if len(topic_split) < 3 or topic_split[0] != "nodes":
+        return
 
-    topic_split = topic.split("/")
     client_id = topic_split[1]
-    payload = json.loads(data["payload"])
-
-    # if topic starts with nodes and ends with information
-    if re_nodes_information_topic is not None:
-        payload = {k: v for k, v in payload.items() if v is not None}
-        updated = candidate_operations.update_candidate_information(client_id, payload)
-        if updated is None:
-            mqtt.publish(
-                "nodes/" + client_id + "/control/error",
-                json.dumps({"message": "Node not registered to the cluster"}),
-            )
-    if re_job_deployment_topic is not None:
-        job_name = payload.get("sname")
-        status = convert_to_status(payload.get("status"))
-        status_detail = payload.get("status_detail", None)
-        instance = payload.get("instance")
-        publicip = payload.get("publicip", "--")
-        update_deployed_instance_worker(job_name, instance, status.value, status_detail, publicip)
-    if re_job_resources_topic is not None:
-        services = payload.get("services")
-        for service in services:
-            try:
-                # If unable to update then worker has outdated information
-                # and service must be undeployed
-                if (
-                    update_deployed_instance_job(
-                        service.get("job_name"), service.get("instance", 0), service, client_id
-                    )
-                    is None
-                ):
-                    mqtt_publish_edge_delete(
-                        client_id,
-                        service.get("job_name"),
-                        service.get("instance"),
-                        service.get("virtualization"),
-                    )
-            except Exception as e:
-                logger.error("MQTT - unable to update service resources")
-                logger.error(e)
+    pipeline = pipelines.get(topic_split[2])
+    if pipeline is None:
+        return
+
+    pipeline.submit(client_id, message.payload)
 
 
 def mqtt_init(flask_app):
-    global mqtt
+    global mqtt, node_information
+    node_information = NodeInformationBuffer(
+        config.NODE_INFORMATION_FLUSH_INTERVAL, on_unregistered=mqtt_publish_node_not_registered
+    )
+    node_information.start()
+    init_pipelines()
     mqtt = paho_mqtt.Client()
     mqtt.on_connect = handle_connect
     mqtt.on_message = handle_mqtt_message
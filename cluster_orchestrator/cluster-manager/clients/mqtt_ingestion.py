@@ -0,0 +1,68 @@
+import logging
+import queue
+import threading
+import zlib
+
+from clients.my_prometheus_client import (
+    mqtt_messages_dropped,
+    mqtt_messages_failed,
+    mqtt_messages_processed,
+    mqtt_queue_depth,
+)
+
+logger = logging.getLogger("cluster_manager")
+
+
+class TopicPipeline:
+    """Bounded hand-off stage between the paho network thread and the message handlers.
+
+    Each topic type owns its own set of queues and worker threads, so a burst of node
+    telemetry can never delay job status updates. Messages are sharded by client id:
+    all messages from the same worker land on the same queue and are handled in order.
+    """
+
+    def __init__(self, topic_type, handler, workers, max_queue_size):
+        self.topic_type = topic_type
+        self.handler = handler
+        self.queues = [queue.Queue(maxsize=max_queue_size) for _ in range(max(1, workers))]
+        self.threads = []
+
+        mqtt_queue_depth.labels(topic_type).set_function(self.depth)
+
+    def start(self):
+        for index, shard in enumerate(self.queues):
+            thread = threading.Thread(
+                target=self._work,
+                args=(shard,),
+                name=f"mqtt-{self.topic_type}-{index}",
+                daemon=True,
+            )
+            thread.start()
+            self.threads.append(thread)
+
+    def depth(self):
+        return sum(shard.qsize() for shard in self.queues)
+
+    def submit(self, client_id, payload):
+        """Enqueue without blocking; returns False if the message had to be dropped."""
+        shard = self.queues[zlib.crc32(client_id.encode()) % len(self.queues)]
+        try:
+            shard.put_nowait((client_id, payload))
+        except queue.Full:
+            mqtt_messages_dropped.labels(self.topic_type).inc()
+            logger.warning(f"MQTT - {self.topic_type} queue full, dropping message of {client_id}")
+            return False
+        return True
+
+    def _work(self, shard):
+        while True:
+            client_id, payload = shard.get()
+            try:
+                self.handler(client_id, payload)
+                mqtt_messages_processed.labels(self.topic_type).inc()
+            except Exception as e:
+                mqtt_messages_failed.labels(self.topic_type).inc()
+                logger.error(f"MQTT - unable to handle {self.topic_type} message of {client_id}")
+                logger.error(e)
+            finally:
+                shard.task_done()
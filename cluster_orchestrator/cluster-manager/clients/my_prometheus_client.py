@@ -1,10 +1,47 @@
-from prometheus_client import Gauge
+from prometheus_client import Counter, Gauge, Histogram
 
 metrics = {}
 jobs = {}
 cluster_id = None
 logger = None
 
+# MQTT ingestion pipeline
+mqtt_queue_depth = Gauge(
+    "mqtt_queue_depth", "Messages waiting to be handled per MQTT topic type", ["topic_type"]
+)
+mqtt_messages_dropped = Counter(
+    "mqtt_messages_dropped", "Messages dropped because the topic queue was full", ["topic_type"]
+)
+mqtt_messages_processed = Counter(
+    "mqtt_messages_processed", "Messages handled per MQTT topic type", ["topic_type"]
+)
+mqtt_messages_failed = Counter(
+    "mqtt_messages_failed", "Messages whose handler raised an error", ["topic_type"]
+)
+
+# Redeploy of failed instances
+redeploy_queue_length = Gauge("redeploy_queue_length", "Instances waiting to be redeployed")
+redeploy_retries = Counter(
+    "redeploy_retries", "Redeploys of instances that were already redeployed before"
+)
+redeploy_requests_skipped = Counter(
+    "redeploy_requests_skipped",
+    "Redeploy requests ignored because one was in flight or the instance was backing off",
+    ["reason"],
+)
+redeploy_recovery_seconds = Histogram(
+    "redeploy_recovery_seconds",
+    "Time from the first redeploy of a failed instance until it was running again",
+    buckets=(5, 15, 30, 60, 120, 300, 600, 1800, 3600),
+)
+
+# Scheduling results
+placement_latency_seconds = Histogram(
+    "placement_latency_seconds",
+    "Time from receiving a scheduling result until the deploy command was published",
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
 
 def add_or_set_metric(name, value):
     global metrics, logger
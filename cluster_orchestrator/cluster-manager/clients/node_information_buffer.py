@@ -0,0 +1,66 @@
+import logging
+import threading
+import time
+
+from resource_abstractor_client import candidate_operations
+
+logger = logging.getLogger("cluster_manager")
+
+
+class NodeInformationBuffer:
+    """Keeps only the latest information report per node and writes them in bulk.
+
+    Nothing reads a node between two of its reports, so intermediate reports are
+    overwritten instead of being sent to the resource abstractor one by one.
+    """
+
+    def __init__(self, flush_interval, on_unregistered=None):
+        self.flush_interval = flush_interval
+        self.on_unregistered = on_unregistered
+        self._latest = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def put(self, node_id, payload):
+        with self._lock:
+            self._latest[node_id] = payload
+
+    def pending(self):
+        with self._lock:
+            return len(self._latest)
+
+    def flush(self):
+        with self._lock:
+            batch, self._latest = self._latest, {}
+
+        if not batch:
+            return
+
+        result = candidate_operations.update_candidates_information(
+            [{**payload, "_id": node_id} for node_id, payload in batch.items()]
+        )
+        if result is None:
+            # keep the batch for the next flush unless a newer report arrived meanwhile
+            with self._lock:
+                for node_id, payload in batch.items():
+                    self._latest.setdefault(node_id, payload)
+            return
+
+        if self.on_unregistered is not None:
+            for node_id in result.get("missing", []):
+                self.on_unregistered(node_id)
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="node-information-flush", daemon=True
+        )
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error("Unable to flush node information")
+                logger.error(e)
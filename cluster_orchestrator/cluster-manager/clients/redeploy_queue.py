@@ -0,0 +1,108 @@
+import logging
+import queue
+import random
+import threading
+import time
+
+import config
+
+from clients.my_prometheus_client import (
+    redeploy_queue_length,
+    redeploy_recovery_seconds,
+    redeploy_requests_skipped,
+    redeploy_retries,
+)
+
+logger = logging.getLogger("cluster_manager")
+
+
+class RedeployQueue:
+    """Deduplicating redeploy scheduler served by a fixed pool of worker threads.
+
+    An instance, keyed by (job_id, instance_number), is queued at most once at a time.
+    After each attempt it waits an exponentially growing, jittered delay before it is
+    accepted again, so an instance that keeps failing is retried less and less often
+    instead of on every background tick. The state of an instance is kept until it
+    reports RUNNING again or is deleted.
+    """
+
+    def __init__(self, workers, base_delay, max_delay):
+        self.workers = max(1, workers)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.handler = None
+        self._queue = queue.Queue()
+        self._in_flight = set()
+        # key -> [attempts, not retried before this time, first failure seen at]
+        self._backoff = {}
+        self._lock = threading.Lock()
+        self.threads = []
+
+        redeploy_queue_length.set_function(self._queue.qsize)
+
+    def start(self, handler):
+        """handler(job, instance) undeploys and reschedules a failed instance."""
+        self.handler = handler
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"redeploy-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def submit(self, job, instance):
+        """Queue a redeploy unless one is in flight or the instance is backing off."""
+        key = (str(job.get("_id")), instance.get("instance_number"))
+        now = time.monotonic()
+        with self._lock:
+            if key in self._in_flight:
+                redeploy_requests_skipped.labels("in_flight").inc()
+                return False
+
+            attempts, not_before, _ = self._backoff.setdefault(key, [0, now, now])
+            if now < not_before:
+                redeploy_requests_skipped.labels("backoff").inc()
+                return False
+
+            if attempts > 0:
+                redeploy_retries.inc()
+            self._in_flight.add(key)
+
+        self._queue.put((key, job, instance))
+        return True
+
+    def recovered(self, job_id, instance_number):
+        """The instance is running again, record the time it took and reset its backoff."""
+        with self._lock:
+            state = self._backoff.pop((str(job_id), instance_number), None)
+        if state is not None:
+            redeploy_recovery_seconds.observe(time.monotonic() - state[2])
+
+    def forget(self, job_id, instance_number):
+        with self._lock:
+            self._backoff.pop((str(job_id), instance_number), None)
+
+    def _delay(self, attempts):
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        return random.uniform(delay / 2, delay)
+
+    def _work(self):
+        while True:
+            key, job, instance = self._queue.get()
+            try:
+                logger.info(f"Redeploying instance {key[1]} of job {key[0]}")
+                self.handler(job, instance)
+            except Exception as e:
+                logger.error(f"Redeploy of instance {key[1]} of job {key[0]} failed")
+                logger.error(e)
+            finally:
+                with self._lock:
+                    self._in_flight.discard(key)
+                    state = self._backoff.get(key)
+                    if state is not None:
+                        state[0] += 1
+                        state[1] = time.monotonic() + self._delay(state[0])
+                self._queue.task_done()
+
+
+redeploy_queue = RedeployQueue(
+    config.REDEPLOY_WORKERS, config.REDEPLOY_BACKOFF_BASE, config.REDEPLOY_BACKOFF_MAX
+)
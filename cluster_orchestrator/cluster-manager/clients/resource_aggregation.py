@@ -1,5 +1,9 @@
 import logging
+import threading
+import time
+from collections import Counter, OrderedDict
 
+import config
 from resource_abstractor_client import candidate_operations
 
 logger = logging.getLogger("cluster_manager")
@@ -140,11 +144,188 @@ def aggregate_workers(workers):
     return result
 
 
-def aggregate_info(time_interval):
-    workers = candidate_operations.get_candidates(active=True)
+# Incremental aggregation ######################################################
+# The canonical resources grouped by their aggregation scheme, see canonical_resources.
+AVERAGED_RESOURCES = ["cpu_percent", "memory_percent", "vram_percent", "gpu_temp", "gpu_percent"]
+SUMMED_RESOURCES = ["vcpus", "vram", "vgpus", "memory"]
+LISTED_RESOURCES = ["gpu_drivers", "virtualization", "supported_addons"]
 
-    if workers is None:
-        return {}
+
+def _as_float(val):
+    try:
+        return float(val)
+    except (TypeError, ValueError):
+        return None
+
+
+def worker_contribution(w):
+    """Extract what a single worker adds to the canonical cluster resources."""
+    averaged = {}
+    for key in AVERAGED_RESOURCES:
+        val = _as_float(w.get(key))
+        # zero values are skipped when averaging
+        if val:
+            averaged[key] = val
+
+    summed = {
+        key: w[key]
+        for key in SUMMED_RESOURCES
+        if isinstance(w.get(key), (int, float)) and not isinstance(w.get(key), bool)
+    }
+
+    listed = {}
+    for key in LISTED_RESOURCES:
+        val = w.get(key)
+        if val is not None:
+            listed[key] = list(val) if isinstance(val, list) else [val]
+
+    csi_drivers = csi_drivers_aggregator(w) or []
+
+    return averaged, summed, listed, csi_drivers
+
+
+class ResourceAccumulator:
+    """Running totals of the canonical resources of a set of workers.
+
+    Workers are added and removed with their contribution, so the aggregate never
+    has to be recomputed over all workers.
+    """
+
+    def __init__(self):
+        self.nodes = 0
+        self.averaged_sums = {key: 0.0 for key in AVERAGED_RESOURCES}
+        self.averaged_counts = {key: 0 for key in AVERAGED_RESOURCES}
+        self.sums = {key: 0 for key in SUMMED_RESOURCES}
+        self.listed = {key: Counter() for key in LISTED_RESOURCES}
+        self.listed_present = {key: 0 for key in LISTED_RESOURCES}
+        self.csi_drivers = Counter()
+
+    def apply(self, contribution, sign=1):
+        averaged, summed, listed, csi_drivers = contribution
+        self.nodes += sign
+
+        for key, val in averaged.items():
+            self.averaged_counts[key] += sign
+            # reset instead of accumulating float drift once no value is left
+            if self.averaged_counts[key] == 0:
+                self.averaged_sums[key] = 0.0
+            else:
+                self.averaged_sums[key] += sign * val
+
+        for key, val in summed.items():
+            self.sums[key] += sign * val
+
+        for key, items in listed.items():
+            self.listed_present[key] += sign
+            if sign > 0:
+                self.listed[key].update(items)
+            else:
+                self.listed[key].subtract(items)
+                self.listed[key] += Counter()  # drop non positive counts
+
+        if sign > 0:
+            self.csi_drivers.update(csi_drivers)
+        else:
+            self.csi_drivers.subtract(csi_drivers)
+            self.csi_drivers += Counter()
+
+    def snapshot(self):
+        result = {}
+        for key in AVERAGED_RESOURCES:
+            count = self.averaged_counts[key]
+            result[key] = self.averaged_sums[key] / count if count else 0.0
+        for key in SUMMED_RESOURCES:
+            result[key] = self.sums[key]
+        for key in LISTED_RESOURCES:
+            result[key] = list(self.listed[key].elements()) if self.listed_present[key] else None
+        result["csi_drivers"] = list(self.csi_drivers) if self.csi_drivers else None
+        result["active_nodes"] = self.nodes
+        return result
+
+
+class ClusterAggregator:
+    """Cluster resource aggregate that is updated by every node report.
+
+    Each report replaces the previous contribution of its node in the cluster wide
+    and in the per architecture totals. Nodes without a report within
+    freshness_interval seconds are removed, like inactive candidates are.
+    """
+
+    def __init__(self, freshness_interval):
+        self.freshness_interval = freshness_interval
+        # node_id -> (timestamp, architecture, contribution), oldest report first
+        self._nodes = OrderedDict()
+        self._total = ResourceAccumulator()
+        self._per_arch = {}
+        self._lock = threading.Lock()
+
+    def seed(self, workers):
+        workers = sorted(workers or [], key=lambda w: w.get("last_modified_timestamp", 0))
+        for w in workers:
+            self.update(
+                str(w.get("_id")), w, timestamp=w.get("last_modified_timestamp", time.time())
+            )
+
+    def update(self, node_id, worker, timestamp=None):
+        entry = (
+            timestamp if timestamp is not None else time.time(),
+            worker.get("architecture"),
+            worker_contribution(worker),
+        )
+        with self._lock:
+            self._remove(node_id)
+            self._nodes[node_id] = entry
+            self._apply(entry, 1)
+
+    def remove(self, node_id):
+        with self._lock:
+            self._remove(node_id)
+
+    def snapshot(self):
+        with self._lock:
+            self._expire(time.time() - self.freshness_interval)
+            result = self._total.snapshot()
+            result["aggregation_per_architecture"] = {
+                arch: accumulator.snapshot()
+                for arch, accumulator in self._per_arch.items()
+                if accumulator.nodes > 0
+            }
+            return result
+
+    def _apply(self, entry, sign):
+        _, arch, contribution = entry
+        self._total.apply(contribution, sign)
+        if arch is not None:
+            self._per_arch.setdefault(arch, ResourceAccumulator()).apply(contribution, sign)
+
+    def _remove(self, node_id):
+        entry = self._nodes.pop(node_id, None)
+        if entry is not None:
+            self._apply(entry, -1)
+
+    def _expire(self, cutoff):
+        while self._nodes:
+            node_id, (timestamp, _, _) = next(iter(self._nodes.items()))
+            if timestamp > cutoff:
+                break
+            self._remove(node_id)
+
+
+cluster_aggregator = ClusterAggregator(config.NODE_FRESHNESS_INTERVAL)
+
+
+def seed_aggregator():
+    cluster_aggregator.seed(candidate_operations.get_candidates(active=True))
+
+
+def aggregate_candidates(workers):
+    """Full recomputation of the cluster and per architecture aggregates."""
+    if config.AGGREGATION_ENGINE == "numpy":
+        from clients.vectorized_aggregation import aggregate_workers_by_architecture
+
+        result, per_arch = aggregate_workers_by_architecture(workers)
+        result["aggregation_per_architecture"] = per_arch
+        return result
 
     result = aggregate_workers(workers)
 
@@ -160,3 +341,14 @@ def aggregate_info(time_interval):
     }
 
     return result
+
+
+def aggregate_info(time_interval):
+    if config.AGGREGATION_ENGINE == "incremental":
+        return cluster_aggregator.snapshot()
+
+    workers = candidate_operations.get_candidates(active=True)
+    if workers is None:
+        return {}
+
+    return aggregate_candidates(workers)
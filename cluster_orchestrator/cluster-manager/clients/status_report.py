@@ -0,0 +1,124 @@
+import hashlib
+import json
+import threading
+
+# Instance fields that are never reported to the root
+UNREPORTED_INSTANCE_FIELDS = {"cpu_history", "memory_history"}
+# Sent with a changed instance, the root sets every instance field it updates, but a new
+# timestamp alone is not a change
+UNCOMPARED_INSTANCE_FIELDS = {"last_modified_timestamp"}
+# Compared after rounding to metrics_precision decimals, so that noise is not a change
+METRIC_FIELDS = {"cpu_percent", "memory_percent"}
+
+
+def _reported_instance(instance):
+    return {k: v for k, v in instance.items() if k not in UNREPORTED_INSTANCE_FIELDS}
+
+
+def _fingerprint(value):
+    return hashlib.blake2b(
+        json.dumps(value, sort_keys=True, default=str).encode(), digest_size=16
+    ).digest()
+
+
+def _instance_fingerprint(instance, metrics_precision):
+    compared = {}
+    for key, val in instance.items():
+        if key in UNCOMPARED_INSTANCE_FIELDS:
+            continue
+        if key in METRIC_FIELDS:
+            try:
+                val = round(float(val), metrics_precision)
+            except (TypeError, ValueError):
+                pass
+        compared[key] = val
+    return _fingerprint(compared)
+
+
+class StatusReport:
+    def __init__(self, seq, base_seq, full, jobs, fingerprints):
+        self.seq = seq
+        self.base_seq = base_seq
+        self.full = full
+        self.jobs = jobs
+        # job_id -> (job fingerprint, {instance_number: fingerprint}) of the reported jobs
+        self.fingerprints = fingerprints
+
+    def payload(self):
+        return {
+            "jobs": self.jobs,
+            "report_seq": self.seq,
+            "report_base_seq": self.base_seq,
+            "report_full": self.full,
+        }
+
+
+class StatusReportTracker:
+    """Builds sequence numbered delta reports of the cluster jobs for the root.
+
+    A delta contains the jobs whose status changed and, per job, the instances that
+    changed since the last report acknowledged by the root. Every full_every reports,
+    before the first acknowledgement and whenever the root asks for it, a full snapshot
+    is sent instead so both sides can resynchronize.
+    """
+
+    def __init__(self, full_every, metrics_precision=0):
+        self.full_every = full_every
+        self.metrics_precision = metrics_precision
+        self._seq = 0
+        self._acked_seq = None
+        self._acked = {}
+        # reports up to this one were built before the last resync, the root dropped them
+        self._discarded_seq = 0
+        self._lock = threading.Lock()
+
+    def build(self, jobs):
+        with self._lock:
+            self._seq += 1
+            full = self._acked_seq is None or self._seq % self.full_every == 0
+            base_seq = None if full else self._acked_seq
+            acked = {} if full else self._acked
+
+            reported_jobs = []
+            fingerprints = {}
+            for job in jobs:
+                job_id = str(job.get("_id"))
+                job_fingerprint = _fingerprint([job.get("status"), job.get("status_detail")])
+                acked_job, acked_instances = acked.get(job_id, (None, {}))
+
+                instances = []
+                instance_fingerprints = {}
+                for instance in job.get("instance_list") or []:
+                    instance = _reported_instance(instance)
+                    number = instance.get("instance_number")
+                    fingerprint = _instance_fingerprint(instance, self.metrics_precision)
+                    if acked_instances.get(number) != fingerprint:
+                        instances.append(instance)
+                        instance_fingerprints[number] = fingerprint
+
+                if full or instances or acked_job != job_fingerprint:
+                    reported_jobs.append({**job, "instance_list": instances})
+                    fingerprints[job_id] = (job_fingerprint, instance_fingerprints)
+
+            return StatusReport(self._seq, base_seq, full, reported_jobs, fingerprints)
+
+    def acknowledge(self, report):
+        with self._lock:
+            if report.seq <= self._discarded_seq:
+                return
+            if report.full:
+                self._acked = {}
+            for job_id, (job_fingerprint, instance_fingerprints) in report.fingerprints.items():
+                _, acked_instances = self._acked.get(job_id, (None, {}))
+                self._acked[job_id] = (
+                    job_fingerprint,
+                    {**acked_instances, **instance_fingerprints},
+                )
+            if self._acked_seq is None or report.seq > self._acked_seq or report.full:
+                self._acked_seq = report.seq
+
+    def resync(self):
+        with self._lock:
+            self._discarded_seq = self._seq
+            self._acked_seq = None
+            self._acked = {}
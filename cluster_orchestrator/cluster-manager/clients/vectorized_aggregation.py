@@ -0,0 +1,181 @@
+from itertools import chain
+
+import numpy as np
+
+from clients.resource_aggregation import (
+    AVERAGED_RESOURCES,
+    CLUSTER_FIELDS,
+    LISTED_RESOURCES,
+    SUMMED_RESOURCES,
+    canonical_resources,
+)
+
+NEUTRAL_VALUES = {key: agg({}) for key, agg in canonical_resources.items()}
+
+
+def _is_number(val):
+    return isinstance(val, (int, float))
+
+
+def _averaged_column(workers, key):
+    """Values that take part in the average of key (NaN where a worker is skipped)."""
+    column = np.full(len(workers), np.nan)
+    for i, w in enumerate(workers):
+        val = w.get(key)
+        if val is not None and float(val) != 0:
+            column[i] = float(val)
+    return column
+
+
+def _grouped_means(column, groups, n_groups):
+    present = ~np.isnan(column)
+    counts = np.bincount(groups[present], minlength=n_groups)
+    sums = np.bincount(groups[present], weights=column[present], minlength=n_groups)
+    return [float(s / c) if c else 0.0 for s, c in zip(sums, counts)]
+
+
+def _summed_column(workers, key):
+    """Values of key as int64 column if they are all ints (like default_aggregator), else float."""
+    values = [w.get(key) for w in workers]
+    present = [i for i, val in enumerate(values) if val is not None]
+    integral = all(isinstance(values[i], int) for i in present)
+    column = np.zeros(len(values), dtype=np.int64 if integral else np.float64)
+    column[present] = [values[i] for i in present]
+    return column
+
+
+def _grouped_sums(column, groups, n_groups):
+    totals = np.zeros(n_groups, dtype=column.dtype)
+    np.add.at(totals, groups, column)
+    integral = column.dtype == np.int64
+    return [int(total) if integral else float(total) for total in totals]
+
+
+def _fold_generic(values, key):
+    """Sequential fallback with the semantics of default_aggregator for non canonical keys."""
+    acc, count = None, 0
+    for val in values:
+        if val is None:
+            continue
+        if _is_number(val):
+            if key.endswith("_percent") or key.endswith("_average"):
+                if float(val) == 0:
+                    continue
+                count += 1
+                acc = acc if acc is not None else 0.0
+                acc += (float(val) - acc) / count
+            else:
+                acc = (acc if acc is not None else 0) + val
+            continue
+        if acc is None:
+            acc = []
+        if isinstance(val, list):
+            acc.extend(val)
+        else:
+            acc.append(val)
+    return acc
+
+
+def _merge_lists(workers, key):
+    values = [w.get(key) for w in workers]
+    if all(val is None for val in values):
+        return None
+    return list(
+        chain.from_iterable(
+            val if isinstance(val, list) else [val] for val in values if val is not None
+        )
+    )
+
+
+def _merge_csi_drivers(workers):
+    names = {}
+    seen = False
+    for w in workers:
+        val = w.get("csi_drivers")
+        if val is None:
+            continue
+        seen = True
+        for item in val if isinstance(val, list) else []:
+            if isinstance(item, dict):
+                name = item.get("csi_driver_name")
+            elif isinstance(item, str):
+                name = item
+            else:
+                continue
+            if name:
+                names[name] = None
+    return list(names) if seen else None
+
+
+def _aggregate_group(workers, averages, sums):
+    """Assemble one aggregate from precomputed numeric results and the remaining keys."""
+    result = dict(NEUTRAL_VALUES)
+    result.update(averages)
+    result.update(sums)
+
+    for key in LISTED_RESOURCES:
+        result[key] = _merge_lists(workers, key)
+    result["csi_drivers"] = _merge_csi_drivers(workers)
+    result["active_nodes"] = sum(1 for w in workers if w)
+
+    other_keys = set(chain.from_iterable(w.keys() for w in workers))
+    other_keys -= CLUSTER_FIELDS | set(canonical_resources)
+    for key in other_keys:
+        result[key] = _fold_generic((w.get(key) for w in workers), key)
+
+    return result
+
+
+def aggregate_workers_by_architecture(workers):
+    """Vectorized equivalent of aggregate_workers for the cluster and every architecture.
+
+    The numeric canonical resources are packed into NumPy columns and reduced for all
+    groups in one pass. Group 0 is the whole cluster, the following groups are the
+    architectures. Results equal aggregate_workers up to the floating point rounding
+    of the summation order.
+
+    Returns (cluster aggregate, {architecture: aggregate}).
+    """
+    if workers is None:
+        return {}, {}
+
+    workers = list(workers)
+    architectures = [w.get("architecture") for w in workers]
+    arch_names = sorted({arch for arch in architectures if arch is not None})
+    arch_group = {arch: i + 1 for i, arch in enumerate(arch_names)}
+    n_groups = len(arch_names) + 1
+
+    # every worker is counted in the cluster group 0 and in its architecture group
+    cluster_rows = np.arange(len(workers))
+    arch_rows = np.array([i for i, arch in enumerate(architectures) if arch is not None], int)
+    rows = np.concatenate([cluster_rows, arch_rows]).astype(int)
+    groups = np.concatenate(
+        [
+            np.zeros(len(workers), dtype=int),
+            np.array([arch_group[architectures[i]] for i in arch_rows], dtype=int),
+        ]
+    )
+
+    averages = [{} for _ in range(n_groups)]
+    for key in AVERAGED_RESOURCES:
+        column = _averaged_column(workers, key)[rows]
+        for g, mean in enumerate(_grouped_means(column, groups, n_groups)):
+            averages[g][key] = mean
+
+    sums = [{} for _ in range(n_groups)]
+    for key in SUMMED_RESOURCES:
+        column = _summed_column(workers, key)[rows]
+        for g, total in enumerate(_grouped_sums(column, groups, n_groups)):
+            sums[g][key] = total
+
+    workers_per_arch = {arch: [] for arch in arch_names}
+    for w, arch in zip(workers, architectures):
+        if arch is not None:
+            workers_per_arch[arch].append(w)
+
+    cluster = _aggregate_group(workers, averages[0], sums[0])
+    per_arch = {
+        arch: _aggregate_group(arch_workers, averages[arch_group[arch]], sums[arch_group[arch]])
+        for arch, arch_workers in workers_per_arch.items()
+    }
+    return cluster, per_arch
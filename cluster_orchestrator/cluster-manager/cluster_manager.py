@@ -6,18 +6,23 @@ import config
 import grpc
 from apscheduler.schedulers.background import BackgroundScheduler
 from blueprints import blueprints
+from clients.job_management import job_index
 from clients.mqtt_client import mqtt_init
 from clients.my_prometheus_client import prometheus_init_gauge_metrics
+from clients.redeploy_queue import redeploy_queue
+from clients.resource_aggregation import seed_aggregator
 from cm_logging import configure_logging
 from ext_requests.system_manager_requests import (
     re_deploy_dead_jobs_routine,
     send_aggregated_info_to_sm,
+    trigger_undeploy_and_re_deploy,
 )
 from flask import Flask
 from flask_cors import CORS
 from flask_smorest import Api
 from flask_socketio import SocketIO
 from flask_swagger_ui import get_swaggerui_blueprint
+from oakestra_utils.serialization import init_flask
 from prometheus_client import start_http_server
 from proto.clusterRegistration_pb2 import CS1Message, CS2Message, KeyValue, SC1Message, SC2Message
 from proto.clusterRegistration_pb2_grpc import register_clusterStub
@@ -25,6 +30,7 @@ from proto.clusterRegistration_pb2_grpc import register_clusterStub
 my_logger = configure_logging()
 logger = logging.getLogger("cluster_manager")
 app = Flask(__name__)
+init_flask(app)
 
 app.config["OPENAPI_VERSION"] = "3.0.2"
 app.config["API_TITLE"] = "Oakestra root api"
@@ -37,6 +43,8 @@ socketioserver = SocketIO(app, logger=True, engineio_logger=True)
 api = Api(app, spec_kwargs={"x-internal-id": "1", "host": "oakestra.io"})
 cors = CORS(app, resources={r"/*": {"origins": "*"}})
 
+job_index.load()
+seed_aggregator()
 mqtt_init(app)
 
 BACKGROUND_JOB_INTERVAL = 15
@@ -70,6 +78,7 @@ def background_job_send_aggregated_information_to_sm():
         },
     )
     # job_re_deploy_dead_jobs
+    redeploy_queue.start(trigger_undeploy_and_re_deploy)
     scheduler.add_job(re_deploy_dead_jobs_routine, "interval", seconds=BACKGROUND_JOB_INTERVAL)
 
     scheduler.start()
@@ -12,3 +12,38 @@ SYSTEM_MANAGER_ADDR = (
     os.environ.get("SYSTEM_MANAGER_URL") + ":" + os.environ.get("SYSTEM_MANAGER_GRPC_PORT")
 )
 GRPC_REQUEST_TIMEOUT = 120
+
+# MQTT ingestion: messages are handed off the paho network thread to per-topic worker pools
+MQTT_QUEUE_SIZE = int(os.environ.get("MQTT_QUEUE_SIZE", 1000))
+MQTT_INFORMATION_WORKERS = int(os.environ.get("MQTT_INFORMATION_WORKERS", 2))
+MQTT_JOB_WORKERS = int(os.environ.get("MQTT_JOB_WORKERS", 4))
+
+# Latest node information reports are coalesced and written in bulk every interval (seconds)
+NODE_INFORMATION_FLUSH_INTERVAL = float(os.environ.get("NODE_INFORMATION_FLUSH_INTERVAL", 1))
+
+# Maximum number of job names kept in the local job index
+JOB_INDEX_SIZE = int(os.environ.get("JOB_INDEX_SIZE", 10000))
+
+# Nodes without an information report within this interval (seconds) are not aggregated
+NODE_FRESHNESS_INTERVAL = int(os.environ.get("NODE_FRESHNESS_INTERVAL", 30))
+
+# "incremental" keeps the aggregate current from node reports, "python" and "numpy"
+# recompute it from all active candidates on every report with the respective engine
+AGGREGATION_ENGINE = os.environ.get("AGGREGATION_ENGINE", "incremental")
+
+# Status reports to the root are deltas, with a full snapshot every N reports
+STATUS_REPORT_FULL_EVERY = int(os.environ.get("STATUS_REPORT_FULL_EVERY", 20))
+# Instance cpu/memory changes below this many decimals are not reported
+STATUS_REPORT_METRICS_PRECISION = int(os.environ.get("STATUS_REPORT_METRICS_PRECISION", 0))
+
+# Failed instances are redeployed by a fixed worker pool, with an exponential backoff
+# per instance between base and max seconds
+REDEPLOY_WORKERS = int(os.environ.get("REDEPLOY_WORKERS", 4))
+REDEPLOY_BACKOFF_BASE = float(os.environ.get("REDEPLOY_BACKOFF_BASE", 15))
+REDEPLOY_BACKOFF_MAX = float(os.environ.get("REDEPLOY_BACKOFF_MAX", 600))
+
+# Worker addresses used for placements are cached, and read again after the TTL (seconds)
+CANDIDATE_CACHE_SIZE = int(os.environ.get("CANDIDATE_CACHE_SIZE", 10000))
+CANDIDATE_CACHE_TTL = float(os.environ.get("CANDIDATE_CACHE_TTL", 300))
+# Deployments are announced to the network component by these threads, off the placement path
+NETWORK_NOTIFY_WORKERS = int(os.environ.get("NETWORK_NOTIFY_WORKERS", 2))
@@ -1,6 +1,8 @@
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 
+import config
 import requests
 
 logger = logging.getLogger("cluster_manager")
@@ -24,6 +26,16 @@ def network_notify_deployment(job_id, job):
         logger.error("Calling Service Manager /api/net/deployment not successful.")
 
 
+_notify_executor = ThreadPoolExecutor(
+    max_workers=config.NETWORK_NOTIFY_WORKERS, thread_name_prefix="network-notify"
+)
+
+
+def network_notify_deployment_async(job_id, job):
+    """network_notify_deployment from a background thread, the caller does not wait for it."""
+    _notify_executor.submit(network_notify_deployment, job_id, dict(job))
+
+
 def network_notify_migration(job_id, job):
     pass
 
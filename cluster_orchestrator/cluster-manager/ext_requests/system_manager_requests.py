@@ -3,9 +3,12 @@ import os
 import threading
 import traceback
 
+import config
 import requests
 from clients import job_management, resource_aggregation
 from clients.my_prometheus_client import prometheus_set_metrics
+from clients.redeploy_queue import redeploy_queue
+from clients.status_report import StatusReportTracker
 from oakestra_utils.types.statuses import (
     DeploymentStatus,
     NegativeSchedulingStatus,
@@ -21,13 +24,20 @@ SYSTEM_MANAGER_ADDR = (
     "http://" + os.environ.get("SYSTEM_MANAGER_URL") + ":" + os.environ.get("SYSTEM_MANAGER_PORT")
 )
 
+status_reports = StatusReportTracker(
+    config.STATUS_REPORT_FULL_EVERY, config.STATUS_REPORT_METRICS_PRECISION
+)
+
 
 def send_aggregated_info_to_sm(my_id, time_interval):
     try:
         data = resource_aggregation.aggregate_info(time_interval)
-        data.update({"jobs": job_management.aggregate_info(time_interval)})
+        report = status_reports.build(job_management.aggregate_info(time_interval))
+        data.update(report.payload())
         logger.debug("sending aggregated info to system manager: %s", data)
-        threading.Thread(group=None, target=send_aggregated_info, args=(my_id, data)).start()
+        threading.Thread(
+            group=None, target=send_aggregated_info, args=(my_id, data, report)
+        ).start()
         prometheus_set_metrics(data)
     except Exception as e:
         logger.error(e)
@@ -46,22 +56,31 @@ def re_deploy_dead_jobs_routine():
             for job in jobs:
                 for instance in job.get("instance_list", []):
                     if convert_to_status(instance.get("status")) in re_deploy_triggers:
-                        logger.info("FAILED INSTANCE, ATTEMPTING RE-DEPLOY")
-                        threading.Thread(
-                            group=None,
-                            target=trigger_undeploy_and_re_deploy,
-                            args=(job, instance),
-                        ).start()
+                        redeploy_queue.submit(job, instance)
     except Exception as e:
         logger.error(e)
         traceback.print_exc()
 
 
-def send_aggregated_info(my_id, data):
+def send_aggregated_info(my_id, data, report):
     try:
-        requests.post(SYSTEM_MANAGER_ADDR + "/api/information/" + str(my_id), json=data)
+        response = requests.post(SYSTEM_MANAGER_ADDR + "/api/information/" + str(my_id), json=data)
+        response.raise_for_status()
     except requests.exceptions.RequestException:
         logger.error("Calling System Manager /api/information not successful.")
+        return
+
+    try:
+        resync = response.json().get("resync", False)
+    except (ValueError, AttributeError):
+        # root without delta support, every report is applied as is
+        resync = False
+
+    if resync:
+        logger.info("System Manager requested a full status report")
+        status_reports.resync()
+    else:
+        status_reports.acknowledge(report)
 
 
 def trigger_undeploy_and_re_deploy(service, instance):
@@ -0,0 +1,13 @@
+import os
+
+# required at import time, the tests do not connect to any of these services
+for variable, default in [
+    ("SYSTEM_MANAGER_URL", "localhost"),
+    ("SYSTEM_MANAGER_PORT", "10000"),
+    ("SYSTEM_MANAGER_GRPC_PORT", "50052"),
+    ("CLUSTER_SCHEDULER_URL", "localhost"),
+    ("CLUSTER_SCHEDULER_PORT", "10005"),
+    ("CLUSTER_SERVICE_MANAGER_ADDR", "localhost"),
+    ("CLUSTER_SERVICE_MANAGER_PORT", "10110"),
+]:
+    os.environ.setdefault(variable, default)
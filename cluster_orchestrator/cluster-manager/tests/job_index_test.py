@@ -0,0 +1,58 @@
+import unittest
+from unittest.mock import patch
+
+from clients.job_index import JobIndex
+
+JOB_ID = "65d200f3812caeb85e21ee19"
+
+
+def job(name, *numbers, job_id=JOB_ID):
+    return {
+        "_id": job_id,
+        "job_name": name,
+        "instance_list": [{"instance_number": n} for n in numbers],
+    }
+
+
+@patch("clients.job_index.job_operations")
+class JobIndexTestCase(unittest.TestCase):
+    def test_known_instances_need_no_lookup(self, mock_ops):
+        index = JobIndex(max_size=10)
+        index.add(job("a", 0, 1))
+
+        self.assertEqual(index.instance_job_id("a", 1), JOB_ID)
+        self.assertIsNone(index.instance_job_id("a", 2))
+        mock_ops.get_jobs.assert_not_called()
+
+    def test_unknown_job_is_looked_up_once(self, mock_ops):
+        mock_ops.get_jobs.return_value = [job("a", 0)]
+        index = JobIndex(max_size=10)
+
+        self.assertEqual(index.instance_job_id("a", 0), JOB_ID)
+        self.assertEqual(index.instance_job_id("a", 0), JOB_ID)
+        mock_ops.get_jobs.assert_called_once()
+
+    def test_removed_instances_are_unknown(self, mock_ops):
+        mock_ops.get_jobs.return_value = []
+        index = JobIndex(max_size=10)
+        index.add(job("a", 0, 1))
+
+        index.remove_instance("a", 1)
+        self.assertIsNone(index.instance_job_id("a", 1))
+        index.remove("a")
+        self.assertIsNone(index.instance_job_id("a", 0))
+
+    def test_least_recently_used_job_is_evicted(self, mock_ops):
+        mock_ops.get_jobs.return_value = []
+        index = JobIndex(max_size=2)
+        index.add(job("a", 0))
+        index.add(job("b", 0))
+        index.lookup("a")
+        index.add(job("c", 0))
+
+        self.assertIsNone(index.lookup("b"))
+        self.assertIsNotNone(index.lookup("a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
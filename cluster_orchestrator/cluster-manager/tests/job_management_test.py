@@ -0,0 +1,61 @@
+import unittest
+from unittest.mock import patch
+
+from clients import job_management
+from clients.job_index import JobIndex
+
+JOB_ID = "65d200f3812caeb85e21ee19"
+
+
+@patch("clients.job_management.job_operations")
+class DeployedInstanceReportTestCase(unittest.TestCase):
+    def setUp(self):
+        self.index = JobIndex(max_size=10)
+        self.index.add({"_id": JOB_ID, "job_name": "a", "instance_list": [{"instance_number": 0}]})
+        patcher = patch("clients.job_management.job_index", self.index)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_status_and_public_ip_are_one_request(self, mock_ops):
+        job_management.update_deployed_instance_worker("a", "0", "RUNNING", None, "1.2.3.4")
+
+        mock_ops.set_job_instance_status.assert_called_once_with(
+            JOB_ID, 0, "RUNNING", None, fields={"publicip": "1.2.3.4"}
+        )
+        mock_ops.upsert_job_instance.assert_not_called()
+
+    def test_created_keeps_the_scheduling_status(self, mock_ops):
+        job_management.update_deployed_instance_worker("a", "0", "CREATED", None, "1.2.3.4")
+
+        mock_ops.set_job_instance_status.assert_not_called()
+        mock_ops.upsert_job_instance.assert_called_once_with(JOB_ID, 0, {"publicip": "1.2.3.4"})
+
+    def test_deleted_job_is_removed_from_the_index(self, mock_ops):
+        mock_ops.set_job_instance_status.return_value = None
+        mock_ops.get_jobs.return_value = []
+
+        job_management.update_deployed_instance_worker("a", "0", "FAILED", "exited", None)
+
+        self.assertIsNone(self.index.lookup("a"))
+
+
+@patch("clients.job_management.job_operations")
+class CommitPlacementTestCase(unittest.TestCase):
+    @patch("clients.job_management.candidate_cache")
+    def test_unknown_worker_is_raised(self, mock_cache, mock_ops):
+        mock_cache.address.return_value = None
+
+        with self.assertRaises(job_management.UnknownWorker):
+            job_management.commit_placement(JOB_ID, 0, "w1", "NODE_SCHEDULED")
+        mock_ops.place_job_instance.assert_not_called()
+
+    @patch("clients.job_management.candidate_cache")
+    def test_deleted_job_returns_none(self, mock_cache, mock_ops):
+        mock_cache.address.return_value = ("10.0.0.2", 50011)
+        mock_ops.place_job_instance.return_value = None
+
+        self.assertIsNone(job_management.commit_placement(JOB_ID, 0, "w1", "NODE_SCHEDULED"))
+
+
+if __name__ == "__main__":
+    unittest.main()
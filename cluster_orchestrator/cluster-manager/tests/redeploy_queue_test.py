@@ -0,0 +1,75 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+from clients.redeploy_queue import RedeployQueue
+
+JOB = {"_id": "65d200f3812caeb85e21ee19", "job_name": "app.ns.svc.ns"}
+INSTANCE = {"instance_number": 0}
+
+
+class RedeployQueueTestCase(unittest.TestCase):
+    def setUp(self):
+        self.queue = RedeployQueue(workers=1, base_delay=10, max_delay=40)
+        self.redeployed = []
+        self.release = threading.Event()
+        self.release.set()
+
+        def handler(job, instance):
+            self.release.wait(5)
+            self.redeployed.append((job["_id"], instance["instance_number"]))
+
+        self.queue.start(handler)
+
+    def test_redeploy_in_flight_is_not_queued_twice(self):
+        self.release.clear()
+
+        self.assertTrue(self.queue.submit(JOB, INSTANCE))
+        self.assertFalse(self.queue.submit(JOB, INSTANCE))
+        self.release.set()
+        self.queue._queue.join()
+
+        self.assertEqual(self.redeployed, [(JOB["_id"], 0)])
+
+    @patch("clients.redeploy_queue.time.monotonic")
+    def test_retries_back_off(self, mock_time):
+        mock_time.return_value = 1000.0
+        self.queue.submit(JOB, INSTANCE)
+        self.queue._queue.join()
+
+        mock_time.return_value = 1004.0
+        self.assertFalse(self.queue.submit(JOB, INSTANCE))
+        mock_time.return_value = 1010.0
+        self.assertTrue(self.queue.submit(JOB, INSTANCE))
+        self.queue._queue.join()
+
+        # the second attempt waits 10 to 20 seconds
+        mock_time.return_value = 1019.0
+        self.assertFalse(self.queue.submit(JOB, INSTANCE))
+        mock_time.return_value = 1030.0
+        self.assertTrue(self.queue.submit(JOB, INSTANCE))
+
+    def test_delay_grows_up_to_the_maximum(self):
+        for attempts, low, high in [(1, 5, 10), (2, 10, 20), (3, 20, 40), (6, 20, 40)]:
+            self.assertTrue(low <= self.queue._delay(attempts) <= high)
+
+    def test_recovered_instance_is_redeployed_immediately(self):
+        self.queue.submit(JOB, INSTANCE)
+        self.queue._queue.join()
+
+        self.queue.recovered(JOB["_id"], 0)
+
+        self.assertTrue(self.queue.submit(JOB, INSTANCE))
+
+    def test_failed_handler_releases_the_instance(self):
+        self.queue.handler = lambda job, instance: 1 / 0
+
+        self.queue.submit(JOB, INSTANCE)
+        self.queue._queue.join()
+        self.queue.forget(JOB["_id"], 0)
+
+        self.assertTrue(self.queue.submit(JOB, INSTANCE))
+
+
+if __name__ == "__main__":
+    unittest.main()
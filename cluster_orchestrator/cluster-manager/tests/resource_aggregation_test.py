@@ -0,0 +1,71 @@
+import time
+import unittest
+
+from clients.resource_aggregation import (
+    ClusterAggregator,
+    aggregate_candidates,
+    canonical_resources,
+)
+
+
+def worker(node_id, cpu_percent, memory, architecture="amd64"):
+    return {
+        "_id": node_id,
+        "cpu_percent": cpu_percent,
+        "memory_percent": 50.0,
+        "memory": memory,
+        "vcpus": 4,
+        "architecture": architecture,
+        "virtualization": ["docker"],
+    }
+
+
+def canonical(aggregate):
+    """The aggregator only keeps the canonical resources, not e.g. the architecture list."""
+    return {key: val for key, val in aggregate.items() if key in canonical_resources}
+
+
+class ClusterAggregatorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.aggregator = ClusterAggregator(freshness_interval=30)
+
+    def assertAggregates(self, snapshot, workers):
+        expected = aggregate_candidates(workers)
+        self.assertEqual(canonical(snapshot), canonical(expected))
+        self.assertEqual(
+            {arch: canonical(a) for arch, a in snapshot["aggregation_per_architecture"].items()},
+            {arch: canonical(a) for arch, a in expected["aggregation_per_architecture"].items()},
+        )
+
+    def test_updates_match_the_full_recomputation(self):
+        self.aggregator.update("a", worker("a", 10.0, 1024))
+        self.aggregator.update("b", worker("b", 30.0, 2048, architecture="arm64"))
+        self.aggregator.update("a", worker("a", 20.0, 4096))
+
+        self.assertAggregates(
+            self.aggregator.snapshot(),
+            [worker("a", 20.0, 4096), worker("b", 30.0, 2048, architecture="arm64")],
+        )
+
+    def test_removed_node_leaves_no_contribution(self):
+        self.aggregator.update("a", worker("a", 10.0, 1024))
+        self.aggregator.update("b", worker("b", 30.0, 2048, architecture="arm64"))
+
+        self.aggregator.remove("b")
+
+        snapshot = self.aggregator.snapshot()
+        self.assertAggregates(snapshot, [worker("a", 10.0, 1024)])
+        self.assertEqual(list(snapshot["aggregation_per_architecture"]), ["amd64"])
+
+    def test_stale_nodes_expire(self):
+        self.aggregator.update("a", worker("a", 10.0, 1024), timestamp=time.time() - 60)
+        self.aggregator.update("b", worker("b", 30.0, 2048))
+
+        snapshot = self.aggregator.snapshot()
+
+        self.assertEqual(snapshot["active_nodes"], 1)
+        self.assertEqual(snapshot["memory"], 2048)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,48 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from blueprints.service_blueprints import schedulingblp
+from clients.job_management import UnknownWorker
+from flask import Flask
+
+JOB_ID = "65d200f3812caeb85e21ee19"
+WORKER_ID = "65d200f3812caeb85e21ee12"
+
+
+@patch("blueprints.service_blueprints.mqtt_publish_edge_deploy")
+@patch("blueprints.service_blueprints.job_operations")
+class SchedulingResultTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.register_blueprint(schedulingblp)
+        self.client = self.app.test_client()
+
+    def post_result(self):
+        return self.client.post(
+            "/api/result/deploy", json={"job_id": f"{JOB_ID}/0", "candidate_id": WORKER_ID}
+        )
+
+    @patch(
+        "blueprints.service_blueprints.job_management.commit_placement",
+        side_effect=UnknownWorker(WORKER_ID),
+    )
+    def test_unknown_worker_fails_the_scheduling(self, _, mock_ops, mock_deploy):
+        response = self.post_result()
+
+        self.assertEqual(json.loads(response.data)["status"], "worker_not_found")
+        job_id, instance_number, status, _ = mock_ops.set_job_instance_status.call_args.args
+        self.assertEqual((job_id, instance_number, status), (JOB_ID, 0, "NO_NODE_FOUND"))
+        mock_deploy.assert_not_called()
+
+    @patch("blueprints.service_blueprints.job_management.commit_placement", return_value=None)
+    def test_deleted_job_is_not_deployed(self, _, mock_ops, mock_deploy):
+        response = self.post_result()
+
+        self.assertEqual(json.loads(response.data)["status"], "job_not_found")
+        mock_ops.set_job_instance_status.assert_not_called()
+        mock_deploy.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
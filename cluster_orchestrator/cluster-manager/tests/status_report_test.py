@@ -0,0 +1,93 @@
+import unittest
+
+from clients.status_report import StatusReportTracker
+
+
+def job(job_id, *instances, status="RUNNING"):
+    return {
+        "_id": job_id,
+        "job_name": f"{job_id}.ns",
+        "status": status,
+        "instance_list": list(instances),
+    }
+
+
+def instance(number, cpu_percent=1.0, status="RUNNING"):
+    return {
+        "instance_number": number,
+        "status": status,
+        "cpu_percent": cpu_percent,
+        "cpu_history": [cpu_percent],
+        "last_modified_timestamp": 1767225600.0 + cpu_percent,
+    }
+
+
+class StatusReportTrackerTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tracker = StatusReportTracker(full_every=5)
+        self.jobs = [job("a", instance(0), instance(1)), job("b", instance(0))]
+
+    def test_full_report_until_acknowledged(self):
+        first = self.tracker.build(self.jobs)
+        second = self.tracker.build(self.jobs)
+
+        self.assertTrue(first.full and second.full)
+        self.assertEqual(len(second.payload()["jobs"]), 2)
+        self.assertNotIn("cpu_history", second.jobs[0]["instance_list"][0])
+
+    def test_delta_against_the_acknowledged_report(self):
+        self.tracker.acknowledge(self.tracker.build(self.jobs))
+
+        self.assertEqual(self.tracker.build(self.jobs).jobs, [])
+
+        changed = [job("a", instance(0), instance(1, cpu_percent=50.0)), job("b", instance(0))]
+        delta = self.tracker.build(changed)
+
+        self.assertFalse(delta.full)
+        self.assertEqual(delta.base_seq, 1)
+        self.assertEqual([j["_id"] for j in delta.jobs], ["a"])
+        self.assertEqual([i["instance_number"] for i in delta.jobs[0]["instance_list"]], [1])
+        self.assertIn("last_modified_timestamp", delta.jobs[0]["instance_list"][0])
+
+    def test_unacknowledged_delta_is_sent_again(self):
+        self.tracker.acknowledge(self.tracker.build(self.jobs))
+        changed = [job("a", instance(0), instance(1)), job("b", instance(0), status="FAILED")]
+
+        self.tracker.build(changed)
+        retried = self.tracker.build(changed)
+
+        self.assertEqual(retried.base_seq, 1)
+        self.assertEqual([j["_id"] for j in retried.jobs], ["b"])
+
+    def test_metric_noise_below_the_precision_is_no_change(self):
+        self.tracker.acknowledge(self.tracker.build(self.jobs))
+
+        noisy = [job("a", instance(0, cpu_percent=1.2), instance(1)), job("b", instance(0))]
+
+        self.assertEqual(self.tracker.build(noisy).jobs, [])
+
+    def test_resync_drops_the_pending_delta(self):
+        self.tracker.acknowledge(self.tracker.build(self.jobs))
+        delta = self.tracker.build([job("a", instance(0, status="FAILED"))])
+
+        self.tracker.resync()
+        self.tracker.acknowledge(delta)
+        report = self.tracker.build(self.jobs)
+
+        self.assertTrue(report.full)
+        self.assertIsNone(report.base_seq)
+        self.assertEqual(len(report.jobs), 2)
+
+    def test_periodic_full_report(self):
+        reports = []
+        for _ in range(5):
+            report = self.tracker.build(self.jobs)
+            self.tracker.acknowledge(report)
+            reports.append(report)
+
+        self.assertEqual([report.full for report in reports], [True, False, False, False, True])
+        self.assertEqual(len(reports[-1].jobs), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+"""Compares json.dumps(default=str)/json.loads with oakestra_utils.serialization.
+
+Payloads mimic what the resource abstractor serves most: a page of jobs with their
+instances and the list of worker candidates.
+
+Run from the oakestra_utils_library directory:
+    python benchmarks/serialization_benchmark.py [--jobs 500] [--candidates 200] [--rounds 20]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from bson import ObjectId
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from oakestra_utils import serialization  # noqa: E402
+from oakestra_utils.types.statuses import DeploymentStatus  # noqa: E402
+
+
+def job(index, instances):
+    now = datetime.now()
+    return {
+        "_id": ObjectId(),
+        "applicationID": str(ObjectId()),
+        "job_name": f"app{index}.ns.svc{index}.ns",
+        "image": "docker.io/library/nginx:latest",
+        "virtualization": "container",
+        "memory": 100,
+        "vcpus": 1,
+        "port": "80:80/tcp",
+        "status": DeploymentStatus.RUNNING,
+        "last_modified_timestamp": now,
+        "instance_list": [
+            {
+                "instance_number": number,
+                "status": DeploymentStatus.RUNNING,
+                "status_detail": "",
+                "cluster_id": str(ObjectId()),
+                "worker_id": str(ObjectId()),
+                "publicip": "10.0.0.1",
+                "cpu": 3.25,
+                "memory": 41.5,
+                "disk": 2048,
+                "logs": "",
+                "last_modified_timestamp": now,
+            }
+            for number in range(instances)
+        ],
+    }
+
+
+def candidate(index):
+    return {
+        "_id": ObjectId(),
+        "candidate_name": f"worker-{index}",
+        "ip": f"10.0.{index // 256}.{index % 256}",
+        "port": 10000,
+        "candidate_location": {"lat": 48.1, "long": 11.6},
+        "cpu_percent": 12.5,
+        "vcpus": 8,
+        "memory_percent": 40.2,
+        "memory": 16384,
+        "vram": 0,
+        "vgpus": 0,
+        "virtualization": ["container", "unikernel"],
+        "csi_drivers": [],
+        "last_modified_timestamp": datetime.now(),
+    }
+
+
+def per_second(fn, payload, rounds):
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn(payload)
+    return rounds / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--jobs", type=int, default=500)
+    parser.add_argument("--instances", type=int, default=3)
+    parser.add_argument("--candidates", type=int, default=200)
+    parser.add_argument("--rounds", type=int, default=20)
+    args = parser.parse_args()
+
+    payloads = {
+        "jobs": [job(index, args.instances) for index in range(args.jobs)],
+        "candidates": [candidate(index) for index in range(args.candidates)],
+    }
+    backend = "orjson" if serialization.orjson is not None else "json (orjson not installed)"
+    print(f"oakestra_utils.serialization backend: {backend}")
+    print(f"{'payload':>11} {'op':>7} {'json [/s]':>10} {'oakestra [/s]':>14} {'speedup':>8}")
+
+    for name, payload in payloads.items():
+        assert json.loads(json.dumps(payload, default=str)) == serialization.loads(
+            serialization.dumps(payload)
+        )
+        encoded = json.dumps(payload, default=str).encode()
+        cases = [
+            ("dumps", lambda p: json.dumps(p, default=str).encode(), serialization.dumpb, payload),
+            ("loads", json.loads, serialization.loads, encoded),
+        ]
+        for op, before_fn, after_fn, arg in cases:
+            before = per_second(before_fn, arg, args.rounds)
+            after = per_second(after_fn, arg, args.rounds)
+            print(f"{name:>11} {op:>7} {before:>10.0f} {after:>14.0f} {after / before:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""JSON encoding shared by the Oakestra services.
+
+dumps produces the same documents as json.dumps(obj, default=str), which the services
+used so far, but encodes with orjson when it is installed (oakestra_utils[fast-json]):
+ObjectIds and datetimes become their str(), enums their value. Without orjson the
+standard library is used.
+"""
+
+import enum
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the installed extras
+    orjson = None
+
+# datetimes go through default, so they keep the str() format of json.dumps(default=str),
+# numpy scalars (e.g. metrics computed with numpy) stay numbers
+_ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_SERIALIZE_NUMPY
+    if orjson is not None
+    else 0
+)
+
+if orjson is not None:
+    # orjson looks up the numpy types on the first object that needs default, a lookup
+    # racing in several request threads crashes the process, so it is done on import
+    orjson.dumps(object(), default=str, option=_ORJSON_OPTIONS)
+
+
+def default(obj):
+    """Fallback for the types JSON has no representation for."""
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    return str(obj)
+
+
+def dumpb(obj) -> bytes:
+    """Encode obj as UTF-8 JSON bytes, the form written to responses and sockets."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=_ORJSON_OPTIONS)
+    return json.dumps(obj, default=default).encode()
+
+
+def dumps(obj) -> str:
+    """Encode obj as JSON string."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=_ORJSON_OPTIONS).decode()
+    return json.dumps(obj, default=default)
+
+
+def loads(data):
+    """Decode JSON from str, bytes or bytearray."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class JSONEncoder(json.JSONEncoder):
+    """json.JSONEncoder that encodes with dumps, for Flask < 2.2 (app.json_encoder).
+
+    Formatting arguments such as indent are ignored, responses are always compact.
+    """
+
+    def encode(self, o):
+        return dumps(o)
+
+
+def init_flask(app):
+    """Serialize the JSON responses of a Flask app (jsonify, flask-smorest) with dumps."""
+    try:
+        from flask.json.provider import DefaultJSONProvider
+    except ImportError:
+        app.json_encoder = JSONEncoder
+        return
+
+    class JSONProvider(DefaultJSONProvider):
+        def dumps(self, obj, **kwargs):
+            return dumps(obj)
+
+        def loads(self, s, **kwargs):
+            return loads(s)
+
+    app.json = JSONProvider(app)
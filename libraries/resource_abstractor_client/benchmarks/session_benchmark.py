@@ -0,0 +1,83 @@
+"""Compares requests/s of a new connection per call with the pooled client session.
+
+A local HTTP/1.1 server with keep-alive stands in for the resource abstractor.
+
+Run from the resource_abstractor_client directory:
+    python benchmarks/session_benchmark.py [--requests 2000] [--threads 1 8]
+"""
+
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from resource_abstractor_client import client_helper, job_operations  # noqa: E402
+
+JOB = json.dumps(
+    {"_id": "65d200f3812caeb85e21ee19", "job_name": "app.ns.svc.ns", "instance_list": []}
+).encode()
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # headers and body are separate writes, avoid delayed ACKs on kept alive connections
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(JOB)))
+        self.end_headers()
+        self.wfile.write(JOB)
+
+    def log_message(self, *args):
+        pass
+
+
+def new_connection_per_call(job_id):
+    # the client before pooling: module level requests.get
+    url = f"{client_helper.RESOURCE_ABSTRACTOR_ADDR}{job_operations.JOBS_API}/{job_id}"
+    return requests.get(url).json()
+
+
+def pooled_session(job_id):
+    return job_operations.get_job_by_id(job_id)
+
+
+def requests_per_second(fn, total, threads):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(fn, ["65d200f3812caeb85e21ee19"] * total))
+    return total / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 8])
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    client_helper.RESOURCE_ABSTRACTOR_ADDR = f"http://127.0.0.1:{server.server_port}"
+
+    print(f"{'threads':>8} {'new conn [req/s]':>17} {'pooled [req/s]':>15} {'speedup':>8}")
+    for threads in args.threads:
+        before = requests_per_second(new_connection_per_call, args.requests, threads)
+        after = requests_per_second(pooled_session, args.requests, threads)
+        print(f"{threads:>8} {before:>17.0f} {after:>15.0f} {after / before:>7.1f}x")
+
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
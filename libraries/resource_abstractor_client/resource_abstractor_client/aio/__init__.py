@@ -0,0 +1,10 @@
+"""Asyncio variant of resource_abstractor_client, requires the aio extra (aiohttp).
+
+The operation modules mirror the synchronous ones, every function is a coroutine:
+
+    from resource_abstractor_client.aio import client_helper, job_operations
+
+    jobs = client_helper.run(
+        client_helper.gather_bounded(job_operations.get_job_by_id(i) for i in job_ids)
+    )
+"""
@@ -0,0 +1,55 @@
+from resource_abstractor_client.aio.client_helper import iter_pages, make_request
+from resource_abstractor_client.client_helper import projection_params
+
+APPS_API = "/api/v1/applications"
+
+
+async def get_apps(fields=None, exclude=None, **kwargs):
+    params = {**kwargs, **projection_params(fields, exclude)}
+    return await make_request("GET", APPS_API, params=params)
+
+
+def iter_apps(fields=None, exclude=None, **kwargs):
+    """Like get_apps, but fetches the applications page by page.
+
+    Raises aiohttp.ClientError if a page cannot be fetched.
+    """
+    return iter_pages(APPS_API, {**kwargs, **projection_params(fields, exclude)})
+
+
+async def get_user_apps(user_id, filter={}, fields=None, exclude=None):
+    filter = {**filter, "userId": user_id, **projection_params(fields, exclude)}
+    return await make_request("GET", APPS_API, params=filter)
+
+
+async def get_app_by_name_and_namespace(app_name, app_ns, user_id, filter={}):
+    filter = {
+        **filter,
+        "userId": user_id,
+        "application_name": app_name,
+        "application_namespace": app_ns,
+    }
+    result = await make_request("GET", APPS_API, params=filter)
+    return result[0] if result else None
+
+
+async def get_app_by_id(app_id, user_id, filter={}, fields=None, exclude=None):
+    filter = {**filter, "userId": user_id, **projection_params(fields, exclude)}
+    request_address = f"{APPS_API}/{app_id}"
+    return await make_request("GET", request_address, params=filter)
+
+
+async def create_app(user_id, data):
+    data["userId"] = user_id
+    return await make_request("POST", APPS_API, json=data)
+
+
+async def update_app(app_id, user_id, data):
+    request_address = f"{APPS_API}/{app_id}"
+    data["userId"] = user_id
+    return await make_request("PATCH", request_address, json=data)
+
+
+async def delete_app(app_id):
+    request_address = f"{APPS_API}/{app_id}"
+    return await make_request("DELETE", request_address)
@@ -0,0 +1,41 @@
+from resource_abstractor_client.aio.client_helper import make_request
+from resource_abstractor_client.client_helper import projection_params
+
+RESOURCES_API = "/api/v1/resources"
+
+
+async def get_candidates(fields=None, exclude=None, **kwargs):
+    params = {**kwargs, **projection_params(fields, exclude)}
+    return await make_request("GET", RESOURCES_API, params=params)
+
+
+async def get_candidate_by_id(candidate_id, fields=None, exclude=None):
+    request_address = f"{RESOURCES_API}/{candidate_id}"
+    return await make_request("GET", request_address, params=projection_params(fields, exclude))
+
+
+async def get_candidate_by_name(candidate_name):
+    candidates = await get_candidates(cluster_name=candidate_name)
+    return candidates[0] if candidates else None
+
+
+async def get_candidate_by_ip(ip):
+    candidates = await get_candidates(ip=ip)
+    return candidates[0] if candidates else None
+
+
+async def update_candidate_information(candidate_id, data):
+    request_address = f"{RESOURCES_API}/{candidate_id}"
+    return await make_request("PATCH", request_address, json=data)
+
+
+async def create_candidate(data):
+    return await make_request("PUT", RESOURCES_API, json=data)
+
+
+async def update_candidates_information(updates):
+    """Bulk update, every entry must contain the candidate "_id".
+
+    Returns {"updated": [ids], "missing": [ids]} or None if the request failed.
+    """
+    return await make_request("PATCH", RESOURCES_API, json=updates)
@@ -0,0 +1,144 @@
+import asyncio
+import atexit
+import logging
+import threading
+import weakref
+from typing import Optional
+
+from resource_abstractor_client import client_helper
+
+try:
+    import aiohttp
+except ImportError as e:
+    raise ImportError(
+        "resource_abstractor_client.aio requires aiohttp, install resource_abstractor_client[aio]"
+    ) from e
+
+# one session, and with it one connection pool, per event loop
+_sessions = weakref.WeakKeyDictionary()
+
+
+def get_session() -> "aiohttp.ClientSession":
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        session = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=client_helper.POOL_SIZE),
+            timeout=aiohttp.ClientTimeout(
+                sock_connect=client_helper.CONNECT_TIMEOUT,
+                sock_read=client_helper.READ_TIMEOUT,
+            ),
+        )
+        _sessions[loop] = session
+    return session
+
+
+async def close_session():
+    session = _sessions.pop(asyncio.get_running_loop(), None)
+    if session is not None:
+        await session.close()
+
+
+def _query_params(params):
+    """Encode query parameters like requests: lists repeat the key, None is left out."""
+    query = []
+    for key, val in (params or {}).items():
+        for item in val if isinstance(val, (list, tuple)) else [val]:
+            if item is not None:
+                query.append((key, str(item)))
+    return query
+
+
+async def make_request(method: str, api: str, **kwargs) -> Optional[dict]:
+    url = f"{client_helper.RESOURCE_ABSTRACTOR_ADDR}{api}"
+    if "params" in kwargs:
+        kwargs["params"] = _query_params(kwargs["params"])
+    try:
+        async with get_session().request(method, url, **kwargs) as response:
+            response.raise_for_status()
+            # the resource abstractor does not always set a json content type
+            return client_helper.loads(await response.read())
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+        logging.warning(f"Calling {url} not successful.")
+
+    return None
+
+
+async def iter_pages(api: str, params: Optional[dict] = None, page_size=client_helper.PAGE_SIZE):
+    """Async iterator over all documents of a list endpoint, fetched page by page.
+
+    Raises aiohttp.ClientError if a page cannot be fetched.
+    """
+    url = f"{client_helper.RESOURCE_ABSTRACTOR_ADDR}{api}"
+    params = {**(params or {}), "limit": page_size}
+    while True:
+        async with get_session().get(url, params=_query_params(params)) as response:
+            response.raise_for_status()
+            documents = client_helper.loads(await response.read())
+            after = response.headers.get(client_helper.NEXT_PAGE_HEADER)
+
+        for document in documents:
+            yield document
+        if after is None:
+            return
+        params["after"] = after
+
+
+async def gather_bounded(coroutines, limit=client_helper.POOL_SIZE, return_exceptions=False):
+    """asyncio.gather with at most limit of the coroutines running at the same time."""
+    semaphore = asyncio.Semaphore(limit)
+
+    async def bounded(coroutine):
+        async with semaphore:
+            return await coroutine
+
+    return await asyncio.gather(
+        *(bounded(coroutine) for coroutine in coroutines), return_exceptions=return_exceptions
+    )
+
+
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def _background_loop():
+    """Event loop of the synchronous callers, kept running in a daemon thread.
+
+    Keeping the loop keeps its session, so consecutive run calls reuse the pooled
+    connections instead of opening new ones.
+    """
+    global _loop
+    with _loop_lock:
+        if _loop is None or _loop.is_closed():
+            _loop = asyncio.new_event_loop()
+            threading.Thread(
+                target=_loop.run_forever, name="resource-abstractor-client", daemon=True
+            ).start()
+        return _loop
+
+
+def run(coroutine, timeout=None):
+    """Run a coroutine from synchronous code on the shared background loop."""
+    loop = _background_loop()
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if running is loop:
+        coroutine.close()
+        raise RuntimeError("run must not be called from a coroutine of the client loop")
+
+    return asyncio.run_coroutine_threadsafe(coroutine, loop).result(timeout)
+
+
+@atexit.register
+def shutdown():
+    """Close the session of the background loop and stop the loop."""
+    global _loop
+    with _loop_lock:
+        loop, _loop = _loop, None
+    if loop is None or loop.is_closed():
+        return
+
+    asyncio.run_coroutine_threadsafe(close_session(), loop).result(client_helper.CONNECT_TIMEOUT)
+    loop.call_soon_threadsafe(loop.stop)
@@ -0,0 +1,143 @@
+from typing import Optional
+
+from oakestra_utils.types.statuses import Status
+
+from resource_abstractor_client.aio.client_helper import iter_pages, make_request
+from resource_abstractor_client.client_helper import projection_params
+
+JOBS_API = "/api/v1/jobs"
+
+
+async def get_jobs(fields=None, exclude=None, **kwargs):
+    params = {**kwargs, **projection_params(fields, exclude)}
+    return await make_request("GET", JOBS_API, params=params)
+
+
+def iter_jobs(fields=None, exclude=None, **kwargs):
+    """Like get_jobs, but fetches the jobs page by page.
+
+    Raises aiohttp.ClientError if a page cannot be fetched.
+    """
+    return iter_pages(JOBS_API, {**kwargs, **projection_params(fields, exclude)})
+
+
+async def get_jobs_of_application(application_id):
+    return await get_jobs(applicationID=application_id)
+
+
+async def get_job_by_id(job_id, filter={}, fields=None, exclude=None):
+    request_address = f"{JOBS_API}/{job_id}"
+    params = {**filter, **projection_params(fields, exclude)}
+    return await make_request("GET", request_address, params=params)
+
+
+async def get_job_instance(job_id, instance_number, filter={}):
+    request_address = f"{JOBS_API}/{job_id}/{instance_number}"
+    return await make_request("GET", request_address, params=filter)
+
+
+async def append_job_instance(job_id, instance_number, instance_data):
+    request_address = f"{JOBS_API}/{job_id}/{instance_number}"
+    return await make_request("PUT", request_address, json=instance_data)
+
+
+async def create_job(data):
+    return await make_request("PUT", JOBS_API, json=data)
+
+
+async def update_job(job_id: str, data: dict) -> Optional[dict]:
+    request_address = f"{JOBS_API}/{job_id}"
+    return await make_request("PATCH", request_address, json=data)
+
+
+async def update_job_status(
+    job_id: str,
+    status: Status,
+    status_detail: str = None,
+) -> Optional[dict]:
+    data = {"status": status.value}
+    if status_detail:
+        data["status_detail"] = status_detail
+    return await update_job(job_id, data)
+
+
+async def update_job_instance(job_id, instance_number, data):
+    request_address = f"{JOBS_API}/{job_id}/{instance_number}"
+    return await make_request("PATCH", request_address, json=data)
+
+
+async def upsert_job_instance(job_id, instance_number, data):
+    """Set the given fields of an instance in one atomic update, other fields are kept.
+
+    The instance is appended if the job has none with this number.
+    Returns the updated job or None if the request failed.
+    """
+    request_address = f"{JOBS_API}/{job_id}/{instance_number}/fields"
+    return await make_request("PATCH", request_address, json=data)
+
+
+async def set_job_instance_status(job_id, instance_number, status, status_detail=None, fields=None):
+    """Set the status of an instance in one atomic update, rolled up to the job status.
+
+    fields are further instance fields set in the same update.
+    Returns the updated job or None if the request failed.
+    """
+    data = {"status": status}
+    if status_detail is not None:
+        data["status_detail"] = status_detail
+    if fields:
+        data["fields"] = fields
+    request_address = f"{JOBS_API}/{job_id}/{instance_number}/status"
+    return await make_request("PATCH", request_address, json=data)
+
+
+async def place_job_instance(
+    job_id, instance_number, worker_id, host_ip, host_port, status, fields=None, exclude=None
+):
+    """Commit a scheduling result, worker and status of the instance in one atomic update.
+
+    Returns the updated job, limited to fields or without exclude, or None if the
+    request failed.
+    """
+    data = {
+        "worker_id": worker_id,
+        "host_ip": host_ip,
+        "host_port": host_port,
+        "status": status,
+    }
+    request_address = f"{JOBS_API}/{job_id}/{instance_number}/placement"
+    return await make_request(
+        "PATCH", request_address, json=data, params=projection_params(fields, exclude)
+    )
+
+
+async def delete_job_instance(job_id, instance_number):
+    request_address = f"{JOBS_API}/{job_id}/{instance_number}"
+    return await make_request("DELETE", request_address)
+
+
+async def delete_job(job_id):
+    request_address = f"{JOBS_API}/{job_id}"
+    return await make_request("DELETE", request_address)
+
+
+async def update_job_instances(reports):
+    """Bulk update of instances addressed by job_name and instance_number.
+
+    Returns {"updated": [job ids], "missing": [{job_name, instance_number}]}
+    or None if the request failed.
+    """
+    return await make_request("PATCH", f"{JOBS_API}/instances", json=reports)
+
+
+async def expire_stale_instances(cutoff, status_detail, excluded_statuses=()):
+    """Mark all instances not modified since the cutoff timestamp as FAILED.
+
+    Returns {job_id: [failed instance numbers]} or None if the request failed.
+    """
+    data = {
+        "cutoff": cutoff,
+        "status_detail": status_detail,
+        "excluded_statuses": list(excluded_statuses),
+    }
+    return await make_request("POST", f"{JOBS_API}/instances/expire", json=data)
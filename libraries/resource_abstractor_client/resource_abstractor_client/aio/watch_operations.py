@@ -0,0 +1,57 @@
+import asyncio
+import logging
+
+import aiohttp
+
+from resource_abstractor_client import client_helper
+from resource_abstractor_client.aio.client_helper import get_session
+from resource_abstractor_client.watch_operations import (
+    POLL_TIMEOUT,
+    WATCH_API,
+    _history_lost,
+    _watch_params,
+)
+
+
+async def poll_changes(entity, since=None, entity_id=None, timeout=POLL_TIMEOUT):
+    """One long poll for changes: {"events": [...], "next": token}, None on errors.
+
+    A response with status 410, or 400 for an invalid since token, raises
+    aiohttp.ClientResponseError, the changes after since are gone and the entity has
+    to be read again.
+    """
+    url = f"{client_helper.RESOURCE_ABSTRACTOR_ADDR}{WATCH_API}"
+    try:
+        async with get_session().get(
+            url,
+            params=_watch_params(entity, since, entity_id, timeout),
+            timeout=aiohttp.ClientTimeout(sock_read=timeout + client_helper.READ_TIMEOUT),
+        ) as response:
+            response.raise_for_status()
+            return client_helper.loads(await response.read())
+    except aiohttp.ClientResponseError as e:
+        if _history_lost(e.status, since):
+            raise
+        logging.warning(f"Watching {entity} not successful: {e}")
+    except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+        logging.warning(f"Watching {entity} not successful: {e}")
+    return None
+
+
+async def watch(entity, since=None, entity_id=None, retry_delay=5.0):
+    """Async iterator over the change events of entity, see watch_operations.watch."""
+    while True:
+        try:
+            result = await poll_changes(entity, since, entity_id)
+        except aiohttp.ClientResponseError:
+            since = None
+            yield {"token": None, "entity": entity, "op": "reset", "id": entity_id, "fields": None}
+            continue
+
+        if result is None:
+            await asyncio.sleep(retry_delay)
+            continue
+
+        for event in result["events"]:
+            yield event
+        since = result["next"]
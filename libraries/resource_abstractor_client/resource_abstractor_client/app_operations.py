@@ -1,17 +1,24 @@
-from requests import delete, get, patch, post
-
-from resource_abstractor_client.client_helper import make_request
+from resource_abstractor_client.client_helper import iter_pages, make_request, projection_params
 
 APPS_API = "/api/v1/applications"
 
 
-def get_apps(**kwargs):
-    return make_request(get, APPS_API, params=kwargs)
+def get_apps(fields=None, exclude=None, **kwargs):
+    params = {**kwargs, **projection_params(fields, exclude)}
+    return make_request("GET", APPS_API, params=params)
+
+
+def iter_apps(fields=None, exclude=None, **kwargs):
+    """Like get_apps, but fetches the applications page by page.
+
+    Raises RequestException if a page cannot be fetched.
+    """
+    return iter_pages(APPS_API, {**kwargs, **projection_params(fields, exclude)})
 
 
-def get_user_apps(user_id, filter={}):
-    filter = {**filter, "userId": user_id}
-    return make_request(get, APPS_API, params=filter)
+def get_user_apps(user_id, filter={}, fields=None, exclude=None):
+    filter = {**filter, "userId": user_id, **projection_params(fields, exclude)}
+    return make_request("GET", APPS_API, params=filter)
 
 
 def get_app_by_name_and_namespace(app_name, app_ns, user_id, filter={}):
@@ -21,27 +28,27 @@ def get_app_by_name_and_namespace(app_name, app_ns, user_id, filter={}):
         "application_name": app_name,
         "application_namespace": app_ns,
     }
-    result = make_request(get, APPS_API, params=filter)
+    result = make_request("GET", APPS_API, params=filter)
     return result[0] if result else None
 
 
-def get_app_by_id(app_id, user_id, filter={}):
-    filter = {**filter, "userId": user_id}
+def get_app_by_id(app_id, user_id, filter={}, fields=None, exclude=None):
+    filter = {**filter, "userId": user_id, **projection_params(fields, exclude)}
     request_address = f"{APPS_API}/{app_id}"
-    return make_request(get, request_address, params=filter)
+    return make_request("GET", request_address, params=filter)
 
 
 def create_app(user_id, data):
     data["userId"] = user_id
-    return make_request(post, APPS_API, json=data)
+    return make_request("POST", APPS_API, json=data)
 
 
 def update_app(app_id, user_id, data):
     request_address = f"{APPS_API}/{app_id}"
     data["userId"] = user_id
-    return make_request(patch, request_address, json=data)
+    return make_request("PATCH", request_address, json=data)
 
 
 def delete_app(app_id):
     request_address = f"{APPS_API}/{app_id}"
-    return make_request(delete, request_address)
+    return make_request("DELETE", request_address)
@@ -1,17 +1,16 @@
-from requests import get, patch, put
-
-from resource_abstractor_client.client_helper import make_request
+from resource_abstractor_client.client_helper import make_request, projection_params
 
 RESOURCES_API = "/api/v1/resources"
 
 
-def get_candidates(**kwargs):
-    return make_request(get, RESOURCES_API, params=kwargs)
+def get_candidates(fields=None, exclude=None, **kwargs):
+    params = {**kwargs, **projection_params(fields, exclude)}
+    return make_request("GET", RESOURCES_API, params=params)
 
 
-def get_candidate_by_id(candidate_id):
+def get_candidate_by_id(candidate_id, fields=None, exclude=None):
     request_address = f"{RESOURCES_API}/{candidate_id}"
-    return make_request(get, request_address)
+    return make_request("GET", request_address, params=projection_params(fields, exclude))
 
 
 def get_candidate_by_name(candidate_name):
@@ -26,8 +25,16 @@ def get_candidate_by_ip(ip):
 
 def update_candidate_information(candidate_id, data):
     request_address = f"{RESOURCES_API}/{candidate_id}"
-    return make_request(patch, request_address, json=data)
+    return make_request("PATCH", request_address, json=data)
 
 
 def create_candidate(data):
-    return make_request(put, RESOURCES_API, json=data)
+    return make_request("PUT", RESOURCES_API, json=data)
+
+
+def update_candidates_information(updates):
+    """Bulk update, every entry must contain the candidate "_id".
+
+    Returns {"updated": [ids], "missing": [ids]} or None if the request failed.
+    """
+    return make_request("PATCH", RESOURCES_API, json=updates)
@@ -1,22 +1,120 @@
 import logging
 import os
-from typing import Optional
+import threading
+from typing import Iterator, Optional
 
-from requests import exceptions
+from requests import Session, exceptions
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+try:
+    # orjson backed when oakestra_utils[fast-json] is installed
+    from oakestra_utils.serialization import loads
+except ImportError:
+    from json import loads
 
 RESOURCE_ABSTRACTOR_ADDR = (
     f"http://{os.environ.get('RESOURCE_ABSTRACTOR_URL')}:"
     f"{os.environ.get('RESOURCE_ABSTRACTOR_PORT')}"
 )
 
+# Connections kept alive to the resource abstractor, per process
+POOL_SIZE = int(os.environ.get("RESOURCE_ABSTRACTOR_POOL_SIZE", 20))
+CONNECT_TIMEOUT = float(os.environ.get("RESOURCE_ABSTRACTOR_CONNECT_TIMEOUT", 5))
+READ_TIMEOUT = float(os.environ.get("RESOURCE_ABSTRACTOR_READ_TIMEOUT", 30))
+# Retries of read requests on connection errors and 502/503/504, 0 disables them
+RETRIES = int(os.environ.get("RESOURCE_ABSTRACTOR_RETRIES", 2))
+
+# PUT and DELETE of the resource abstractor answer a repeated request with an error
+# (e.g. instance already exists), so only reads are retried
+RETRIED_METHODS = frozenset(["GET", "HEAD", "OPTIONS"])
+
+PAGE_SIZE = int(os.environ.get("RESOURCE_ABSTRACTOR_PAGE_SIZE", 500))
+# set by the resource abstractor on a full page, the after parameter of the next page
+NEXT_PAGE_HEADER = "X-Next-After"
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def _create_session():
+    retries = Retry(
+        total=RETRIES,
+        backoff_factor=0.2,
+        status_forcelist=(502, 503, 504),
+        allowed_methods=RETRIED_METHODS,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=retries)
+
+    session = Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session() -> Session:
+    """Shared session whose connection pool is reused by all threads of the process.
+
+    A forked process (e.g. a gunicorn worker) creates its own session, connections
+    are never shared across processes.
+    """
+    global _session, _session_pid
+
+    pid = os.getpid()
+    if _session is None or _session_pid != pid:
+        with _session_lock:
+            if _session is None or _session_pid != pid:
+                _session = _create_session()
+                _session_pid = pid
+    return _session
 
-def make_request(method, api: str, **kwargs) -> Optional[dict]:
+
+def projection_params(fields=None, exclude=None) -> dict:
+    """Query parameters that limit the returned fields, e.g. fields=["_id", "instance_list.status"]
+
+    fields and exclude are lists of (nested) field paths and cannot be combined.
+    """
+    params = {}
+    if fields:
+        params["fields"] = ",".join(fields)
+    if exclude:
+        params["exclude"] = ",".join(exclude)
+    return params
+
+
+def make_request(method: str, api: str, **kwargs) -> Optional[dict]:
     url = f"{RESOURCE_ABSTRACTOR_ADDR}{api}"
+    kwargs.setdefault("timeout", (CONNECT_TIMEOUT, READ_TIMEOUT))
     try:
-        response = method(url, **kwargs)
+        response = get_session().request(method, url, **kwargs)
         response.raise_for_status()
-        return response.json()
-    except exceptions.RequestException:
+        return loads(response.content)
+    except (exceptions.RequestException, ValueError):
         logging.warning(f"Calling {url} not successful.")
 
     return None
+
+
+def iter_pages(api: str, params: Optional[dict] = None, page_size: int = PAGE_SIZE) -> Iterator:
+    """Iterate over all documents of a list endpoint, fetched page by page.
+
+    Raises requests.exceptions.RequestException if a page cannot be fetched, so a
+    failure is never mistaken for the end of the collection.
+    """
+    url = f"{RESOURCE_ABSTRACTOR_ADDR}{api}"
+    params = {**(params or {}), "limit": page_size}
+    while True:
+        response = get_session().get(url, params=params, timeout=(CONNECT_TIMEOUT, READ_TIMEOUT))
+        response.raise_for_status()
+        try:
+            documents = loads(response.content)
+        except ValueError as e:
+            raise exceptions.InvalidJSONError(e, response=response) from e
+        yield from documents
+
+        after = response.headers.get(NEXT_PAGE_HEADER)
+        if after is None:
+            return
+        params["after"] = after
@@ -0,0 +1,22 @@
+from resource_abstractor_client.client_helper import make_request
+
+HISTORY_API = "/api/v1/history"
+
+
+def get_history(entity, entity_id, instance=None, start=None, end=None, bucket=None):
+    """cpu/memory samples of a candidate or job instance.
+
+    entity is "candidates" or "jobs", start and end are unix timestamps (default the
+    last hour), bucket downsamples to the avg/max of every bucket seconds.
+    """
+    params = {"instance": instance, "start": start, "end": end, "bucket": bucket}
+    params = {k: v for k, v in params.items() if v is not None}
+    return make_request("GET", f"{HISTORY_API}/{entity}/{entity_id}", params=params)
+
+
+def get_candidate_history(candidate_id, **kwargs):
+    return get_history("candidates", candidate_id, **kwargs)
+
+
+def get_job_instance_history(job_id, instance_number, **kwargs):
+    return get_history("jobs", job_id, instance=instance_number, **kwargs)
@@ -1,43 +1,52 @@
 from typing import Optional
 
 from oakestra_utils.types.statuses import Status
-from requests import delete, get, patch, put
 
-from resource_abstractor_client.client_helper import make_request
+from resource_abstractor_client.client_helper import iter_pages, make_request, projection_params
 
 JOBS_API = "/api/v1/jobs"
 
 
-def get_jobs(**kwargs):
-    return make_request(get, JOBS_API, params=kwargs)
+def get_jobs(fields=None, exclude=None, **kwargs):
+    params = {**kwargs, **projection_params(fields, exclude)}
+    return make_request("GET", JOBS_API, params=params)
+
+
+def iter_jobs(fields=None, exclude=None, **kwargs):
+    """Like get_jobs, but fetches the jobs page by page.
+
+    Raises RequestException if a page cannot be fetched.
+    """
+    return iter_pages(JOBS_API, {**kwargs, **projection_params(fields, exclude)})
 
 
 def get_jobs_of_application(application_id):
     return get_jobs(applicationID=application_id)
 
 
-def get_job_by_id(job_id, filter={}):
+def get_job_by_id(job_id, filter={}, fields=None, exclude=None):
     request_address = f"{JOBS_API}/{job_id}"
-    return make_request(get, request_address, params=filter)
+    params = {**filter, **projection_params(fields, exclude)}
+    return make_request("GET", request_address, params=params)
 
 
 def get_job_instance(job_id, instance_number, filter={}):
     request_address = f"{JOBS_API}/{job_id}/{instance_number}"
-    return make_request(get, request_address, params=filter)
+    return make_request("GET", request_address, params=filter)
 
 
 def append_job_instance(job_id, instance_number, instance_data):
     request_address = f"{JOBS_API}/{job_id}/{instance_number}"
-    return make_request(put, request_address, json=instance_data)
+    return make_request("PUT", request_address, json=instance_data)
 
 
 def create_job(data):
-    return make_request(put, JOBS_API, json=data)
+    return make_request("PUT", JOBS_API, json=data)
 
 
 def update_job(job_id: str, data: dict) -> Optional[dict]:
     request_address = f"{JOBS_API}/{job_id}"
-    return make_request(patch, request_address, json=data)
+    return make_request("PATCH", request_address, json=data)
 
 
 def update_job_status(
@@ -53,14 +62,81 @@ def update_job_status(
 
 def update_job_instance(job_id, instance_number, data):
     request_address = f"{JOBS_API}/{job_id}/{instance_number}"
-    return make_request(patch, request_address, json=data)
+    return make_request("PATCH", request_address, json=data)
+
+
+def upsert_job_instance(job_id, instance_number, data):
+    """Set the given fields of an instance in one atomic update, other fields are kept.
+
+    The instance is appended if the job has none with this number.
+    Returns the updated job or None if the request failed.
+    """
+    request_address = f"{JOBS_API}/{job_id}/{instance_number}/fields"
+    return make_request("PATCH", request_address, json=data)
+
+
+def set_job_instance_status(job_id, instance_number, status, status_detail=None, fields=None):
+    """Set the status of an instance in one atomic update, rolled up to the job status.
+
+    fields are further instance fields set in the same update.
+    Returns the updated job or None if the request failed.
+    """
+    data = {"status": status}
+    if status_detail is not None:
+        data["status_detail"] = status_detail
+    if fields:
+        data["fields"] = fields
+    request_address = f"{JOBS_API}/{job_id}/{instance_number}/status"
+    return make_request("PATCH", request_address, json=data)
+
+
+def place_job_instance(
+    job_id, instance_number, worker_id, host_ip, host_port, status, fields=None, exclude=None
+):
+    """Commit a scheduling result, worker and status of the instance in one atomic update.
+
+    Returns the updated job, limited to fields or without exclude, or None if the
+    request failed.
+    """
+    data = {
+        "worker_id": worker_id,
+        "host_ip": host_ip,
+        "host_port": host_port,
+        "status": status,
+    }
+    request_address = f"{JOBS_API}/{job_id}/{instance_number}/placement"
+    return make_request(
+        "PATCH", request_address, json=data, params=projection_params(fields, exclude)
+    )
 
 
 def delete_job_instance(job_id, instance_number):
     request_address = f"{JOBS_API}/{job_id}/{instance_number}"
-    return make_request(delete, request_address)
+    return make_request("DELETE", request_address)
 
 
 def delete_job(job_id):
     request_address = f"{JOBS_API}/{job_id}"
-    return make_request(delete, request_address)
+    return make_request("DELETE", request_address)
+
+
+def update_job_instances(reports):
+    """Bulk update of instances addressed by job_name and instance_number.
+
+    Returns {"updated": [job ids], "missing": [{job_name, instance_number}]}
+    or None if the request failed.
+    """
+    return make_request("PATCH", f"{JOBS_API}/instances", json=reports)
+
+
+def expire_stale_instances(cutoff, status_detail, excluded_statuses=()):
+    """Mark all instances not modified since the cutoff timestamp as FAILED.
+
+    Returns {job_id: [failed instance numbers]} or None if the request failed.
+    """
+    data = {
+        "cutoff": cutoff,
+        "status_detail": status_detail,
+        "excluded_statuses": list(excluded_statuses),
+    }
+    return make_request("POST", f"{JOBS_API}/instances/expire", json=data)
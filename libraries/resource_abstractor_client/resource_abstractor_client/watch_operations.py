@@ -0,0 +1,73 @@
+import logging
+import time
+from typing import Iterator, Optional
+
+from requests import exceptions
+
+from resource_abstractor_client import client_helper
+from resource_abstractor_client.client_helper import get_session, loads
+
+WATCH_API = "/api/v1/watch"
+# seconds the resource abstractor waits for changes before answering a poll
+POLL_TIMEOUT = 25
+
+
+def _watch_params(entity, since, entity_id, timeout):
+    params = {"entity": entity, "since": since, "id": entity_id, "timeout": timeout}
+    return {k: v for k, v in params.items() if v is not None}
+
+
+def _history_lost(status, since):
+    # a token that is not accepted anymore, e.g. from before a resource abstractor
+    # upgrade, is answered with 400 and can only be recovered from like lost changes
+    return status == 410 or (status == 400 and since is not None)
+
+
+def poll_changes(entity, since=None, entity_id=None, timeout=POLL_TIMEOUT) -> Optional[dict]:
+    """One long poll for changes: {"events": [...], "next": token}, None on errors.
+
+    A response with status 410, or 400 for an invalid since token, raises
+    requests.exceptions.HTTPError, the changes after since are gone and the entity has
+    to be read again.
+    """
+    url = f"{client_helper.RESOURCE_ABSTRACTOR_ADDR}{WATCH_API}"
+    try:
+        response = get_session().get(
+            url,
+            params=_watch_params(entity, since, entity_id, timeout),
+            timeout=(client_helper.CONNECT_TIMEOUT, timeout + client_helper.READ_TIMEOUT),
+        )
+        response.raise_for_status()
+        return loads(response.content)
+    except exceptions.HTTPError as e:
+        if e.response is not None and _history_lost(e.response.status_code, since):
+            raise
+        logging.warning(f"Watching {entity} not successful: {e}")
+    except (exceptions.RequestException, ValueError) as e:
+        logging.warning(f"Watching {entity} not successful: {e}")
+    return None
+
+
+def watch(entity, since=None, entity_id=None, retry_delay=5.0) -> Iterator[dict]:
+    """Endless iterator over the change events of entity ("jobs", "apps", "candidates" or
+    a custom resource type), optionally of one document.
+
+    Events are {token, entity, op, id, fields}. Without since, only changes from now
+    on are seen. Resume from a previous run with the token of its last event. When the
+    changes after the token are gone or the token is invalid, an event with op "reset" is yielded: re-read the
+    entity, the iterator continues with the changes from then on.
+    """
+    while True:
+        try:
+            result = poll_changes(entity, since, entity_id)
+        except exceptions.HTTPError:
+            since = None
+            yield {"token": None, "entity": entity, "op": "reset", "id": entity_id, "fields": None}
+            continue
+
+        if result is None:
+            time.sleep(retry_delay)
+            continue
+
+        yield from result["events"]
+        since = result["next"]
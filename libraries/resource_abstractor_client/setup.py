@@ -6,4 +6,5 @@ setup(
     packages=find_packages(),
     include_package_data=True,
     install_requires=["requests==2.27.1"],
+    extras_require={"aio": ["aiohttp>=3.8"]},
 )
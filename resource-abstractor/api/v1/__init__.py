@@ -1,9 +1,12 @@
 from api.v1 import (
     apps_blueprint,
     custom_resources_blueprint,
+    debug_blueprint,
+    history_blueprint,
     hooks_blueprint,
     jobs_blueprint,
     resources_blueprint,
+    watch_blueprint,
 )
 
 blueprints = [
@@ -12,4 +15,7 @@ blueprints = [
     jobs_blueprint.jobsblp,
     hooks_blueprint.hooksblp,
     custom_resources_blueprint.customblp,
+    debug_blueprint.debugblp,
+    history_blueprint.historyblp,
+    watch_blueprint.watchblp,
 ]
@@ -1,9 +1,11 @@
-import json
-
+from api.v1.listing import PaginationSchema, list_response, pagination_from_query
+from api.v1.projection import ProjectionSchema, projection_from_query
 from db import jobs_db as apps_db
+from db.pagination_helper import keyset_page
 from flask.views import MethodView
 from flask_smorest import Blueprint
-from marshmallow import Schema, fields
+from marshmallow import fields
+from oakestra_utils.serialization import dumps
 from services.hook_service import pre_post_hook
 
 applicationsblp = Blueprint(
@@ -13,23 +15,30 @@ applicationsblp = Blueprint(
 )
 
 
-class ApplicationFilterSchema(Schema):
+class ApplicationFilterSchema(ProjectionSchema):
     application_name = fields.String()
     application_namespace = fields.String()
     userId = fields.String()
 
 
+class ApplicationListSchema(ApplicationFilterSchema, PaginationSchema):
+    pass
+
+
 @applicationsblp.route("/")
 class ApplicationsController(MethodView):
-    @applicationsblp.arguments(ApplicationFilterSchema, location="query")
+    @applicationsblp.arguments(ApplicationListSchema, location="query")
     def get(self, query={}):
-        return json.dumps(list(apps_db.find_apps(query)), default=str)
+        projection = projection_from_query(query)
+        limit, after = pagination_from_query(query)
+        cursor = keyset_page(apps_db.find_apps, query, projection, limit, after)
+        return list_response(cursor, limit)
 
     @pre_post_hook("applications")
     def post(self, data, *args, **kwargs):
         result = apps_db.create_app(data)
 
-        return json.dumps(result, default=str)
+        return dumps(result)
 
 
 @applicationsblp.route("/<app_id>")
@@ -38,18 +47,19 @@ class ApplicationController(MethodView):
     def get(self, query, *args, **kwargs):
         app_id = kwargs.get("app_id")
 
-        return json.dumps(apps_db.find_app_by_id(app_id, query), default=str)
+        projection = projection_from_query(query)
+        return dumps(apps_db.find_app_by_id(app_id, query, projection))
 
     @pre_post_hook("applications", with_param_id="app_id")
     def delete(self, *args, **kwargs):
         app_id = kwargs.get("app_id")
         result = apps_db.delete_app(app_id)
 
-        return json.dumps(result, default=str)
+        return dumps(result)
 
     @pre_post_hook("applications", with_param_id="app_id")
     def patch(self, data, *args, **kwargs):
         app_id = kwargs.get("app_id")
         result = apps_db.update_app(app_id, data)
 
-        return json.dumps(result, default=str)
+        return dumps(result)
@@ -1,20 +1,89 @@
-import json
+from functools import partial
 
 import jsonschema
+from api.v1.listing import PaginationSchema, list_response, pagination_from_query
+from bson import ObjectId
 from db import custom_resources_db
+from db.hooks_db import HookEventsEnum
+from db.pagination_helper import keyset_page
 from flask import request
 from flask.views import MethodView
 from flask_smorest import Blueprint, abort
-from marshmallow import INCLUDE, Schema, fields
-from services.hook_service import pre_post_hook
+from marshmallow import INCLUDE, Schema, ValidationError, fields, validate
+from oakestra_utils.serialization import dumps
+from pymongo.errors import OperationFailure
+from services.change_feed import change_feed
+from services.hook_service import (
+    needs_before,
+    pre_post_hook,
+    process_post_create,
+    process_post_delete,
+    process_post_update,
+    process_pre_create,
+    process_pre_update,
+)
+from services.schema_validators import schema_validators
 
 customblp = Blueprint("Custom Resources", "custom_resources", url_prefix="/api/v1/custom-resources")
 
 
+class ResourceIndexSchema(Schema):
+    # field names, "-" in front of a name sorts it descending
+    keys = fields.List(fields.String(), required=True, validate=validate.Length(min=1))
+    name = fields.String()
+    unique = fields.Boolean()
+    # the field is set to the time of the last write, the resource expires this much later
+    expire_after_seconds = fields.Integer(validate=validate.Range(min=0))
+
+
 class CustomResourceSchema(Schema):
     _id = fields.String()
     resource_type = fields.String(required=True)
     schema = fields.Dict()
+    indexes = fields.List(fields.Nested(ResourceIndexSchema))
+
+
+class BulkDeleteSchema(Schema):
+    ids = fields.List(fields.String(), required=True)
+
+
+class UpsertKeySchema(Schema):
+    key = fields.String(load_default="_id")
+
+
+def _find_definition(resource_type):
+    meta_data = custom_resources_db.find_custom_resource_by_type(resource_type)
+    if meta_data is None:
+        abort(404, message="Custom Resource not registered")
+    return meta_data
+
+
+def _validate_items(resource_type, meta_data, items):
+    """Validate items against the schema of the type, returns (valid items, {index: error})."""
+    validator = schema_validators.get(resource_type, meta_data.get("schema", {}))
+    valid, errors = {}, {}
+    for index, item in enumerate(items):
+        error = jsonschema.exceptions.best_match(validator.iter_errors(item))
+        if error is None:
+            valid[index] = item
+        else:
+            errors[index] = error.message
+    return valid, errors
+
+
+def _error_list(errors):
+    return [{"index": index, "message": errors[index]} for index in sorted(errors)]
+
+
+def _key_values(items, key):
+    """Values of the upsert key in items, as stored (_id as ObjectId)."""
+    if key == "_id":
+        return [ObjectId(item["_id"]) for item in items if ObjectId.is_valid(item.get("_id"))]
+    return [
+        item[key]
+        for item in items
+        if item.get(key) is not None and not isinstance(item[key], (dict, list))
+    ]
 
 
 @customblp.route("/")
@@ -26,6 +95,20 @@ class CustomResourceController(MethodView):
     @customblp.arguments(CustomResourceSchema, location="json")
     @customblp.response(201, CustomResourceSchema, content_type="application/json")
     def post(self, data, *args, **kwargs):
+        try:
+            # compiled once here, resources of the type are validated with the cached validator
+            schema_validators.get(data["resource_type"], data.get("schema", {}))
+        except jsonschema.SchemaError as e:
+            abort(400, message=f"Invalid schema: {e.message}")
+
+        if custom_resources_db.check_custom_resource_exists(data["resource_type"]):
+            abort(409, message="Custom Resource already registered")
+
+        try:
+            custom_resources_db.create_resource_indexes(data["resource_type"], data.get("indexes"))
+        except OperationFailure as e:
+            abort(400, message=f"Invalid index: {e}")
+
         return custom_resources_db.create_custom_resource(data)
 
 
@@ -45,13 +128,15 @@ class CustomResourceDefinitionController(MethodView):
         # Delete all instances of this resource type
         custom_resources_db.delete_all_resources(resource_type)
 
+        custom_resources_db.drop_resource_indexes(resource_type)
+
         # Delete the resource definition
         custom_resources_db.delete_custom_resource_by_type(resource_type)
+        # frees the validators of this process only, other processes never use a stale one,
+        # the schema read with every request is part of the key
+        schema_validators.invalidate(resource_type)
 
-        return json.dumps(
-            {"message": f"Resource type '{resource_type}' and all its instances deleted"},
-            default=str,
-        )
+        return dumps({"message": f"Resource type '{resource_type}' and all its instances deleted"})
 
 
 @customblp.route("/<resource>")
@@ -64,17 +149,25 @@ class ResourcesController(MethodView):
         - Multiple conditions: ?field1=value1&field2=value2
         - Nested fields: ?parent.child=value
         Example: GET /api/v1/custom-resources/database?status=active&region=us-east
+        Pagination: ?limit=100&after=<_id of the last resource of the previous page>
         """
         resource_type = kwargs.get("resource")
         filter = request.args.to_dict()
+        try:
+            pagination = PaginationSchema().load(
+                {key: filter.pop(key) for key in ("limit", "after") if key in filter}
+            )
+        except ValidationError as e:
+            abort(422, message="Invalid pagination", errors=e.messages)
+        limit, after = pagination_from_query(pagination)
 
         meta_data = custom_resources_db.find_custom_resource_by_type(resource_type)
         if meta_data is None:
             abort(404, message="Custom Resource not registered")
 
-        result = list(custom_resources_db.find_resources(resource_type, filter))
-
-        return json.dumps(result, default=str)
+        find = partial(custom_resources_db.find_resources, resource_type)
+        cursor = keyset_page(find, filter, limit=limit, after=after)
+        return list_response(cursor, limit)
 
     @customblp.arguments(Schema(unknown=INCLUDE), location="json")
     @pre_post_hook()
@@ -86,13 +179,114 @@ class ResourcesController(MethodView):
             abort(404, message="Custom Resource not registered")
 
         try:
-            jsonschema.validate(data, meta_data.get("schema", {}))
+            schema_validators.validate(resource_type, meta_data.get("schema", {}), data)
         except jsonschema.ValidationError as e:
             abort(400, message=e.message)
 
+        custom_resources_db.stamp_expiry(meta_data, [data])
         result = custom_resources_db.create_resource(resource_type, data)
 
-        return json.dumps(result, default=str)
+        return dumps(result)
+
+
+@customblp.route("/<resource>/bulk")
+class BulkResourcesController(MethodView):
+    """Writes of many resources of a type per request.
+
+    Every item is validated against the schema of the type. Invalid items and items
+    MongoDB rejects (e.g. a duplicate of a unique index) are not written and are
+    reported by their index in the request, the other items are written.
+    """
+
+    @customblp.arguments(Schema(many=True, unknown=INCLUDE), location="json")
+    def post(self, data, resource):
+        meta_data = _find_definition(resource)
+        items = [process_pre_create(resource, item) for item in data]
+        valid, errors = _validate_items(resource, meta_data, items)
+
+        documents = list(valid.values())
+        custom_resources_db.stamp_expiry(meta_data, documents)
+        inserted, write_errors = custom_resources_db.create_resources(resource, documents)
+
+        indexes = list(valid)
+        errors.update({indexes[i]: error for i, error in write_errors.items()})
+        change_feed.record(resource, "insert", inserted)
+        for resource_id in inserted:
+            process_post_create(resource, str(resource_id))
+
+        return dumps({"inserted": inserted, "errors": _error_list(errors)})
+
+    @customblp.arguments(UpsertKeySchema, location="query")
+    @customblp.arguments(Schema(many=True, unknown=INCLUDE), location="json")
+    def put(self, query, data, resource):
+        """Insert or update resources by key, ?key=<field> (default _id)."""
+        key = query["key"]
+        meta_data = _find_definition(resource)
+        # stored resources by their key value as string
+        before = {}
+        if needs_before(
+            resource, HookEventsEnum.PRE_UPDATE.value, HookEventsEnum.POST_UPDATE.value
+        ):
+            before = {
+                str(doc.get(key)): doc
+                for doc in custom_resources_db.find_resources(
+                    resource, {key: {"$in": _key_values(data, key)}}
+                )
+            }
+
+        items = [
+            process_pre_update(resource, item, before.get(str(item.get(key)))) for item in data
+        ]
+        valid, errors = _validate_items(resource, meta_data, items)
+        for index, item in list(valid.items()):
+            value = item.get(key)
+            if key == "_id" and ObjectId.is_valid(value):
+                item["_id"] = ObjectId(value)
+            elif key == "_id" or value is None or isinstance(value, (dict, list)):
+                errors[index] = f"Invalid or missing {key}"
+                del valid[index]
+
+        documents = list(valid.values())
+        custom_resources_db.stamp_expiry(meta_data, documents)
+        upserted, updated, write_errors = custom_resources_db.upsert_resources(
+            resource, documents, key
+        )
+
+        indexes = list(valid)
+        errors.update({indexes[i]: error for i, error in write_errors.items()})
+        change_feed.record(resource, "insert", upserted.values())
+        change_feed.record_updates(
+            resource, {resource_id: documents[i] for i, resource_id in updated.items()}
+        )
+        for resource_id in upserted.values():
+            process_post_create(resource, str(resource_id))
+        for i, resource_id in updated.items():
+            process_post_update(
+                resource, str(resource_id), documents[i], before.get(str(documents[i][key]))
+            )
+
+        return dumps(
+            {
+                "inserted": list(upserted.values()),
+                "updated": list(updated.values()),
+                "errors": _error_list(errors),
+            }
+        )
+
+    @customblp.arguments(BulkDeleteSchema, location="json")
+    def delete(self, data, resource):
+        _find_definition(resource)
+        ids = [
+            ObjectId(resource_id) for resource_id in data["ids"] if ObjectId.is_valid(resource_id)
+        ]
+
+        deleted = [str(i) for i in custom_resources_db.delete_resources(resource, ids)]
+        change_feed.record(resource, "delete", deleted)
+        for resource_id in deleted:
+            process_post_delete(resource, resource_id)
+
+        missing = sorted(set(data["ids"]) - set(deleted))
+        return dumps({"deleted": deleted, "missing": missing})
 
 
 @customblp.route("/<resource>/<resource_id>")
@@ -107,7 +301,7 @@ class ResourceController(MethodView):
 
         result = custom_resources_db.find_resource_by_id(resource_type, resource_id)
 
-        return json.dumps(result, default=str)
+        return dumps(result)
 
     @customblp.arguments(Schema(unknown=INCLUDE), location="json")
     @pre_post_hook(with_param_id="resource_id")
@@ -120,13 +314,14 @@ class ResourceController(MethodView):
             abort(404, message="Custom Resource not found")
 
         try:
-            jsonschema.validate(data, meta_data.get("schema", {}))
+            schema_validators.validate(resource_type, meta_data.get("schema", {}), data)
         except jsonschema.ValidationError as e:
             abort(400, message=e.message)
 
+        custom_resources_db.stamp_expiry(meta_data, [data])
         result = custom_resources_db.update_resource(resource_type, resource_id, data)
 
-        return json.dumps(result, default=str)
+        return dumps(result)
 
     @pre_post_hook(with_param_id="resource_id")
     def delete(self, *args, **kwargs):
@@ -139,4 +334,4 @@ class ResourceController(MethodView):
 
         custom_resources_db.delete_resource(resource_type, resource_id)
 
-        return json.dumps({"_id": resource_id}, default=str)
+        return dumps({"_id": resource_id})
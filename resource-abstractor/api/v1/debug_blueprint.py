@@ -0,0 +1,22 @@
+from db import mongodb_client
+from db.indexes import explain_query_shapes
+from flask.views import MethodView
+from flask_smorest import Blueprint
+from oakestra_utils.serialization import dumps
+from services.hook_delivery import hook_delivery
+
+debugblp = Blueprint("Debug", "debug", url_prefix="/api/v1/debug")
+
+
+@debugblp.route("/indexes")
+class IndexUsageController(MethodView):
+    def get(self, *args, **kwargs):
+        """Query plans of the frequent queries, collscan marks the ones without an index"""
+        return dumps(explain_query_shapes(mongodb_client.collections()))
+
+
+@debugblp.route("/hooks")
+class HookDeliveryController(MethodView):
+    def get(self, *args, **kwargs):
+        """Outbox depth and delivery counters of the async hooks of this process"""
+        return dumps(hook_delivery.stats())
@@ -0,0 +1,46 @@
+import time
+
+from db import history_db
+from flask.views import MethodView
+from flask_smorest import Blueprint
+from marshmallow import Schema, fields, validate
+from oakestra_utils.serialization import dumps
+from werkzeug import exceptions
+
+historyblp = Blueprint("History", "history", url_prefix="/api/v1/history")
+
+DEFAULT_RANGE_SECONDS = 60 * 60
+
+
+class HistoryFilterSchema(Schema):
+    instance = fields.Integer()
+    start = fields.Float()
+    end = fields.Float()
+    bucket = fields.Float(validate=validate.Range(min=1))
+    limit = fields.Integer(load_default=1000, validate=validate.Range(min=1, max=10000))
+
+
+@historyblp.route("/<entity>/<entity_id>")
+class HistoryController(MethodView):
+    @historyblp.arguments(HistoryFilterSchema, location="query")
+    def get(self, query, *args, **kwargs):
+        """cpu/memory history of a candidate or job instance, by default of the last hour.
+
+        start and end are unix timestamps, bucket downsamples to avg/max per bucket seconds.
+        """
+        entity = kwargs.get("entity")
+        if entity not in (history_db.ENTITY_CANDIDATE, history_db.ENTITY_JOB):
+            raise exceptions.NotFound()
+
+        end = query.get("end", time.time())
+        start = query.get("start", end - DEFAULT_RANGE_SECONDS)
+        result = history_db.find_history(
+            entity,
+            kwargs.get("entity_id"),
+            start,
+            end,
+            instance=query.get("instance"),
+            bucket=query.get("bucket"),
+            limit=query["limit"],
+        )
+        return dumps(list(result))
@@ -2,10 +2,17 @@ from db import hooks_db
 from flask.views import MethodView
 from flask_smorest import Blueprint
 from marshmallow import Schema, fields, validate
+from services.hook_service import CONDITION_OPERATORS, hook_registry
 
 hooksblp = Blueprint("Hooks", "hooks", url_prefix="/api/v1/hooks")
 
 
+class HookConditionSchema(Schema):
+    field = fields.String(required=True)
+    op = fields.String(validate=validate.OneOf(CONDITION_OPERATORS), load_default="eq")
+    value = fields.Raw(allow_none=True)
+
+
 class APIObjectPostHookSchema(Schema):
     hook_name = fields.String()
     webhook_url = fields.String()
@@ -14,6 +21,12 @@ class APIObjectPostHookSchema(Schema):
         fields.Str(validate=validate.OneOf([*hooks_db.ASYNC_EVENTS, *hooks_db.SYNC_EVENTS])),
         default=[],
     )
+    # post events are sent as a list of up to HOOK_BATCH_SIZE events per request
+    batch = fields.Boolean()
+    # only fire for requests whose data contains one of these (nested) fields
+    watched_fields = fields.List(fields.String(), data_key="fields")
+    # and all of these conditions hold, e.g. {"field": "status", "op": "changed"}
+    conditions = fields.List(fields.Nested(HookConditionSchema))
 
 
 class APIObjectHookSchema(APIObjectPostHookSchema):
@@ -29,7 +42,10 @@ class AllHooksController(MethodView):
     @hooksblp.arguments(APIObjectPostHookSchema, location="json")
     @hooksblp.response(201, APIObjectHookSchema, content_type="application/json")
     def post(self, data, *args, **kwargs):
-        return hooks_db.create_hook(data)
+        hook = hooks_db.create_hook(data)
+        hook_registry.invalidate()
+
+        return hook
 
 
 @hooksblp.route("/<hook_id>")
@@ -45,11 +61,13 @@ class SingleHookController(MethodView):
     @hooksblp.response(204, content_type="application/json")
     def delete(self, hook_id, *args, **kwargs):
         hooks_db.delete_hook(hook_id)
+        hook_registry.invalidate()
 
     @hooksblp.arguments(APIObjectPostHookSchema, validate=False, location="json")
     @hooksblp.response(200, APIObjectHookSchema, content_type="application/json")
     def patch(self, data, *args, **kwargs):
         hook_id = kwargs.get("hook_id")
         hook = hooks_db.update_hook(hook_id, data)
+        hook_registry.invalidate()
 
         return hook
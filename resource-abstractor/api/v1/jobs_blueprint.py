@@ -1,25 +1,68 @@
-import json
-
+from api.v1.listing import PaginationSchema, list_response, pagination_from_query
+from api.v1.projection import ProjectionSchema, projection_from_args, projection_from_query
 from bson.objectid import ObjectId
 from db import jobs_db
+from db.hooks_db import HookEventsEnum
 from db.jobs_helper import build_filter
+from db.pagination_helper import keyset_page
 from flask import request
 from flask.views import MethodView
 from flask_smorest import Blueprint
-from marshmallow import Schema, fields
-from services.hook_service import perform_create, perform_update, pre_post_hook
+from marshmallow import INCLUDE, Schema, fields
+from oakestra_utils.serialization import dumps
+from services.change_feed import change_feed
+from services.hook_service import (
+    matching_hooks,
+    needs_before,
+    perform_create,
+    perform_update,
+    pre_post_hook,
+    process_post_update,
+    process_pre_update,
+)
 from werkzeug import exceptions
 
 jobsblp = Blueprint("Jobs", "jobs", url_prefix="/api/v1/jobs")
 
 
-class JobFilterSchema(Schema):
+class JobFilterSchema(ProjectionSchema):
     instance_number = fields.Integer()
 
 
+def _job_before(job_id, **kwargs):
+    return jobs_db.find_job_by_id(job_id) if ObjectId.is_valid(job_id) else None
+
+
+def _instance_before(job_id, instance_id, **kwargs):
+    if not ObjectId.is_valid(job_id) or not str(instance_id).isdigit():
+        return None
+    return jobs_db.find_instance(job_id, instance_id)
+
+
+class InstanceStatusSchema(Schema):
+    status = fields.String(required=True)
+    status_detail = fields.String(allow_none=True)
+    # further instance fields set along with the status
+    instance_fields = fields.Dict(keys=fields.String(), data_key="fields")
+
+
+class InstancePlacementSchema(Schema):
+    worker_id = fields.String(required=True)
+    host_ip = fields.String(required=True)
+    host_port = fields.Raw(required=True)
+    status = fields.String(required=True)
+
+
+class InstanceExpirySchema(Schema):
+    cutoff = fields.Float(required=True)
+    status_detail = fields.String(load_default="No extra information")
+    excluded_statuses = fields.List(fields.String(), load_default=[])
+
+
 @jobsblp.route("/")
 class AllJobsController(MethodView):
-    def get(self):
+    @jobsblp.arguments(PaginationSchema, location="query")
+    def get(self, query):
         appID = request.args.get("applicationID")
         filter = {}
         if appID:
@@ -29,15 +72,22 @@ class AllJobsController(MethodView):
         if job_name:
             filter["job_name"] = job_name
 
+        instance_status = request.args.getlist("instance_status")
+        if instance_status:
+            filter["instance_list.status"] = {"$in": instance_status}
+
         params = request.args.get("params")
         if params:
             filter = params
-        return json.dumps(list(jobs_db.find_jobs(filter)), default=str)
+        projection = projection_from_args(request.args)
+        limit, after = pagination_from_query(query)
+        cursor = keyset_page(jobs_db.find_jobs, filter, projection, limit, after)
+        return list_response(cursor, limit)
 
     @pre_post_hook("jobs")
     def post(self, data, *args, **kwargs):
         result = jobs_db.create_job(data)
-        return json.dumps(result, default=str)
+        return dumps(result)
 
     def put(self, *args, **kwargs):
         job_data = request.json
@@ -55,7 +105,63 @@ class AllJobsController(MethodView):
         else:
             res = perform_create("job", jobs_db.create_job, job_data)
 
-        return json.dumps(res, default=str)
+        return dumps(res)
+
+
+@jobsblp.route("/instances")
+class JobInstancesReportController(MethodView):
+    def patch(self, *args, **kwargs):
+        """Bulk instance reports: [{job_name, instance_number, cpu_percent, status, ...}]"""
+        reports = request.json
+        if not isinstance(reports, list):
+            raise exceptions.BadRequest("Expected a list of instance reports")
+
+        pre_update = HookEventsEnum.PRE_UPDATE.value
+        post_update = HookEventsEnum.POST_UPDATE.value
+        before = {}
+        if needs_before("jobs", pre_update, post_update):
+            before = jobs_db.find_instances_by_name({report.get("job_name") for report in reports})
+
+        def instance_before(report):
+            return before.get((report.get("job_name"), int(report.get("instance_number", 0))))
+
+        reports = [
+            process_pre_update("jobs", report, instance_before(report)) for report in reports
+        ]
+        # post hooks are matched against the reports before they are applied
+        hooked = {}
+        for report in reports:
+            if matching_hooks("jobs", post_update, report, instance_before(report)):
+                hooked.setdefault(report.get("job_name"), (report, instance_before(report)))
+
+        result = jobs_db.update_job_instances(reports)
+        reported = {field for report in reports for field in report}
+        change_feed.record("jobs", "update", result["updated"], reported)
+
+        if hooked:
+            updated = set(result["updated"])
+            for job_name, job_id in jobs_db.find_job_ids_by_name(hooked).items():
+                if job_id in updated:
+                    process_post_update("jobs", job_id, *hooked[job_name])
+
+        return dumps(result)
+
+
+@jobsblp.route("/instances/expire")
+class JobInstancesExpiryController(MethodView):
+    @jobsblp.arguments(InstanceExpirySchema, location="json")
+    def post(self, data, *args, **kwargs):
+        """Fail all instances not modified since cutoff, returns {job_id: [instance numbers]}"""
+        result = jobs_db.expire_stale_instances(
+            data["cutoff"], data["status_detail"], data["excluded_statuses"]
+        )
+
+        changes = {"status": jobs_db.STATUS_FAILED, "status_detail": data["status_detail"]}
+        change_feed.record("jobs", "update", list(result), changes)
+        for job_id in result:
+            process_post_update("jobs", job_id, changes)
+
+        return dumps(result)
 
 
 @jobsblp.route("/<job_id>")
@@ -66,26 +172,27 @@ class JobController(MethodView):
         if ObjectId.is_valid(job_id) is False:
             raise exceptions.BadRequest()
 
+        projection = projection_from_query(query)
         filter = build_filter(query)
-        job = jobs_db.find_job_by_id(job_id, filter)
+        job = jobs_db.find_job_by_id(job_id, filter, projection)
         if job is None:
             raise exceptions.NotFound()
 
-        return json.dumps(job, default=str)
+        return dumps(job)
 
-    @pre_post_hook("jobs", with_param_id="job_id")
+    @pre_post_hook("jobs", with_param_id="job_id", load_before=_job_before)
     def patch(self, data, *args, **kwargs):
         job_id = kwargs.get("job_id")
         result = jobs_db.update_job(job_id, data)
 
-        return json.dumps(result, default=str)
+        return dumps(result)
 
     @pre_post_hook("jobs", with_param_id="job_id")
     def delete(self, *args, **kwargs):
         job_id = kwargs.get("job_id")
         result = jobs_db.delete_job(job_id)
 
-        return json.dumps(result, default=str)
+        return dumps(result)
 
 
 @jobsblp.route("/<job_id>/<instance_id>")
@@ -101,9 +208,9 @@ class JobInstanceController(MethodView):
         if result is None:
             raise exceptions.NotFound()
 
-        return json.dumps(result, default=str)
+        return dumps(result)
 
-    @pre_post_hook("jobs", with_param_id="job_id")
+    @pre_post_hook("jobs", with_param_id="job_id", change_op="update")
     def put(self, *args, **kwargs):
         job_id = kwargs.get("job_id")
         instance_id = kwargs.get("instance_id")
@@ -116,9 +223,9 @@ class JobInstanceController(MethodView):
         if result is None:
             raise exceptions.BadRequest("Instance already exists")
 
-        return json.dumps(result, default=str)
+        return dumps(result)
 
-    @pre_post_hook("jobs", with_param_id="job_id")
+    @pre_post_hook("jobs", with_param_id="job_id", load_before=_instance_before, change_op="update")
     def patch(self, data, *args, **kwargs):
         data = request.json
         job_id = kwargs.get("job_id")
@@ -130,9 +237,9 @@ class JobInstanceController(MethodView):
         if result is None:
             raise exceptions.NotFound()
 
-        return json.dumps(result, default=str)
+        return dumps(result)
 
-    @pre_post_hook("jobs", with_param_id="job_id")
+    @pre_post_hook("jobs", with_param_id="job_id", change_op="update")
     def delete(self, data=None, *args, **kwargs):
         job_id = kwargs.get("job_id")
         instance_id = kwargs.get("instance_id")
@@ -143,4 +250,74 @@ class JobInstanceController(MethodView):
         if result is None:
             raise exceptions.NotFound()
 
-        return json.dumps(result, default=str)
+        return dumps(result)
+
+
+@jobsblp.route("/<job_id>/<instance_id>/fields")
+class JobInstanceFieldsController(MethodView):
+    @jobsblp.arguments(Schema(unknown=INCLUDE), location="json")
+    @pre_post_hook("jobs", with_param_id="job_id", load_before=_instance_before, change_op="update")
+    def patch(self, data, *args, **kwargs):
+        """Set the given fields of the instance, the instance is appended if it is unknown."""
+        job_id = kwargs.get("job_id")
+        instance_id = kwargs.get("instance_id")
+        if not ObjectId.is_valid(job_id) or not str(instance_id).isdigit():
+            raise exceptions.BadRequest()
+
+        result = jobs_db.upsert_job_instance(job_id, instance_id, data)
+        if result is None:
+            raise exceptions.NotFound()
+
+        return dumps(result)
+
+
+@jobsblp.route("/<job_id>/<instance_id>/status")
+class JobInstanceStatusController(MethodView):
+    @jobsblp.arguments(InstanceStatusSchema, location="json")
+    @pre_post_hook("jobs", with_param_id="job_id", load_before=_instance_before, change_op="update")
+    def patch(self, data, *args, **kwargs):
+        """Set the status of the instance, the job is RUNNING once all instances are.
+
+        The optional fields are set on the instance in the same update.
+        """
+        job_id = kwargs.get("job_id")
+        instance_id = kwargs.get("instance_id")
+        if not ObjectId.is_valid(job_id) or not str(instance_id).isdigit():
+            raise exceptions.BadRequest()
+
+        result = jobs_db.set_job_instance_status(
+            job_id,
+            instance_id,
+            data.get("status"),
+            data.get("status_detail"),
+            data.get("instance_fields"),
+        )
+        if result is None:
+            raise exceptions.NotFound()
+
+        return dumps(result)
+
+
+@jobsblp.route("/<job_id>/<instance_id>/placement")
+class JobInstancePlacementController(MethodView):
+    @jobsblp.arguments(InstancePlacementSchema, location="json")
+    @jobsblp.arguments(ProjectionSchema, location="query")
+    @pre_post_hook("jobs", with_param_id="job_id", load_before=_instance_before, change_op="update")
+    def patch(self, data, query, *args, **kwargs):
+        """Commit a scheduling result: worker and status of the instance in one update.
+
+        Returns the updated job, limited to ?fields=... or ?exclude=..., ready to be sent
+        to the worker.
+        """
+        job_id = kwargs.get("job_id")
+        instance_id = kwargs.get("instance_id")
+        if not ObjectId.is_valid(job_id) or not str(instance_id).isdigit():
+            raise exceptions.BadRequest()
+
+        result = jobs_db.place_job_instance(
+            job_id, instance_id, data, data["status"], projection_from_query(query)
+        )
+        if result is None:
+            raise exceptions.NotFound()
+
+        return dumps(result)
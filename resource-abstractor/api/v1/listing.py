@@ -0,0 +1,56 @@
+from bson.objectid import ObjectId
+from db.pagination_helper import KeysetPage
+from flask import Response, request, stream_with_context
+from marshmallow import Schema, ValidationError, fields, validate
+from oakestra_utils.serialization import dumpb
+
+NDJSON = "application/x-ndjson"
+# set on a full page, pass it as after to get the next page
+NEXT_PAGE_HEADER = "X-Next-After"
+MAX_PAGE_SIZE = 10000
+
+
+def _validate_object_id(value):
+    if not ObjectId.is_valid(value):
+        raise ValidationError("Not a valid ObjectId.")
+
+
+class PaginationSchema(Schema):
+    """Query parameters limit and after (_id of the last document of the previous page)"""
+
+    limit = fields.Integer(validate=validate.Range(min=1, max=MAX_PAGE_SIZE))
+    after = fields.String(validate=_validate_object_id)
+
+
+def pagination_from_query(query):
+    """Remove the pagination parameters from a loaded query, returns (limit, after)."""
+    return query.pop("limit", None), query.pop("after", None)
+
+
+def wants_ndjson():
+    return request.accept_mimetypes.best_match(["application/json", NDJSON]) == NDJSON
+
+
+def list_response(cursor, limit=None):
+    """Respond with the documents of cursor, as NDJSON stream if the client accepts it.
+
+    A streamed response is written document by document from the cursor, a JSON
+    response holds at most limit documents.
+    """
+    if wants_ndjson():
+
+        def generate():
+            for document in cursor:
+                yield dumpb(document) + b"\n"
+
+        return Response(stream_with_context(generate()), mimetype=NDJSON)
+
+    documents = list(cursor)
+    if isinstance(cursor, KeysetPage):
+        last_id = cursor.last_id
+    else:
+        last_id = documents[-1].get("_id") if documents else None
+    headers = {}
+    if limit and len(documents) == limit and last_id is not None:
+        headers[NEXT_PAGE_HEADER] = str(last_id)
+    return Response(dumpb(documents), headers=headers, mimetype="application/json")
@@ -0,0 +1,26 @@
+from db.projection_helper import build_projection
+from marshmallow import Schema, fields
+from werkzeug import exceptions
+
+
+class ProjectionSchema(Schema):
+    """Query parameters fields / exclude, comma separated paths to return or to leave out"""
+
+    projected_fields = fields.String(data_key="fields")
+    excluded_fields = fields.String(data_key="exclude")
+
+
+def _projection(projected_fields, excluded_fields):
+    try:
+        return build_projection(projected_fields, excluded_fields)
+    except ValueError as e:
+        raise exceptions.BadRequest(str(e))
+
+
+def projection_from_query(query):
+    """Remove the projection parameters from a loaded query, returns the Mongo projection."""
+    return _projection(query.pop("projected_fields", None), query.pop("excluded_fields", None))
+
+
+def projection_from_args(args):
+    return _projection(args.get("fields"), args.get("exclude"))
@@ -1,14 +1,24 @@
 import logging
 
+from api.v1.projection import ProjectionSchema, projection_from_query
 from bson import ObjectId
 from db import candidates_db
 from db.candidates_helper import build_filter
+from db.hooks_db import HookEventsEnum
 from db.jobs_db import find_job_by_id
 from flask import jsonify, request
 from flask.views import MethodView
 from flask_smorest import Blueprint
 from marshmallow import INCLUDE, Schema, fields
-from services.hook_service import perform_create, perform_update, pre_post_hook
+from services.change_feed import change_feed
+from services.hook_service import (
+    needs_before,
+    perform_create,
+    perform_update,
+    pre_post_hook,
+    process_post_update,
+    process_pre_update,
+)
 from werkzeug import exceptions
 
 logger = logging.getLogger("resource_abstractor")
@@ -16,6 +26,10 @@ logger = logging.getLogger("resource_abstractor")
 resourcesblp = Blueprint("Resources", "resources", url_prefix="/api/v1/resources")
 
 
+def _candidate_before(resource_id, **kwargs):
+    return candidates_db.find_candidates_by_ids([resource_id]).get(resource_id)
+
+
 class ResourceSchema(Schema):
     _id = fields.String()
     candidate_name = fields.String()
@@ -39,7 +53,7 @@ class ResourceSchema(Schema):
     last_modified_timestamp = fields.Float()
 
 
-class ResourceFilterSchema(Schema):
+class ResourceFilterSchema(ProjectionSchema):
     active = fields.Boolean()
     job_id = fields.String()
     candidate_name = fields.String()
@@ -74,13 +88,16 @@ class AllResourcesController(MethodView):
                 raise exceptions.NotFound()
 
             filter["candidate_id"] = candidate_id
+        projection = projection_from_query(query)
         filter = build_filter(query)
 
         if request.args.get("resources"):
             print("Resources: ", request.args.get("resources"), flush=True)
-            res = list(candidates_db.find_candidates(filter, request.args.get("resources")))
+            res = list(
+                candidates_db.find_candidates(filter, request.args.get("resources"), projection)
+            )
         else:
-            res = list(candidates_db.find_candidates(filter))
+            res = list(candidates_db.find_candidates(filter, projection=projection))
 
         for candidate in res:
             if "_id" in candidate:
@@ -111,15 +128,49 @@ class AllResourcesController(MethodView):
 
         return perform_create("resources", candidates_db.create_candidate, data)
 
+    @resourcesblp.arguments(ResourceSchema(many=True, unknown=INCLUDE), location="json")
+    def patch(self, data, **kwargs):
+        """Bulk update of candidate information, one entry with "_id" per candidate.
+
+        Used by cluster managers to flush the latest report of every node at once.
+        """
+        requested = [str(candidate.get("_id")) for candidate in data]
+        before = {}
+        if needs_before(
+            "resources", HookEventsEnum.PRE_UPDATE.value, HookEventsEnum.POST_UPDATE.value
+        ):
+            before = candidates_db.find_candidates_by_ids(requested)
+
+        updates = [
+            process_pre_update("resources", candidate, before.get(candidate_id))
+            for candidate_id, candidate in zip(requested, data)
+        ]
+        # pre hooks may answer without the "_id", the updates keep the order of the request
+        updates_by_id = dict(zip(requested, updates))
+        updated = candidates_db.update_candidates_information(
+            [{**update, "_id": candidate_id} for candidate_id, update in updates_by_id.items()]
+        )
+        reported = {field for update in updates for field in update}
+        change_feed.record("resources", "update", updated, reported)
+
+        for candidate_id in updated:
+            process_post_update(
+                "resources", candidate_id, updates_by_id.get(candidate_id), before.get(candidate_id)
+            )
+
+        missing = sorted(set(requested) - set(updated))
+        return jsonify({"updated": updated, "missing": missing})
+
 
 @resourcesblp.route("/<resource_id>")
 class ResourceController(MethodView):
+    @resourcesblp.arguments(ProjectionSchema, location="query")
     @resourcesblp.response(200, ResourceSchema, content_type="application/json")
-    def get(self, resource_id):
+    def get(self, query, resource_id):
         if ObjectId.is_valid(resource_id) is False:
             raise exceptions.BadRequest()
 
-        candidate = candidates_db.find_candidate_by_id(resource_id)
+        candidate = candidates_db.find_candidate_by_id(resource_id, projection_from_query(query))
         if candidate is None:
             raise exceptions.NotFound()
 
@@ -131,7 +182,7 @@ class ResourceController(MethodView):
 
     @resourcesblp.arguments(ResourceSchema(unknown=INCLUDE), location="json")
     @resourcesblp.response(200, ResourceSchema, content_type="application/json")
-    @pre_post_hook("resources", with_param_id="resource_id")
+    @pre_post_hook("resources", with_param_id="resource_id", load_before=_candidate_before)
     def patch(self, data, **kwargs):
         resource_id = kwargs.get("resource_id")
         client_ip = request.remote_addr
@@ -0,0 +1,78 @@
+import time
+
+from bson.objectid import ObjectId
+from flask import Response, request, stream_with_context
+from flask.views import MethodView
+from flask_smorest import Blueprint
+from marshmallow import Schema, fields, validate
+from oakestra_utils.serialization import dumps
+from services.change_feed import HistoryLost, change_feed
+from werkzeug import exceptions
+
+watchblp = Blueprint("Watch", "watch", url_prefix="/api/v1/watch")
+
+EVENT_STREAM = "text/event-stream"
+# comment lines sent on idle event streams, keep proxies from closing the connection
+HEARTBEAT_SECONDS = 15
+
+
+class WatchSchema(Schema):
+    entity = fields.String(required=True)
+    since = fields.String()
+    entity_id = fields.String(data_key="id")
+    timeout = fields.Float(load_default=25, validate=validate.Range(min=0, max=60))
+    limit = fields.Integer(load_default=100, validate=validate.Range(min=1, max=1000))
+
+
+def _event_stream(events):
+    last_sent = time.monotonic()
+    for event, token in events:
+        if event is not None:
+            yield f"id: {token}\nevent: change\ndata: {dumps(event)}\n\n"
+            last_sent = time.monotonic()
+        elif time.monotonic() - last_sent > HEARTBEAT_SECONDS:
+            yield ": heartbeat\n\n"
+            last_sent = time.monotonic()
+
+
+@watchblp.route("/")
+class WatchController(MethodView):
+    @watchblp.arguments(WatchSchema, location="query")
+    def get(self, query, *args, **kwargs):
+        """Changes of jobs, apps, candidates or a custom resource type.
+
+        Long polls by default: waits up to timeout seconds and returns
+        {"events": [{token, entity, op, id, fields}], "next": token}, pass next as since
+        to continue. With Accept: text/event-stream the events are streamed as
+        server-sent events, the event id is the token. 410 means the changes after since
+        are gone and the entity has to be read again.
+        """
+        entity = query["entity"]
+        if not change_feed.knows(entity):
+            raise exceptions.NotFound(f"Unknown entity {entity}")
+
+        entity_id = query.get("entity_id")
+        if entity_id is not None and not ObjectId.is_valid(entity_id):
+            raise exceptions.BadRequest("id is not a valid ObjectId")
+
+        streamed = request.accept_mimetypes.best_match(["application/json", EVENT_STREAM])
+        # reconnecting EventSource clients resume from the last received event id
+        since = query.get("since") or request.headers.get("Last-Event-ID")
+        try:
+            if streamed == EVENT_STREAM:
+                events = change_feed.stream(entity, since, entity_id)
+                return Response(
+                    stream_with_context(_event_stream(events)),
+                    mimetype=EVENT_STREAM,
+                    headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+                )
+
+            events, token = change_feed.poll(
+                entity, since, entity_id, timeout=query["timeout"], limit=query["limit"]
+            )
+        except HistoryLost as e:
+            raise exceptions.Gone(str(e))
+        except ValueError as e:
+            raise exceptions.BadRequest(str(e))
+
+        return dumps({"events": events, "next": token})
@@ -0,0 +1,140 @@
+"""Requests/s of the resource abstractor served by the development server and by gunicorn
+with a growing number of workers.
+
+The app runs on the in-memory MongoDB stand-in of standin_app.py, so the numbers show
+how request handling scales with processes, not the cost of MongoDB. Load is generated
+by client processes, each with a keep-alive session, reading single jobs and pages of
+jobs. Scaling needs cores for the workers and the clients.
+
+Run from the resource-abstractor directory:
+    python benchmarks/serving_benchmark.py [--workers 1 2 4] [--clients 8] [--seconds 10]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import signal
+import subprocess
+import sys
+import time
+
+import requests
+
+RESOURCE_ABSTRACTOR_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RESOURCE_ABSTRACTOR_DIR)
+
+PORT = 11099
+JOBS = 200
+
+
+def dev_server():
+    code = (
+        "import sys; sys.path.insert(0, 'benchmarks'); from standin_app import app; "
+        f"app.run(host='127.0.0.1', port={PORT}, threaded=True)"
+    )
+    return [sys.executable, "-c", code]
+
+
+def gunicorn(workers, threads, worker_class):
+    return [
+        sys.executable,
+        "-m",
+        "gunicorn",
+        "-c",
+        "gunicorn.conf.py",
+        "--pythonpath",
+        "benchmarks",
+        "--bind",
+        f"127.0.0.1:{PORT}",
+        "--workers",
+        str(workers),
+        "--threads",
+        str(threads),
+        "--worker-class",
+        worker_class,
+        "--log-level",
+        "warning",
+        "standin_app:app",
+    ]
+
+
+def wait_ready(timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if requests.get(f"http://127.0.0.1:{PORT}/ready", timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("server did not become ready")
+
+
+def client(seconds, results):
+    session = requests.Session()
+    base = f"http://127.0.0.1:{PORT}/api/v1/jobs"
+    done = errors = 0
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        if random.random() < 0.8:
+            url = f"{base}/{random.randrange(JOBS):024x}"
+        else:
+            url = f"{base}/?limit=50&fields=job_name,status"
+        try:
+            response = session.get(url, timeout=10)
+            if response.ok:
+                done += 1
+            else:
+                errors += 1
+        except requests.RequestException:
+            errors += 1
+    results.put((done, errors))
+
+
+def measure(command, clients, seconds):
+    env = {**os.environ, "STANDIN_JOBS": str(JOBS), "RESOURCE_ABSTRACTOR_PORT": str(PORT)}
+    server = subprocess.Popen(command, cwd=RESOURCE_ABSTRACTOR_DIR, env=env)
+    try:
+        wait_ready()
+        results = multiprocessing.Queue()
+        processes = [
+            multiprocessing.Process(target=client, args=(seconds, results)) for _ in range(clients)
+        ]
+        for process in processes:
+            process.start()
+        totals = [results.get() for _ in processes]
+        for process in processes:
+            process.join()
+    finally:
+        # SIGTERM, the graceful shutdown of gunicorn
+        server.send_signal(signal.SIGTERM)
+        server.wait(timeout=60)
+
+    done = sum(result[0] for result in totals)
+    errors = sum(result[1] for result in totals)
+    return done / seconds, errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--worker-class", default="gthread")
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10)
+    args = parser.parse_args()
+
+    print(f"cores: {os.cpu_count()}, client processes: {args.clients}")
+    print(f"{'server':>24} {'requests/s':>11} {'errors':>7}")
+    throughput, errors = measure(dev_server(), args.clients, args.seconds)
+    print(f"{'development server':>24} {throughput:>11.1f} {errors:>7}")
+    for workers in args.workers:
+        command = gunicorn(workers, args.threads, args.worker_class)
+        throughput, errors = measure(command, args.clients, args.seconds)
+        name = f"gunicorn {workers}x{args.threads} {args.worker_class}"
+        print(f"{name:>24} {throughput:>11.1f} {errors:>7}")
+
+
+if __name__ == "__main__":
+    main()
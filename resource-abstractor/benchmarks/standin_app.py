@@ -0,0 +1,66 @@
+"""The resource abstractor app on an in-memory MongoDB stand-in (mongomock), for benchmarks.
+
+Every process gets its own stand-in, seeded with the same jobs and candidates, like
+the processes of a pre-fork server share one MongoDB.
+"""
+
+import os
+import sys
+
+from bson import ObjectId
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MONGO_URL", "localhost")
+os.environ.setdefault("MONGO_PORT", "10007")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+# mongomock offers no change streams
+os.environ["HOOK_CHANGE_STREAM"] = "false"
+
+import mongomock  # noqa: E402
+from db import mongodb_client  # noqa: E402
+from services.change_feed import change_feed  # noqa: E402
+
+JOBS = int(os.environ.get("STANDIN_JOBS", 200))
+INSTANCES = int(os.environ.get("STANDIN_INSTANCES", 3))
+
+
+def job_id(i):
+    return ObjectId(f"{i:024x}")
+
+
+def _seed():
+    mongodb_client.mongo_jobs.insert_many(
+        [
+            {
+                "_id": job_id(i),
+                "job_name": f"app{i}.ns.svc.ns",
+                "applicationID": f"app{i}",
+                "status": "RUNNING",
+                "instance_list": [
+                    {
+                        "instance_number": n,
+                        "status": "RUNNING",
+                        "cpu_percent": 1.5,
+                        "memory_percent": 12.0,
+                        "worker_id": f"{n:024x}",
+                        "host_ip": "10.0.0.1",
+                        "host_port": 50011,
+                    }
+                    for n in range(INSTANCES)
+                ],
+            }
+            for i in range(JOBS)
+        ]
+    )
+
+
+mongodb_client.MongoClient = mongomock.MongoClient
+# time series collections and change streams are not supported by mongomock
+mongodb_client._history_collection = lambda database: database["history"]
+change_feed.start = lambda: setattr(change_feed, "change_streams", False)
+
+from resource_abstractor import app  # noqa: E402
+
+_seed()
+
+__all__ = ["app"]
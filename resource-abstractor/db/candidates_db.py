@@ -1,11 +1,12 @@
 from datetime import datetime
 
 from bson.objectid import ObjectId
+from pymongo import UpdateOne
 
 import db.mongodb_client as db
+from db import history_db
 from db.candidates_helper import get_freshness_threshold
 
-HISTORY_SLICE_SIZE = -100
 CANONICAL_RESOURCES = [
     "_id",
     "cpu_percent",
@@ -25,8 +26,6 @@ CANONICAL_RESOURCES = [
     "port",
     "candidate_location",
     "candidate_name",
-    "cpu_history",
-    "memory_history",
     "csi_drivers",
 ]
 
@@ -47,7 +46,12 @@ def update_candidate(candidate_id, data):
     )
 
 
-def find_candidates(filter, resources=None):
+def find_candidates(filter, resources=None, projection=None):
+    """Candidates with the canonical resources and the extra comma separated resources.
+
+    An inclusion projection replaces that selection, an exclusion projection removes
+    fields from it.
+    """
     pipeline = [
         {"$match": filter},
         {
@@ -64,17 +68,32 @@ def find_candidates(filter, resources=None):
 
     print("Request: ", request, flush=True)
 
-    projection = {field: 1 for field in request}
-    pipeline.append({"$project": projection})
+    if projection and 1 in projection.values():
+        pipeline.append({"$project": projection})
+    else:
+        pipeline.append({"$project": {field: 1 for field in request}})
+        if projection:
+            pipeline.append({"$project": projection})
 
     return db.mongo_candidates.aggregate(pipeline)
 
 
-def find_candidate_by_id(candidate_id):
-    candidate = list(find_candidates({"_id": ObjectId(candidate_id)}))
+def find_candidate_by_id(candidate_id, projection=None):
+    candidate = list(find_candidates({"_id": ObjectId(candidate_id)}, projection=projection))
     return candidate[0] if candidate else None
 
 
+def find_candidates_by_ids(candidate_ids):
+    """Stored candidate documents, keyed by their id as string. Invalid ids are skipped."""
+    ids = [
+        ObjectId(candidate_id) for candidate_id in candidate_ids if ObjectId.is_valid(candidate_id)
+    ]
+    return {
+        str(candidate["_id"]): candidate
+        for candidate in db.mongo_candidates.find({"_id": {"$in": ids}})
+    }
+
+
 def find_candidate_by_name(candidate_name):
     return db.mongo_candidates.find_one({"candidate_name": candidate_name})
 
@@ -90,37 +109,68 @@ def update_timestamp(data):
     return data
 
 
-def update_candidate_information(candidate_id, data):
-    """Save aggregated Candidate Information"""
+def _information_update(data):
+    # works on a copy, the callers still need the "_id"s of the reported data
+    update_dict = update_timestamp(dict(data))
 
-    update_dict = update_timestamp(data)
+    # histories are kept in the history collection
+    update_dict.pop("cpu_history", None)
+    update_dict.pop("memory_history", None)
 
-    # remove duplicate history values
-    if "cpu_history" in update_dict:
-        del update_dict["cpu_history"]
-    if "memory_history" in update_dict:
-        del update_dict["memory_history"]
+    return {"$set": update_dict}
 
-    cpu_update = {
-        "value": data.get("cpu_percent"),
-        "timestamp": update_dict["last_modified_timestamp"],
-    }
-    memory_update = {
-        "value": data.get("memory_percent"),
-        "timestamp": update_dict["last_modified_timestamp"],
-    }
 
-    return db.mongo_candidates.find_one_and_update(
+def _history_sample(candidate_id, data):
+    return history_db.history_sample(
+        history_db.ENTITY_CANDIDATE, candidate_id, data["last_modified_timestamp"], data
+    )
+
+
+def update_candidate_information(candidate_id, data):
+    """Save aggregated Candidate Information"""
+
+    update = _information_update(data)
+    candidate = db.mongo_candidates.find_one_and_update(
         {"_id": ObjectId(candidate_id)},
-        {
-            "$push": {
-                "cpu_history": {"$each": [cpu_update], "$slice": HISTORY_SLICE_SIZE},
-                "memory_history": {"$each": [memory_update], "$slice": HISTORY_SLICE_SIZE},
-            },
-            "$set": update_dict,
-        },
+        update,
         return_document=True,
     )
+    if candidate is not None:
+        history_db.record_samples([_history_sample(candidate_id, update["$set"])])
+
+    return candidate
+
+
+def update_candidates_information(updates):
+    """Save the information of several candidates with a single bulk write.
+
+    Every update must carry the candidate "_id". Returns the ids of the candidates
+    that exist and got updated, unknown ids are skipped.
+    """
+    updates_by_id = {}
+    for data in updates:
+        candidate_id = str(data.get("_id"))
+        if ObjectId.is_valid(candidate_id):
+            updates_by_id[ObjectId(candidate_id)] = data
+
+    existing = db.mongo_candidates.find({"_id": {"$in": list(updates_by_id)}}, {"_id": 1})
+    existing_ids = [candidate["_id"] for candidate in existing]
+    if not existing_ids:
+        return []
+
+    sets = {
+        candidate_id: _information_update(updates_by_id[candidate_id])
+        for candidate_id in existing_ids
+    }
+    operations = [
+        UpdateOne({"_id": candidate_id}, sets[candidate_id]) for candidate_id in existing_ids
+    ]
+    db.mongo_candidates.bulk_write(operations, ordered=False)
+    history_db.record_samples(
+        _history_sample(candidate_id, sets[candidate_id]["$set"]) for candidate_id in existing_ids
+    )
+
+    return [str(candidate_id) for candidate_id in existing_ids]
 
 
 def delete_candidate(candidate_id):
@@ -0,0 +1,39 @@
+from datetime import datetime, timedelta, timezone
+
+from bson.objectid import ObjectId
+
+from db import mongodb_client as db
+
+
+def record_changes(changes):
+    """Append change events, dicts with entity, op, id and fields, to the changes log."""
+    if changes:
+        now = datetime.utcnow()
+        db.mongo_changes.insert_many([{**change, "ts": now} for change in changes], ordered=False)
+
+
+def _settled(settle_seconds):
+    return ObjectId.from_datetime(datetime.utcnow() - timedelta(seconds=settle_seconds))
+
+
+def latest_token(settle_seconds):
+    return str(_settled(settle_seconds))
+
+
+def is_expired(token):
+    """Whether changes after token may already be removed from the log."""
+    retention = timedelta(seconds=db.CHANGES_RETENTION_SECONDS)
+    return ObjectId(token).generation_time < datetime.now(timezone.utc) - retention
+
+
+def find_changes(entity, since, settle_seconds, entity_id=None, limit=100):
+    """Changes of entity after the token since, oldest first.
+
+    Tokens are the ObjectIds of the changes. Changes younger than settle_seconds are
+    left for the next call, so a change written concurrently by another replica with a
+    slightly older ObjectId is not skipped.
+    """
+    filter = {"entity": entity, "_id": {"$gt": ObjectId(since), "$lt": _settled(settle_seconds)}}
+    if entity_id is not None:
+        filter["id"] = entity_id
+    return list(db.mongo_changes.find(filter).sort("_id", 1).limit(limit))
@@ -1,4 +1,8 @@
+from datetime import datetime
+
 from bson.objectid import ObjectId
+from pymongo import ASCENDING, DESCENDING, IndexModel, UpdateOne
+from pymongo.errors import BulkWriteError
 
 from db import mongodb_client as db
 
@@ -30,13 +34,67 @@ def check_custom_resource_exists(resource_type):
 
 
 def _get_collection(resource_type):
-    return db.db_custom_resources.db[resource_type]
+    return db.db_custom_resources[resource_type]
+
+
+def index_models(indexes):
+    """IndexModels of the indexes of a definition, a key starting with "-" is descending."""
+    models = []
+    for index in indexes or []:
+        keys = [
+            (key[1:], DESCENDING) if key.startswith("-") else (key, ASCENDING)
+            for key in index["keys"]
+        ]
+        options = {}
+        if index.get("name"):
+            options["name"] = index["name"]
+        if index.get("unique"):
+            options["unique"] = True
+        if index.get("expire_after_seconds") is not None:
+            options["expireAfterSeconds"] = index["expire_after_seconds"]
+        models.append(IndexModel(keys, **options))
+    return models
+
+
+def create_resource_indexes(resource_type, indexes):
+    models = index_models(indexes)
+    if models:
+        _get_collection(resource_type).create_indexes(models)
+
+
+def drop_resource_indexes(resource_type):
+    _get_collection(resource_type).drop_indexes()
+
+
+def expiry_fields(meta_data):
+    """Fields of the TTL indexes of a definition."""
+    return [
+        index["keys"][0].lstrip("-")
+        for index in meta_data.get("indexes") or []
+        if index.get("expire_after_seconds") is not None
+    ]
+
+
+def stamp_expiry(meta_data, documents):
+    """Set the TTL fields to the current time, a resource expires after its last write."""
+    fields = expiry_fields(meta_data)
+    if not fields:
+        return
+    now = datetime.utcnow()
+    for document in documents:
+        for field in fields:
+            document[field] = now
+
 
+def resources_collection(resource_type):
+    """Collection of the resources of a custom resource type, e.g. to watch it."""
+    return _get_collection(resource_type)
 
-def find_resources(resource_type, filter={}):
+
+def find_resources(resource_type, filter={}, projection=None):
     collection = _get_collection(resource_type)
 
-    return collection.find(filter)
+    return collection.find(filter, projection)
 
 
 def find_resource_by_id(resource_type, id):
@@ -64,6 +122,75 @@ def update_resource(resource_type, id, data):
     )
 
 
+def _write_errors(e):
+    return {error["index"]: error["errmsg"] for error in e.details.get("writeErrors", [])}
+
+
+def create_resources(resource_type, documents):
+    """Insert documents unordered, returns (inserted ids, {index: error of a failed insert})."""
+    if not documents:
+        return [], {}
+    collection = _get_collection(resource_type)
+
+    errors = {}
+    try:
+        collection.insert_many(documents, ordered=False)
+    except BulkWriteError as e:
+        errors = _write_errors(e)
+    # insert_many sets the _id of every document
+    inserted = [doc["_id"] for i, doc in enumerate(documents) if i not in errors]
+    return inserted, errors
+
+
+def upsert_resources(resource_type, documents, key="_id"):
+    """Update the resource with the key value of each document, or insert it.
+
+    Documents must contain the key, an _id key must be an ObjectId. Without a unique
+    index on the key, concurrent upserts of the same value may insert duplicates.
+    Returns ({index: id} inserted, {index: id} updated, {index: error}).
+    """
+    if not documents:
+        return {}, {}, {}
+    collection = _get_collection(resource_type)
+
+    requests = [
+        UpdateOne(
+            {key: doc[key]},
+            {"$set": {field: value for field, value in doc.items() if field != "_id"}},
+            upsert=True,
+        )
+        for doc in documents
+    ]
+    errors = {}
+    try:
+        result = collection.bulk_write(requests, ordered=False)
+        upserted = result.upserted_ids
+    except BulkWriteError as e:
+        errors = _write_errors(e)
+        upserted = {item["index"]: item["_id"] for item in e.details.get("upserted", [])}
+
+    matched = {
+        i: doc[key] for i, doc in enumerate(documents) if i not in upserted and i not in errors
+    }
+    if key != "_id" and matched:
+        ids = {
+            doc[key]: doc["_id"]
+            for doc in collection.find({key: {"$in": list(matched.values())}}, {key: 1})
+        }
+        matched = {i: ids[value] for i, value in matched.items() if value in ids}
+    return upserted, matched, errors
+
+
+def delete_resources(resource_type, ids):
+    """Delete the resources with the given ObjectIds, returns the ids that existed."""
+    collection = _get_collection(resource_type)
+
+    existing = [doc["_id"] for doc in collection.find({"_id": {"$in": ids}}, {"_id": 1})]
+    if existing:
+        collection.delete_many({"_id": {"$in": existing}})
+    return existing
+
+
 def delete_resource(resource_type, id):
     collection = _get_collection(resource_type)
 
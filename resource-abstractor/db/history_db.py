@@ -0,0 +1,77 @@
+from datetime import datetime, timezone
+
+from db import mongodb_client as db
+
+ENTITY_CANDIDATE = "candidates"
+ENTITY_JOB = "jobs"
+HISTORY_METRICS = ["cpu_percent", "memory_percent"]
+EPOCH = datetime(1970, 1, 1)
+
+
+def _as_datetime(timestamp):
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc)
+
+
+def history_sample(entity, entity_id, timestamp, data, instance=None):
+    """Time-series document with the metrics of data, None if data reports no metric."""
+    metrics = {key: data[key] for key in HISTORY_METRICS if data.get(key) is not None}
+    if not metrics:
+        return None
+
+    return {
+        "ts": _as_datetime(timestamp),
+        "meta": {"entity": entity, "id": str(entity_id), "instance": instance},
+        **metrics,
+    }
+
+
+def record_samples(samples):
+    samples = [sample for sample in samples if sample is not None]
+    if samples:
+        db.mongo_history.insert_many(samples, ordered=False)
+
+
+def find_history(entity, entity_id, start, end, instance=None, bucket=None, limit=1000):
+    """Metric samples of an entity within [start, end) unix timestamps, oldest first.
+
+    With bucket (seconds), the samples are downsampled to the avg and max of every
+    metric per bucket, with the bucket start as timestamp. Ranges with more than limit
+    samples (or buckets) return the most recent ones.
+    """
+    pipeline = [
+        {
+            "$match": {
+                "meta.entity": entity,
+                "meta.id": str(entity_id),
+                "meta.instance": instance,
+                "ts": {"$gte": _as_datetime(start), "$lt": _as_datetime(end)},
+            }
+        },
+    ]
+    # milliseconds since the epoch
+    epoch_ms = {"$subtract": ["$ts", EPOCH]}
+
+    if bucket:
+        bucket_ms = int(bucket * 1000)
+        group = {
+            "_id": {"$subtract": [epoch_ms, {"$mod": [epoch_ms, bucket_ms]}]},
+            "samples": {"$sum": 1},
+        }
+        projection = {"_id": 0, "timestamp": {"$divide": ["$_id", 1000]}, "samples": 1}
+        for metric in HISTORY_METRICS:
+            group[f"{metric}_avg"] = {"$avg": f"${metric}"}
+            group[f"{metric}_max"] = {"$max": f"${metric}"}
+            projection.update({f"{metric}_avg": 1, f"{metric}_max": 1})
+        pipeline += [
+            {"$group": group},
+            {"$sort": {"_id": -1}},
+            {"$limit": limit},
+            {"$project": projection},
+        ]
+    else:
+        projection = {"_id": 0, "timestamp": {"$divide": [epoch_ms, 1000]}}
+        projection.update({metric: 1 for metric in HISTORY_METRICS})
+        pipeline += [{"$sort": {"ts": -1}}, {"$limit": limit}, {"$project": projection}]
+
+    # sorted newest first for the limit
+    return list(db.mongo_history.aggregate(pipeline))[::-1]
@@ -0,0 +1,88 @@
+import uuid
+from datetime import datetime, timedelta
+
+from db import mongodb_client as db
+
+STATUS_PENDING = "pending"
+STATUS_FAILED = "failed"
+
+
+def enqueue_events(events):
+    """Persist events, dicts with webhook_url, batch and payload, for delivery."""
+    if not events:
+        return
+    now = datetime.utcnow()
+    db.mongo_hook_outbox.insert_many(
+        [
+            {
+                **event,
+                "status": STATUS_PENDING,
+                "attempts": 0,
+                "created_at": now,
+                "next_attempt_at": now,
+            }
+            for event in events
+        ],
+        ordered=False,
+    )
+
+
+def claim_events(batch_size, lease_seconds):
+    """Claim the next due event and, if its hook batches, due events of the same url.
+
+    Claimed events are not due again before the lease expires, so events of a worker
+    that died are delivered by another one afterwards. Returns [] if nothing is due.
+    """
+    now = datetime.utcnow()
+    lease = {"next_attempt_at": now + timedelta(seconds=lease_seconds), "claim": uuid.uuid4().hex}
+    due = {"status": STATUS_PENDING, "next_attempt_at": {"$lte": now}}
+
+    event = db.mongo_hook_outbox.find_one_and_update(
+        due, {"$set": lease}, sort=[("next_attempt_at", 1)], return_document=True
+    )
+    if event is None:
+        return []
+    if not event.get("batch") or batch_size <= 1:
+        return [event]
+
+    candidates = db.mongo_hook_outbox.find(
+        {**due, "webhook_url": event["webhook_url"], "batch": True}, {"_id": 1}
+    ).limit(batch_size - 1)
+    ids = [candidate["_id"] for candidate in candidates]
+    if ids:
+        db.mongo_hook_outbox.update_many({**due, "_id": {"$in": ids}}, {"$set": lease})
+    return list(db.mongo_hook_outbox.find({"claim": lease["claim"]}).sort("created_at", 1))
+
+
+def delete_events(event_ids):
+    db.mongo_hook_outbox.delete_many({"_id": {"$in": event_ids}})
+
+
+def retry_events(event_ids, delay_seconds, max_attempts, error):
+    """Schedule another attempt, events that ran out of attempts are marked failed."""
+    now = datetime.utcnow()
+    db.mongo_hook_outbox.update_many(
+        {"_id": {"$in": event_ids}},
+        {
+            "$inc": {"attempts": 1},
+            "$set": {"next_attempt_at": now + timedelta(seconds=delay_seconds), "error": error},
+            "$unset": {"claim": ""},
+        },
+    )
+    result = db.mongo_hook_outbox.update_many(
+        {"_id": {"$in": event_ids}, "attempts": {"$gte": max_attempts}},
+        {"$set": {"status": STATUS_FAILED, "failed_at": now}},
+    )
+    return result.modified_count
+
+
+def outbox_stats():
+    now = datetime.utcnow()
+    oldest = db.mongo_hook_outbox.find_one(
+        {"status": STATUS_PENDING}, {"created_at": 1}, sort=[("created_at", 1)]
+    )
+    return {
+        "pending": db.mongo_hook_outbox.count_documents({"status": STATUS_PENDING}),
+        "failed": db.mongo_hook_outbox.count_documents({"status": STATUS_FAILED}),
+        "oldest_pending_seconds": ((now - oldest["created_at"]).total_seconds() if oldest else 0.0),
+    }
@@ -29,10 +29,31 @@ SYNC_EVENTS = [
 ]
 
 
+# _id of the document counting the changes of the hooks collection
+HOOKS_VERSION_ID = "hooks"
+
+
+def hooks_version():
+    version = db.mongo_hooks_version.find_one({"_id": HOOKS_VERSION_ID})
+    return version["version"] if version else 0
+
+
+def _bump_hooks_version():
+    """Tell the hook registries of all processes that the hooks changed."""
+    db.mongo_hooks_version.update_one(
+        {"_id": HOOKS_VERSION_ID}, {"$inc": {"version": 1}}, upsert=True
+    )
+
+
 def find_hooks(filter={}):
     return db.mongo_hooks.find(filter) or []
 
 
+def watch_hooks():
+    """Change stream of the hooks collection, only available on replica sets."""
+    return db.mongo_hooks.watch()
+
+
 def find_hook_by_id(hook_id):
     hooks = find_hooks({"_id": hook_id})
     return hooks[0] if hooks else None
@@ -41,17 +62,22 @@ def find_hook_by_id(hook_id):
 def update_hook(hook_id, data):
     data.pop("_id", None)
 
-    return db.mongo_hooks.find_one_and_update(
+    hook = db.mongo_hooks.find_one_and_update(
         {"_id": ObjectId(hook_id)}, {"$set": data}, return_document=True
     )
+    _bump_hooks_version()
+    return hook
 
 
 def create_hook(data):
     data.pop("_id", None)
     res = db.mongo_hooks.insert_one(data)
+    _bump_hooks_version()
 
     return db.mongo_hooks.find_one({"_id": res.inserted_id})
 
 
 def delete_hook(hook_id):
-    return db.mongo_hooks.delete_one({"_id": ObjectId(hook_id)})
+    result = db.mongo_hooks.delete_one({"_id": ObjectId(hook_id)})
+    _bump_hooks_version()
+    return result
@@ -0,0 +1,138 @@
+import logging
+from datetime import datetime
+
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger("resource_abstractor")
+
+# Indexes per collection, created on startup. create_indexes is a no-op for indexes that
+# already exist with the same keys and options, so applying the catalog is idempotent.
+INDEXES = {
+    "hooks": [
+        IndexModel([("entity", ASCENDING), ("webhook_url", ASCENDING)], unique=True),
+        IndexModel([("hook_name", ASCENDING)], unique=True),
+    ],
+    "hook_outbox": [
+        IndexModel([("status", ASCENDING), ("next_attempt_at", ASCENDING)]),
+        IndexModel([("claim", ASCENDING)], sparse=True),
+        # events that ran out of attempts are kept for a week for inspection
+        IndexModel([("failed_at", ASCENDING)], expireAfterSeconds=7 * 24 * 60 * 60),
+    ],
+    "meta_data": [
+        IndexModel([("resource_type", ASCENDING)], unique=True),
+    ],
+    "jobs": [
+        # jobs are addressed by name, documents without a name are not constrained
+        IndexModel(
+            [("job_name", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"job_name": {"$type": "string"}},
+        ),
+        IndexModel([("applicationID", ASCENDING)]),
+        IndexModel([("instance_list.instance_number", ASCENDING)]),
+        IndexModel([("instance_list.status", ASCENDING)]),
+        IndexModel([("instance_list.last_modified_timestamp", ASCENDING)]),
+    ],
+    "apps": [
+        IndexModel([("userId", ASCENDING)]),
+    ],
+    "candidates": [
+        IndexModel([("candidate_name", ASCENDING)]),
+        IndexModel([("ip", ASCENDING)]),
+        IndexModel([("last_modified_timestamp", ASCENDING)]),
+    ],
+    "changes": [
+        IndexModel([("entity", ASCENDING), ("_id", ASCENDING)]),
+    ],
+    "history": [
+        IndexModel(
+            [
+                ("meta.entity", ASCENDING),
+                ("meta.id", ASCENDING),
+                ("meta.instance", ASCENDING),
+                ("ts", ASCENDING),
+            ]
+        ),
+    ],
+}
+
+EPOCH = datetime(1970, 1, 1)
+
+# Filters of the frequent queries, only their shape matters for the query plan
+QUERY_SHAPES = {
+    "job_by_name": ("jobs", {"job_name": ""}),
+    "jobs_of_application": ("jobs", {"applicationID": ""}),
+    "job_instance": ("jobs", {"instance_list": {"$elemMatch": {"instance_number": 0}}}),
+    "jobs_with_instance_status": ("jobs", {"instance_list.status": {"$in": ["FAILED"]}}),
+    "stale_instances": (
+        "jobs",
+        {
+            "instance_list": {
+                "$elemMatch": {"last_modified_timestamp": {"$lt": 0}, "status": {"$nin": []}}
+            }
+        },
+    ),
+    "due_hook_events": (
+        "hook_outbox",
+        {"status": "pending", "next_attempt_at": {"$lte": EPOCH}},
+    ),
+    "apps_of_user": ("apps", {"userId": ""}),
+    "candidate_by_name": ("candidates", {"candidate_name": ""}),
+    "candidate_by_ip": ("candidates", {"ip": ""}),
+    "active_candidates": ("candidates", {"last_modified_timestamp": {"$gt": 0}}),
+    "changes_since": ("changes", {"entity": "", "_id": {"$gt": ObjectId.from_datetime(EPOCH)}}),
+    "history_range": (
+        "history",
+        {
+            "meta.entity": "",
+            "meta.id": "",
+            "meta.instance": None,
+            "ts": {"$gte": EPOCH, "$lt": EPOCH},
+        },
+    ),
+}
+
+
+def apply_indexes(collections):
+    """Create the catalog indexes for the given {name: collection}.
+
+    Indexes are created one by one, an index that cannot be built (e.g. duplicate job
+    names in existing data) is logged and does not prevent the others.
+    """
+    for name, collection in collections.items():
+        for index in INDEXES.get(name, []):
+            try:
+                collection.create_indexes([index])
+            except OperationFailure as e:
+                logger.error(f"Unable to create index {index.document['name']} on {name}: {e}")
+
+
+def _plan_stages(plan):
+    stages = [plan.get("stage")]
+    for key in ("inputStage", "queryPlan"):
+        if key in plan:
+            stages += _plan_stages(plan[key])
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    return [stage for stage in stages if stage]
+
+
+def explain_query_shapes(collections):
+    """Query plans of QUERY_SHAPES, shapes whose winning plan scans a whole collection
+    are flagged with collscan."""
+    report = {}
+    for shape, (name, filter) in QUERY_SHAPES.items():
+        collection = collections[name]
+        explained = collection.database.command(
+            "explain", {"find": collection.name, "filter": filter}, verbosity="queryPlanner"
+        )
+        stages = _plan_stages(explained["queryPlanner"]["winningPlan"])
+        report[shape] = {
+            "collection": name,
+            "filter": filter,
+            "stages": stages,
+            "collscan": "COLLSCAN" in stages,
+        }
+    return report
@@ -1,17 +1,31 @@
 from datetime import datetime
 
 from bson.objectid import ObjectId
+from pymongo import UpdateOne
 
 import db.mongodb_client as db
+from db import history_db
 
+STATUS_RUNNING = "RUNNING"
+STATUS_FAILED = "FAILED"
+INSTANCE_REPORT_FIELDS = [
+    "cpu_percent",
+    "memory_percent",
+    "disk",
+    "logs",
+    "publicip",
+    "status",
+    "status_detail",
+]
 
-def find_apps(filter={}):
-    return db.mongo_apps.find(filter)
 
+def find_apps(filter={}, projection=None):
+    return db.mongo_apps.find(filter, projection)
 
-def find_app_by_id(app_id, extra_filter={}):
+
+def find_app_by_id(app_id, extra_filter={}, projection=None):
     filter = {**extra_filter, "_id": ObjectId(app_id)}
-    app = list(find_apps(filter=filter))
+    app = list(find_apps(filter=filter, projection=projection))
 
     return app[0] if app else None
 
@@ -39,13 +53,13 @@ def create_app(app_data):
 
 
 # Job operations ##############################################################
-def find_jobs(filter={}):
-    return db.mongo_jobs.find(filter)
+def find_jobs(filter={}, projection=None):
+    return db.mongo_jobs.find(filter, projection)
 
 
-def find_job_by_id(job_id, filter={}):
-    filter["_id"] = ObjectId(job_id)
-    job = list(find_jobs(filter=filter))
+def find_job_by_id(job_id, filter={}, projection=None):
+    filter = {**filter, "_id": ObjectId(job_id)}
+    job = list(find_jobs(filter=filter, projection=projection))
 
     return job[0] if job else None
 
@@ -93,6 +107,32 @@ def find_job_instance(job_id, instance_number):
     return next(cursor, None)
 
 
+def find_instance(job_id, instance_number):
+    """The instance document of a job, None if the job or the instance does not exist."""
+    job = db.mongo_jobs.find_one(
+        {"_id": ObjectId(job_id)},
+        {"instance_list": {"$elemMatch": {"instance_number": int(instance_number)}}},
+    )
+    instances = (job or {}).get("instance_list") or []
+    return instances[0] if instances else None
+
+
+def find_instances_by_name(job_names):
+    """Instances of the named jobs, keyed by (job_name, instance_number)."""
+    instances = {}
+    for job in db.mongo_jobs.find(
+        {"job_name": {"$in": list(job_names)}}, {"job_name": 1, "instance_list": 1}
+    ):
+        for instance in job.get("instance_list") or []:
+            instances[(job["job_name"], instance.get("instance_number"))] = instance
+    return instances
+
+
+def find_job_ids_by_name(job_names):
+    jobs = db.mongo_jobs.find({"job_name": {"$in": list(job_names)}}, {"job_name": 1})
+    return {job["job_name"]: str(job["_id"]) for job in jobs}
+
+
 # Append job_data["instance_list"][-1] to the instance list of the job with id job_id
 def append_job_instance(job_id, instance_number, job_data):
     if find_job_instance(job_id, instance_number) is not None:
@@ -113,26 +153,12 @@ def append_job_instance(job_id, instance_number, job_data):
 def update_job_instance(job_id, instance_number, job_data):
     job_data.pop("_id", None)
 
-    current_time = datetime.now().isoformat()
-    cpu_update = {"value": job_data.get("cpu_percent"), "timestamp": current_time}
-    memory_update = {"value": job_data.get("memory_percent"), "timestamp": current_time}
-
-    return db.mongo_jobs.find_one_and_update(
+    job = db.mongo_jobs.find_one_and_update(
         {
             "_id": ObjectId(job_id),
             "instance_list": {"$elemMatch": {"instance_number": int(instance_number)}},
         },
         {
-            "$push": {
-                "instance_list.$.cpu_history": {
-                    "$each": [cpu_update],
-                    "$slice": -100,
-                },
-                "instance_list.$.memory_history": {
-                    "$each": [memory_update],
-                    "$slice": -100,
-                },
-            },
             "$set": {
                 "instance_list.$.cpu_percent": job_data.get("cpu_percent"),
                 "instance_list.$.memory_percent": job_data.get("memory_percent"),
@@ -150,6 +176,299 @@ def update_job_instance(job_id, instance_number, job_data):
             },
         },
     )
+    if job is not None:
+        history_db.record_samples(
+            [
+                history_db.history_sample(
+                    history_db.ENTITY_JOB,
+                    job_id,
+                    datetime.now().timestamp(),
+                    job_data,
+                    instance=int(instance_number),
+                )
+            ]
+        )
+
+    return job
+
+
+def _job_status_rollup(instance_status):
+    """Job status follows a non running instance, but is RUNNING only once all instances are."""
+    if instance_status != STATUS_RUNNING:
+        return {"$set": {"status": instance_status}}
+
+    all_running = {
+        "$allElementsTrue": [
+            {
+                "$map": {
+                    "input": {"$ifNull": ["$instance_list", []]},
+                    "as": "instance",
+                    "in": {"$eq": ["$$instance.status", STATUS_RUNNING]},
+                }
+            }
+        ]
+    }
+    return [{"$set": {"status": {"$cond": [all_running, STATUS_RUNNING, "$status"]}}}]
+
+
+def _status_rollup_stages(status):
+    """_job_status_rollup as pipeline stages, for updates that are pipelines anyway."""
+    rollup = _job_status_rollup(status)
+    if isinstance(rollup, dict):
+        return [{"$set": {"status": {"$literal": status}}}]
+    return rollup
+
+
+def _upsert_instance_stage(instance_number, fields):
+    """Pipeline stage that merges fields into the instance, or appends it if there is none.
+
+    The fields are literals, values starting with "$" are not read as field paths.
+    """
+    fields = {"$literal": fields}
+    instances = {"$ifNull": ["$instance_list", []]}
+    return {
+        "$set": {
+            "instance_list": {
+                "$cond": [
+                    {"$in": [instance_number, {"$ifNull": ["$instance_list.instance_number", []]}]},
+                    {
+                        "$map": {
+                            "input": instances,
+                            "as": "instance",
+                            "in": {
+                                "$cond": [
+                                    {"$eq": ["$$instance.instance_number", instance_number]},
+                                    {"$mergeObjects": ["$$instance", fields]},
+                                    "$$instance",
+                                ]
+                            },
+                        }
+                    },
+                    {
+                        "$concatArrays": [
+                            instances,
+                            [{"$mergeObjects": [fields, {"instance_number": instance_number}]}],
+                        ]
+                    },
+                ]
+            }
+        }
+    }
+
+
+def upsert_job_instance(job_id, instance_number, data):
+    """Set the given fields of an instance, appending the instance if the job has none with
+    this number, in a single atomic update. Other fields of the instance are kept.
+
+    Returns the updated job, None if there is no such job.
+    """
+    instance_number = int(instance_number)
+    fields = {key: value for key, value in data.items() if key not in ("_id", "instance_number")}
+    fields["last_modified_timestamp"] = datetime.now().timestamp()
+
+    job = db.mongo_jobs.find_one_and_update(
+        {"_id": ObjectId(job_id)},
+        [_upsert_instance_stage(instance_number, fields)],
+        return_document=True,
+    )
+    if job is not None:
+        history_db.record_samples(
+            [
+                history_db.history_sample(
+                    history_db.ENTITY_JOB,
+                    job_id,
+                    fields["last_modified_timestamp"],
+                    fields,
+                    instance=instance_number,
+                )
+            ]
+        )
+    return job
+
+
+def set_job_instance_status(job_id, instance_number, status, status_detail=None, fields=None):
+    """Set the status of an instance and roll it up to the job, in a single atomic update.
+
+    The job follows a non running status, it becomes RUNNING only once all its
+    instances are. fields are further instance fields set in the same update, e.g. the
+    public ip reported along with the status. Returns the updated job, None if there is
+    no such job.
+    """
+    instance = {**(fields or {}), "status": status}
+    if status_detail is not None:
+        instance["status_detail"] = status_detail
+
+    # an unknown instance is not appended, only the job status is rolled up then
+    stages = [
+        {
+            "$set": {
+                "instance_list": {
+                    "$map": {
+                        "input": {"$ifNull": ["$instance_list", []]},
+                        "as": "instance",
+                        "in": {
+                            "$cond": [
+                                {"$eq": ["$$instance.instance_number", int(instance_number)]},
+                                {"$mergeObjects": ["$$instance", {"$literal": instance}]},
+                                "$$instance",
+                            ]
+                        },
+                    }
+                }
+            }
+        },
+        *_status_rollup_stages(status),
+    ]
+    return db.mongo_jobs.find_one_and_update(
+        {"_id": ObjectId(job_id)}, stages, return_document=True
+    )
+
+
+def place_job_instance(job_id, instance_number, placement, status, projection=None):
+    """Record the worker an instance was scheduled to and its status, rolled up to the job,
+    in a single atomic update. The instance is appended if the job has none with this number.
+
+    placement holds worker_id, host_ip and host_port. Returns the updated job, None if
+    there is no such job.
+    """
+    fields = {
+        "worker_id": placement["worker_id"],
+        "host_ip": placement["host_ip"],
+        "host_port": placement["host_port"],
+        "status": status,
+        "last_modified_timestamp": datetime.now().timestamp(),
+    }
+    return db.mongo_jobs.find_one_and_update(
+        {"_id": ObjectId(job_id)},
+        [_upsert_instance_stage(int(instance_number), fields), *_status_rollup_stages(status)],
+        projection=projection,
+        return_document=True,
+    )
+
+
+def update_job_instances(reports):
+    """Apply many instance reports, addressed by job_name and instance_number, in one bulk write.
+
+    Only the fields in INSTANCE_REPORT_FIELDS are written. When a report carries a
+    status, the job-level status is rolled up as well.
+    Returns the ids of the updated jobs and the reports whose instance is unknown.
+    """
+    job_names = list({report.get("job_name") for report in reports})
+    known_instances = {}
+    for job in db.mongo_jobs.find(
+        {"job_name": {"$in": job_names}}, {"job_name": 1, "instance_list.instance_number": 1}
+    ):
+        for instance in job.get("instance_list", []):
+            known_instances[(job["job_name"], instance.get("instance_number"))] = job["_id"]
+
+    current_time = datetime.now().timestamp()
+    instance_operations = []
+    samples = []
+    job_statuses = {}
+    missing = []
+    for report in reports:
+        instance_number = int(report.get("instance_number", 0))
+        job_id = known_instances.get((report.get("job_name"), instance_number))
+        if job_id is None:
+            missing.append({"job_name": report.get("job_name"), "instance_number": instance_number})
+            continue
+
+        fields = {
+            f"instance_list.$.{field}": report[field]
+            for field in INSTANCE_REPORT_FIELDS
+            if field in report
+        }
+        fields["instance_list.$.last_modified_timestamp"] = current_time
+        instance_operations.append(
+            UpdateOne(
+                {
+                    "_id": job_id,
+                    "instance_list": {"$elemMatch": {"instance_number": instance_number}},
+                },
+                {"$set": fields},
+            )
+        )
+        samples.append(
+            history_db.history_sample(
+                history_db.ENTITY_JOB, job_id, current_time, report, instance=instance_number
+            )
+        )
+        if report.get("status"):
+            # a non running status takes precedence over RUNNING for the job rollup
+            if job_statuses.get(job_id) in (None, STATUS_RUNNING):
+                job_statuses[job_id] = report["status"]
+        else:
+            job_statuses.setdefault(job_id, None)
+
+    status_operations = [
+        UpdateOne({"_id": job_id}, _job_status_rollup(status))
+        for job_id, status in job_statuses.items()
+        if status is not None
+    ]
+
+    operations = instance_operations + status_operations
+    if operations:
+        # ordered, the status rollup has to see the updated instances
+        db.mongo_jobs.bulk_write(operations, ordered=True)
+    history_db.record_samples(samples)
+
+    return {"updated": [str(job_id) for job_id in job_statuses], "missing": missing}
+
+
+def expire_stale_instances(cutoff, status_detail, excluded_statuses=()):
+    """Mark every instance not modified since cutoff as FAILED, in one bulk write.
+
+    Instances with a status in excluded_statuses are left untouched. The affected
+    jobs are marked FAILED as well, their status_detail names the failed instances.
+    Returns {job id: [expired instance numbers]}.
+    """
+    stale = {
+        "last_modified_timestamp": {"$lt": cutoff},
+        "status": {"$nin": list(excluded_statuses)},
+    }
+    expired = {}
+    for job in db.mongo_jobs.find(
+        {"instance_list": {"$elemMatch": stale}},
+        {
+            "instance_list.instance_number": 1,
+            "instance_list.status": 1,
+            "instance_list.last_modified_timestamp": 1,
+        },
+    ):
+        expired[job["_id"]] = [
+            instance.get("instance_number")
+            for instance in job.get("instance_list", [])
+            if instance.get("last_modified_timestamp") is not None
+            and instance["last_modified_timestamp"] < cutoff
+            and instance.get("status") not in excluded_statuses
+        ]
+
+    if not expired:
+        return {}
+
+    # the filters are evaluated again on write, instances reported meanwhile are kept
+    stale_filter = {f"stale.{field}": condition for field, condition in stale.items()}
+    current_time = datetime.now().timestamp()
+    operations = [
+        UpdateOne(
+            {"_id": job_id, "instance_list": {"$elemMatch": stale}},
+            {
+                "$set": {
+                    "instance_list.$[stale].status": STATUS_FAILED,
+                    "instance_list.$[stale].status_detail": status_detail,
+                    "instance_list.$[stale].last_modified_timestamp": current_time,
+                    "status": STATUS_FAILED,
+                    "status_detail": "Failed instance(s): "
+                    + ", ".join(str(number) for number in instance_numbers),
+                }
+            },
+            array_filters=[stale_filter],
+        )
+        for job_id, instance_numbers in expired.items()
+    ]
+    db.mongo_jobs.bulk_write(operations, ordered=False)
+
+    return {str(job_id): instance_numbers for job_id, instance_numbers in expired.items()}
 
 
 def create_job(job_data):
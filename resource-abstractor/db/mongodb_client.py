@@ -1,44 +1,168 @@
 import os
+from datetime import datetime
 
-from flask_pymongo import ASCENDING, PyMongo
+from pymongo import MongoClient
+from pymongo.errors import CollectionInvalid, DuplicateKeyError
+
+from db.indexes import apply_indexes
 
 MONGO_URL = os.environ.get("MONGO_URL")
 MONGO_PORT = os.environ.get("MONGO_PORT")
 
 MONGO_BASE_ADDR = f"mongodb://{MONGO_URL}:{MONGO_PORT}"
 
-MONGO_ADDR_CANDIDATES = f"{MONGO_BASE_ADDR}/candidates"
-MONGO_ADDR_JOBS = f"{MONGO_BASE_ADDR}/jobs"
-MONGO_ADDR_HOOKS = f"{MONGO_BASE_ADDR}/hooks"
-MONGO_ADDR_CUSTOM_RESOURCES = f"{MONGO_BASE_ADDR}/custom_resources"
+# Connections to MongoDB per process, shared by all databases and request threads
+MONGO_MAX_POOL_SIZE = int(os.environ.get("MONGO_MAX_POOL_SIZE", 100))
+# Seconds to wait for a reachable MongoDB before an operation fails
+MONGO_SERVER_SELECTION_TIMEOUT = float(os.environ.get("MONGO_SERVER_SELECTION_TIMEOUT", 10))
+
+# cpu/memory samples older than this are removed from the history
+HISTORY_RETENTION_SECONDS = int(os.environ.get("HISTORY_RETENTION_SECONDS", 24 * 60 * 60))
+# Changes kept for /api/v1/watch when MongoDB offers no change streams
+CHANGES_RETENTION_SECONDS = int(os.environ.get("CHANGES_RETENTION_SECONDS", 60 * 60))
 
+client = None
 db_custom_resources = None
 mongo_meta_data = None
 mongo_hooks = None
+mongo_hook_outbox = None
+mongo_hooks_version = None
 mongo_candidates = None
 mongo_apps = None
 mongo_jobs = None
+mongo_history = None
+mongo_changes = None
 
 app = None
 
 
 def mongo_init(flask_app):
-    global db_custom_resources, mongo_meta_data
-    global mongo_candidates, mongo_jobs, mongo_apps, mongo_hooks
+    """Connect to MongoDB and prepare the collections, once per process.
+
+    MongoClient is not fork-safe, a pre-fork server (see gunicorn.conf.py) has to
+    create the app, and with it the client, in every worker after the fork.
+    """
+    global client, db_custom_resources, mongo_meta_data
+    global mongo_candidates, mongo_jobs, mongo_apps, mongo_hooks, mongo_hook_outbox, mongo_history
+    global mongo_changes, mongo_hooks_version
     global app
 
     app = flask_app
 
-    mongo_hooks = PyMongo(app, uri=MONGO_ADDR_HOOKS).db["hooks"]
-    mongo_hooks.create_index([("entity", ASCENDING), ("webhook_url", ASCENDING)], unique=True)
-    mongo_hooks.create_index("hook_name", unique=True)
+    client = MongoClient(
+        MONGO_BASE_ADDR,
+        maxPoolSize=MONGO_MAX_POOL_SIZE,
+        serverSelectionTimeoutMS=int(MONGO_SERVER_SELECTION_TIMEOUT * 1000),
+    )
+
+    hooks_db = client["hooks"]
+    mongo_hooks = hooks_db["hooks"]
+    mongo_hook_outbox = hooks_db["hook_outbox"]
+    mongo_hooks_version = hooks_db["hooks_version"]
+
+    mongo_candidates = client["candidates"]["candidates"]
+    mongo_apps = client["jobs"]["apps"]
+    mongo_jobs = client["jobs"]["jobs"]
+
+    db_custom_resources = client["custom_resources"]
+    mongo_meta_data = db_custom_resources["meta_data"]
 
-    mongo_candidates = PyMongo(app, uri=MONGO_ADDR_CANDIDATES).db["candidates"]
-    mongo_apps = PyMongo(app, uri=MONGO_ADDR_JOBS).db["apps"]
-    mongo_jobs = PyMongo(app, uri=MONGO_ADDR_JOBS).db["jobs"]
+    mongo_history = _history_collection(client["history"])
+    mongo_changes = _changes_collection(client["changes"])
 
-    db_custom_resources = PyMongo(app, uri=MONGO_ADDR_CUSTOM_RESOURCES)
-    mongo_meta_data = db_custom_resources.db["meta_data"]
-    mongo_meta_data.create_index("resource_type", unique=True)
+    apply_indexes(collections())
+    _migrate_once(
+        client["resource_abstractor"]["migrations"],
+        "drop_embedded_histories",
+        _drop_embedded_histories,
+    )
 
     app.logger.info("init mongo")
+
+
+def mongo_ping():
+    """Raises a PyMongoError if MongoDB is not reachable."""
+    client.admin.command("ping")
+
+
+def mongo_close():
+    if client is not None:
+        client.close()
+
+
+def collections():
+    return {
+        "hooks": mongo_hooks,
+        "hook_outbox": mongo_hook_outbox,
+        "meta_data": mongo_meta_data,
+        "jobs": mongo_jobs,
+        "apps": mongo_apps,
+        "candidates": mongo_candidates,
+        "history": mongo_history,
+        "changes": mongo_changes,
+    }
+
+
+def _history_collection(database):
+    try:
+        database.create_collection(
+            "history",
+            timeseries={"timeField": "ts", "metaField": "meta", "granularity": "seconds"},
+            expireAfterSeconds=HISTORY_RETENTION_SECONDS,
+        )
+    except CollectionInvalid:
+        # created on a previous start, possibly with another retention
+        database.command("collMod", "history", expireAfterSeconds=HISTORY_RETENTION_SECONDS)
+    return database["history"]
+
+
+def _changes_collection(database):
+    collection = database["changes"]
+    ttl_index = next(
+        (index for index in collection.index_information().values() if index["key"] == [("ts", 1)]),
+        None,
+    )
+    if ttl_index is None:
+        collection.create_index("ts", expireAfterSeconds=CHANGES_RETENTION_SECONDS)
+    elif ttl_index.get("expireAfterSeconds") != CHANGES_RETENTION_SECONDS:
+        # create_index fails on an index with other options, update the retention instead
+        database.command(
+            "collMod",
+            "changes",
+            index={"keyPattern": {"ts": 1}, "expireAfterSeconds": CHANGES_RETENTION_SECONDS},
+        )
+    return collection
+
+
+def _migrate_once(migrations, name, migrate):
+    """Run the data migration migrate unless a process ran or is running it already.
+
+    The marker is written before the migration, so concurrent workers do not run it
+    twice, and removed again if the migration fails.
+    """
+    try:
+        migrations.insert_one({"_id": name, "started_at": datetime.utcnow()})
+    except DuplicateKeyError:
+        return
+
+    try:
+        migrate()
+    except Exception:
+        migrations.delete_one({"_id": name})
+        raise
+
+
+def _drop_embedded_histories():
+    """Histories used to be arrays in the candidate and job documents, remove leftovers."""
+    mongo_candidates.update_many(
+        {"cpu_history": {"$exists": True}}, {"$unset": {"cpu_history": "", "memory_history": ""}}
+    )
+    mongo_jobs.update_many(
+        {"instance_list.cpu_history": {"$exists": True}},
+        {
+            "$unset": {
+                "instance_list.$[].cpu_history": "",
+                "instance_list.$[].memory_history": "",
+            }
+        },
+    )
@@ -0,0 +1,40 @@
+from bson.objectid import ObjectId
+from pymongo import ASCENDING
+
+
+class KeysetPage:
+    """Documents of a page whose _id was excluded, it is only read for the next page."""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.last_id = None
+
+    def __iter__(self):
+        for document in self.cursor:
+            self.last_id = document.pop("_id", None)
+            yield document
+
+
+def keyset_page(find, filter, projection=None, limit=None, after=None):
+    """Cursor over the documents of find(filter, projection) in _id order after the _id after.
+
+    Without limit and after, the cursor is returned unsorted as before. A page of a
+    projection without _id is returned as KeysetPage, which keeps the _id of the last
+    document for the next page.
+    """
+    if after:
+        filter = {"$and": [filter, {"_id": {"$gt": ObjectId(after)}}]}
+
+    excludes_id = projection is not None and not projection.get("_id", True)
+    if limit and excludes_id:
+        # _id is included unless it is excluded, "_id": 1 would drop the other fields
+        projection = {key: val for key, val in projection.items() if key != "_id"} or None
+
+    cursor = find(filter, projection)
+    if limit or after:
+        cursor = cursor.sort("_id", ASCENDING)
+    if limit:
+        cursor = cursor.limit(limit)
+        if excludes_id:
+            return KeysetPage(cursor)
+    return cursor
@@ -0,0 +1,24 @@
+def _field_list(value):
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = value.split(",")
+    return [field.strip() for field in value if field and field.strip()]
+
+
+def build_projection(fields=None, exclude=None):
+    """Mongo projection from comma separated field paths, e.g. "job_name,instance_list.status".
+
+    Returns None when all fields are requested. Mongo cannot mix included and excluded
+    fields (except _id), so fields and exclude are mutually exclusive.
+    """
+    fields = _field_list(fields)
+    exclude = _field_list(exclude)
+    if fields and exclude:
+        raise ValueError("fields and exclude cannot be combined")
+
+    if fields:
+        return {field: 1 for field in fields}
+    if exclude:
+        return {field: 0 for field in exclude}
+    return None
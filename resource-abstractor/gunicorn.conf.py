@@ -0,0 +1,68 @@
+# Gunicorn settings of the resource abstractor:
+#   gunicorn -c gunicorn.conf.py resource_abstractor:app
+import importlib.util
+import os
+import signal
+import threading
+import time
+
+bind = f"[::]:{os.environ.get('RESOURCE_ABSTRACTOR_PORT', '11011')}"
+
+# "gevent" is the cooperative mode, a worker serves up to worker_connections requests
+# concurrently. It is the default when gevent is installed: every open /api/v1/watch
+# stream or long poll holds its request for up to 25 seconds. "gthread" runs a pool of
+# threads per worker, where each watcher pins one of them, so a worker serves at most
+# threads watchers and requests at the same time.
+worker_class = os.environ.get(
+    "RESOURCE_ABSTRACTOR_WORKER_CLASS",
+    "gevent" if importlib.util.find_spec("gevent") else "gthread",
+)
+workers = int(os.environ.get("RESOURCE_ABSTRACTOR_WORKERS", 4))
+threads = int(os.environ.get("RESOURCE_ABSTRACTOR_THREADS", 8))
+worker_connections = int(os.environ.get("RESOURCE_ABSTRACTOR_WORKER_CONNECTIONS", 1000))
+
+# The app is created in every worker after the fork: MongoClient is not fork-safe and the
+# threads of the hook delivery, hook registry and change feed do not survive a fork
+preload_app = False
+
+# the clients keep their connections alive between requests
+keepalive = 30
+timeout = int(os.environ.get("RESOURCE_ABSTRACTOR_TIMEOUT", 60))
+# on SIGTERM, requests in flight get this long to finish before the workers are killed
+graceful_timeout = int(os.environ.get("RESOURCE_ABSTRACTOR_GRACEFUL_TIMEOUT", 30))
+# on SIGTERM, a worker keeps serving with /ready answering 503 for this many seconds, so
+# load balancers stop sending requests before it closes its socket. Counts towards the
+# graceful_timeout.
+DRAIN_SECONDS = float(os.environ.get("RESOURCE_ABSTRACTOR_DRAIN_SECONDS", 5))
+
+
+def post_worker_init(worker):
+    import resource_abstractor
+
+    stop_serving = worker.handle_exit
+    terminated = threading.Event()
+
+    def drain():
+        terminated.wait()
+        time.sleep(DRAIN_SECONDS)
+        stop_serving(signal.SIGTERM, None)
+
+    def handle_exit(sig, frame):
+        # under gevent signal handlers run in the event loop and must not block
+        resource_abstractor.shutting_down = True
+        terminated.set()
+
+    threading.Thread(target=drain, name="drain", daemon=True).start()
+    signal.signal(signal.SIGTERM, handle_exit)
+
+
+def worker_int(worker):
+    import resource_abstractor
+
+    resource_abstractor.shutting_down = True
+
+
+def worker_exit(server, worker):
+    import resource_abstractor
+
+    resource_abstractor.shutdown()
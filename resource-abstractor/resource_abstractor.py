@@ -3,11 +3,16 @@ import os
 import sys
 
 from api.v1 import blueprints
-from db.mongodb_client import mongo_init
+from db.mongodb_client import mongo_close, mongo_init, mongo_ping
 from flask import Flask
 from flask_cors import CORS
 from flask_smorest import Api
 from flask_swagger_ui import get_swaggerui_blueprint
+from oakestra_utils.serialization import init_flask
+from pymongo.errors import PyMongoError
+from services.change_feed import change_feed
+from services.hook_delivery import hook_delivery
+from services.hook_service import hook_registry
 
 # Configure logging with environment variable, default to DEBUG
 log_level_str = os.environ.get("LOG_LEVEL", "DEBUG").upper()
@@ -27,9 +32,12 @@ logging.getLogger("pymongo.connection").setLevel(logging.WARNING)
 logging.getLogger("pymongo.serverSelection").setLevel(logging.WARNING)
 
 RESOURCE_ABSTRACTOR_PORT = os.environ.get("RESOURCE_ABSTRACTOR_PORT")
+# Seconds the hook delivery workers get to finish their current delivery on shutdown
+SHUTDOWN_TIMEOUT = float(os.environ.get("RESOURCE_ABSTRACTOR_SHUTDOWN_TIMEOUT", 10))
 
 app = Flask(__name__)
 app.logger.setLevel(log_level)
+init_flask(app)
 
 # Configure CORS with explicit settings
 CORS(
@@ -55,6 +63,9 @@ app.config["OPENAPI_URL_PREFIX"] = "/docs"
 
 api = Api(app)
 mongo_init(app)
+change_feed.start()
+hook_registry.start()
+hook_delivery.start()
 
 # Register blueprints
 SWAGGER_URL = "/api/docs"
@@ -75,5 +86,32 @@ def health():
     return "ok"
 
 
+shutting_down = False
+
+
+@app.route("/ready", methods=["GET"])
+def ready():
+    """Ready to serve requests: started, not shutting down and MongoDB is reachable."""
+    if shutting_down:
+        return "shutting down", 503
+    try:
+        mongo_ping()
+    except PyMongoError as e:
+        logger.warning(f"Not ready, MongoDB unreachable: {e}")
+        return "mongodb unreachable", 503
+    return "ok"
+
+
+def shutdown():
+    """Stop the background work of this process, called by gunicorn when a worker exits."""
+    global shutting_down
+
+    shutting_down = True
+    hook_delivery.stop(SHUTDOWN_TIMEOUT)
+    mongo_close()
+
+
 if __name__ == "__main__":
+    # development server, gunicorn -c gunicorn.conf.py resource_abstractor:app serves
+    # with several workers
     app.run(host="::", port=RESOURCE_ABSTRACTOR_PORT, debug=False)
@@ -0,0 +1,193 @@
+import logging
+import os
+import time
+
+from bson.objectid import ObjectId
+from db import changes_db, custom_resources_db
+from db import mongodb_client as db
+from pymongo.errors import OperationFailure, PyMongoError
+
+# Changes younger than this are not served from the changes log yet, see find_changes
+WATCH_SETTLE_SECONDS = float(os.environ.get("WATCH_SETTLE_SECONDS", 1))
+WATCH_POLL_INTERVAL = float(os.environ.get("WATCH_POLL_INTERVAL", 0.5))
+
+WATCHED_OPERATIONS = ["insert", "update", "replace", "delete"]
+BUILT_IN_ENTITIES = ["jobs", "apps", "candidates"]
+# hook entity names of the built-in collections
+ENTITY_ALIASES = {"job": "jobs", "resources": "candidates", "applications": "apps"}
+# MongoDB error codes of a resume token that is no longer in the oplog
+HISTORY_LOST_CODES = (280, 286)
+
+logger = logging.getLogger("resource_abstractor")
+
+
+class HistoryLost(Exception):
+    """The changes after the resume token are no longer available, re-read the entity."""
+
+
+class ChangeFeed:
+    """Compact change events of jobs, apps, candidates and custom resources.
+
+    Events are {token, entity, op, id, fields}, where fields are the updated field
+    paths. Passing the token of the last seen event resumes after it. With a replica set
+    the events come from MongoDB change streams. A standalone MongoDB has none, the
+    resource abstractor then records its own writes to the changes collection and
+    serves the events from there.
+    """
+
+    def __init__(self):
+        self.change_streams = None
+
+    def start(self):
+        try:
+            with db.mongo_jobs.watch(max_await_time_ms=1):
+                pass
+            self.change_streams = True
+        except OperationFailure as e:
+            logger.info(f"Change streams unavailable, recording changes instead: {e}")
+            self.change_streams = False
+
+    @property
+    def recording(self):
+        return self.change_streams is False
+
+    def record(self, entity, op, entity_ids, fields=None):
+        """Log writes of this process, only needed without change streams."""
+        self._record(entity, op, [(entity_id, fields) for entity_id in entity_ids])
+
+    def record_updates(self, entity, updates):
+        """Log updates of several entities, updates maps each id to its updated fields."""
+        self._record(entity, "update", updates.items())
+
+    def _record(self, entity, op, changes):
+        if not self.recording:
+            return
+        entity = ENTITY_ALIASES.get(entity, entity)
+        try:
+            changes_db.record_changes(
+                [
+                    {"entity": entity, "op": op, "id": str(entity_id), "fields": _fields(fields)}
+                    for entity_id, fields in changes
+                ]
+            )
+        except PyMongoError as e:
+            # a write must not fail because its change could not be logged
+            logger.error(f"Unable to record {op} of {entity}: {e}")
+
+    def knows(self, entity):
+        entity = ENTITY_ALIASES.get(entity, entity)
+        return entity in BUILT_IN_ENTITIES or custom_resources_db.check_custom_resource_exists(
+            entity
+        )
+
+    def collection(self, entity):
+        entity = ENTITY_ALIASES.get(entity, entity)
+        collections = {
+            "jobs": db.mongo_jobs,
+            "apps": db.mongo_apps,
+            "candidates": db.mongo_candidates,
+        }
+        if entity in collections:
+            return collections[entity]
+        if custom_resources_db.check_custom_resource_exists(entity):
+            return custom_resources_db.resources_collection(entity)
+        return None
+
+    def poll(self, entity, since=None, entity_id=None, timeout=25, limit=100):
+        """Wait up to timeout seconds for changes, returns (events, token to resume from)."""
+        deadline = time.monotonic() + timeout
+        events = []
+        token = since
+        for event, token in self._events(entity, since, entity_id):
+            if event is None:
+                if events or time.monotonic() >= deadline:
+                    break
+                continue
+            events.append(event)
+            if len(events) >= limit:
+                break
+        return events, token
+
+    def stream(self, entity, since=None, entity_id=None):
+        """Endless iterator over (event, token), the event is None while there are none."""
+        return self._events(entity, since, entity_id)
+
+    def _events(self, entity, since, entity_id):
+        """Invalid or expired tokens raise here, before the first event is read."""
+        entity = ENTITY_ALIASES.get(entity, entity)
+        if self.change_streams:
+            return self._stream_events(self._open_stream(entity, since, entity_id), entity, since)
+
+        if since is None:
+            since = changes_db.latest_token(WATCH_SETTLE_SECONDS)
+        elif not ObjectId.is_valid(since):
+            raise ValueError("Invalid resume token")
+        elif changes_db.is_expired(since):
+            raise HistoryLost(f"Changes before {since} are no longer recorded")
+        return self._logged_events(entity, since, entity_id)
+
+    def _open_stream(self, entity, since, entity_id):
+        match = {"operationType": {"$in": WATCHED_OPERATIONS}}
+        if entity_id is not None:
+            match["documentKey._id"] = ObjectId(entity_id)
+        pipeline = [{"$match": match}, {"$project": {"fullDocument": 0}}]
+        resume_after = {"_data": since} if since else None
+        try:
+            return self.collection(entity).watch(
+                pipeline, resume_after=resume_after, max_await_time_ms=1000
+            )
+        except OperationFailure as e:
+            if e.code in HISTORY_LOST_CODES:
+                raise HistoryLost(str(e)) from e
+            raise ValueError(f"Invalid resume token: {e}") from e
+
+    def _stream_events(self, stream, entity, since):
+        with stream:
+            while True:
+                change = stream.try_next()
+                # advances without changes too, so an idle watcher resumes from now
+                token = stream.resume_token["_data"] if stream.resume_token else since
+                yield (None if change is None else _stream_event(entity, change)), token
+
+    def _logged_events(self, entity, since, entity_id):
+        while True:
+            changes = changes_db.find_changes(entity, since, WATCH_SETTLE_SECONDS, entity_id)
+            for change in changes:
+                since = str(change["_id"])
+                yield _logged_event(change), since
+            if not changes:
+                yield None, since
+                time.sleep(WATCH_POLL_INTERVAL)
+
+
+def _fields(fields):
+    return sorted(field for field in fields if field != "_id") if fields else None
+
+
+def _stream_event(entity, change):
+    fields = None
+    description = change.get("updateDescription")
+    if description:
+        fields = sorted(
+            [*description.get("updatedFields", {}), *description.get("removedFields", [])]
+        )
+    return {
+        "token": change["_id"]["_data"],
+        "entity": entity,
+        "op": change["operationType"],
+        "id": str(change["documentKey"]["_id"]),
+        "fields": fields,
+    }
+
+
+def _logged_event(change):
+    return {
+        "token": str(change["_id"]),
+        "entity": change["entity"],
+        "op": change["op"],
+        "id": change["id"],
+        "fields": change.get("fields"),
+    }
+
+
+change_feed = ChangeFeed()
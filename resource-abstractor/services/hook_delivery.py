@@ -0,0 +1,155 @@
+import logging
+import os
+import random
+import threading
+from datetime import datetime
+
+from db import hook_outbox_db
+from pymongo.errors import PyMongoError
+from requests import Session, exceptions
+from requests.adapters import HTTPAdapter
+
+HOOK_DELIVERY_WORKERS = int(os.environ.get("HOOK_DELIVERY_WORKERS", 4))
+# Events sent in one POST to hooks created with batch enabled
+HOOK_BATCH_SIZE = int(os.environ.get("HOOK_BATCH_SIZE", 50))
+HOOK_MAX_ATTEMPTS = int(os.environ.get("HOOK_MAX_ATTEMPTS", 8))
+HOOK_BACKOFF_BASE = float(os.environ.get("HOOK_BACKOFF_BASE", 1))
+HOOK_BACKOFF_MAX = float(os.environ.get("HOOK_BACKOFF_MAX", 300))
+# Seconds a claimed event is reserved for its worker before other workers may deliver it
+HOOK_DELIVERY_LEASE = float(os.environ.get("HOOK_DELIVERY_LEASE", 60))
+# Seconds between checks for due retries when no new events are signalled
+HOOK_POLL_INTERVAL = float(os.environ.get("HOOK_POLL_INTERVAL", 1))
+
+RESPONSE_TIMEOUT = float(os.environ.get("HOOK_REQUEST_TIMEOUT", 5))
+CONNECT_TIMEOUT = float(os.environ.get("HOOK_CONNECT_TIMEOUT", 10))
+
+logger = logging.getLogger("resource_abstractor")
+
+_session = Session()
+_adapter = HTTPAdapter(pool_maxsize=max(10, HOOK_DELIVERY_WORKERS))
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
+
+
+def post_webhook(url, data):
+    """POST data to a webhook over the pooled session, raises on errors and error codes."""
+    response = _session.post(url, json=data, timeout=(CONNECT_TIMEOUT, RESPONSE_TIMEOUT))
+    response.raise_for_status()
+    return response
+
+
+class HookDelivery:
+    """Delivers the events of the hook outbox with a fixed pool of worker threads.
+
+    Events are persisted before they are delivered, so they survive restarts and
+    timeouts of the webhook. A failed delivery is retried with an exponentially growing,
+    jittered delay until max_attempts, after which the event is kept as failed.
+    """
+
+    def __init__(
+        self,
+        workers=HOOK_DELIVERY_WORKERS,
+        batch_size=HOOK_BATCH_SIZE,
+        max_attempts=HOOK_MAX_ATTEMPTS,
+        base_delay=HOOK_BACKOFF_BASE,
+        max_delay=HOOK_BACKOFF_MAX,
+    ):
+        self.workers = max(1, workers)
+        self.batch_size = batch_size
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.threads = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+        self._counters = {"delivered": 0, "requests": 0, "retries": 0, "failed": 0}
+        self._last_lag = 0.0
+        self._max_lag = 0.0
+
+    def start(self):
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"hook-delivery-{index}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self, timeout=None):
+        """Let the workers finish their current delivery, events not yet claimed stay
+        in the outbox for the next start."""
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def submit(self, events):
+        hook_outbox_db.enqueue_events(events)
+        self._wakeup.set()
+
+    def stats(self):
+        with self._lock:
+            stats = {
+                **self._counters,
+                "last_lag_seconds": self._last_lag,
+                "max_lag_seconds": self._max_lag,
+            }
+        return {**hook_outbox_db.outbox_stats(), **stats}
+
+    def _delay(self, attempts):
+        delay = min(self.max_delay, self.base_delay * 2**attempts)
+        return random.uniform(delay / 2, delay)
+
+    def _work(self):
+        while not self._stopping.is_set():
+            try:
+                delivered = self.deliver_next()
+            except PyMongoError as e:
+                logger.error(f"Hook outbox unavailable: {e}")
+                delivered = False
+            except Exception:
+                # e.g. a malformed outbox event, the worker has to survive it
+                logger.exception("Hook delivery failed")
+                delivered = False
+
+            if not delivered and not self._stopping.is_set():
+                self._wakeup.wait(HOOK_POLL_INTERVAL)
+                self._wakeup.clear()
+
+    def deliver_next(self):
+        """Deliver the next due event(s), returns False if none were due."""
+        events = hook_outbox_db.claim_events(self.batch_size, HOOK_DELIVERY_LEASE)
+        if not events:
+            return False
+
+        url = events[0]["webhook_url"]
+        ids = [event["_id"] for event in events]
+        data = (
+            [event["payload"] for event in events]
+            if events[0].get("batch")
+            else events[0]["payload"]
+        )
+        try:
+            post_webhook(url, data)
+        except exceptions.RequestException as e:
+            logger.warning(f"Hook delivery to {url} failed: {e}")
+            attempts = min(event.get("attempts", 0) for event in events)
+            failed = hook_outbox_db.retry_events(
+                ids, self._delay(attempts), self.max_attempts, str(e)
+            )
+            with self._lock:
+                self._counters["requests"] += 1
+                self._counters["retries"] += len(ids) - failed
+                self._counters["failed"] += failed
+            return True
+
+        hook_outbox_db.delete_events(ids)
+        lag = (datetime.utcnow() - min(event["created_at"] for event in events)).total_seconds()
+        with self._lock:
+            self._counters["requests"] += 1
+            self._counters["delivered"] += len(ids)
+            self._last_lag = lag
+            self._max_lag = max(self._max_lag, lag)
+        return True
+
+
+hook_delivery = HookDelivery()
@@ -2,23 +2,213 @@ import json
 import logging
 import os
 import threading
+import time
 from functools import wraps
 
 from db import hooks_db
 from flask import request
-from requests import exceptions, post
-
-RESPONSE_TIMEOUT = os.environ.get("HOOK_REQUEST_TIMEOUT", 5)
-CONNECT_TIMEOUT = os.environ.get("HOOK_CONNECT_TIMEOUT", 10)
+from pymongo.errors import OperationFailure, PyMongoError
+from requests import exceptions
+
+from services.change_feed import change_feed
+from services.hook_delivery import hook_delivery, post_webhook
+
+# Invalidate the hook registry on changes of the hooks collection made by other replicas,
+# requires MongoDB to run as replica set
+HOOK_CHANGE_STREAM = os.environ.get("HOOK_CHANGE_STREAM", "true").lower() == "true"
+# Reload the hook registry at least this often (seconds), 0 keeps it until invalidated
+HOOK_REGISTRY_MAX_AGE = float(os.environ.get("HOOK_REGISTRY_MAX_AGE", 60))
+# Seconds between checks of the hooks version, which tells about hooks changed by other
+# processes (gunicorn workers, replicas) while no change stream is followed
+HOOK_REGISTRY_CHECK_INTERVAL = float(os.environ.get("HOOK_REGISTRY_CHECK_INTERVAL", 1))
+
+logger = logging.getLogger("resource_abstractor")
+
+
+class HookRegistry:
+    """In-process copy of the hooks collection, indexed by (entity, event).
+
+    The registry is loaded on first use and reloaded after it was invalidated, by the
+    hooks endpoints of this process or by the change stream of the hooks collection
+    that tells about changes made through other processes. Without change streams, the
+    version the hooks endpoints bump on every change is checked every check_interval
+    seconds instead. Looking up an entity without hooks does not touch the database
+    otherwise.
+    """
+
+    def __init__(self, max_age=HOOK_REGISTRY_MAX_AGE, check_interval=HOOK_REGISTRY_CHECK_INTERVAL):
+        self.max_age = max_age
+        self.check_interval = check_interval
+        self._hooks = None
+        self._version = None
+        self._loaded_at = 0.0
+        self._checked_at = 0.0
+        # bumped on every invalidation, a load that raced with one is not kept
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._watcher = None
+        self._streaming = False
+
+    def load(self):
+        with self._lock:
+            generation = self._generation
+
+        version = hooks_db.hooks_version()
+        hooks = {}
+        for hook in hooks_db.find_hooks():
+            for event in hook.get("events") or []:
+                hooks.setdefault((hook.get("entity"), event), []).append(hook)
+
+        with self._lock:
+            if generation == self._generation:
+                self._hooks = hooks
+                self._version = version
+                self._loaded_at = self._checked_at = time.monotonic()
+        return hooks
+
+    def invalidate(self):
+        with self._lock:
+            self._generation += 1
+            self._hooks = None
+
+    def get(self, entity_name, event):
+        hooks = self._hooks
+        now = time.monotonic()
+        if (
+            hooks is None
+            or (self.max_age and now - self._loaded_at > self.max_age)
+            or self._outdated(now)
+        ):
+            hooks = self.load()
+        return hooks.get((entity_name, event), [])
+
+    def _outdated(self, now):
+        """Whether another process changed the hooks, checked every check_interval."""
+        if self._streaming or not self.check_interval:
+            return False
+        if now - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = now
+        return hooks_db.hooks_version() != self._version
+
+    def start(self, watch=HOOK_CHANGE_STREAM):
+        """Load the registry and follow the hooks collection from a background thread."""
+        self.load()
+        if watch and self._watcher is None:
+            self._watcher = threading.Thread(target=self._watch, name="hook-registry", daemon=True)
+            self._watcher.start()
+
+    def _watch(self):
+        while True:
+            try:
+                with hooks_db.watch_hooks() as stream:
+                    # changes made while the stream was down are not replayed
+                    self.invalidate()
+                    self._streaming = True
+                    for _ in stream:
+                        self.invalidate()
+            except OperationFailure as e:
+                logger.warning(
+                    f"Hook change stream unavailable, checking the hooks version instead: {e}"
+                )
+                return
+            except PyMongoError as e:
+                logger.warning(f"Hook change stream interrupted: {e}")
+                time.sleep(5)
+            finally:
+                self._streaming = False
+
+
+hook_registry = HookRegistry()
+
+
+# eq, ne and in compare the new value with the condition value, changed with the old value
+CONDITION_OPERATORS = ["eq", "ne", "in", "changed"]
+
+_MISSING = object()
+
+UPDATE_EVENTS = [
+    hooks_db.HookEventsEnum.PRE_UPDATE.value,
+    hooks_db.HookEventsEnum.POST_UPDATE.value,
+]
+
+
+def _lookup(document, path):
+    value = document
+    for key in path.split("."):
+        if not isinstance(value, dict) or key not in value:
+            return _MISSING
+        value = value[key]
+    return value
+
+
+def _changed(data, before, field):
+    value = _lookup(data, field)
+    if value is _MISSING:
+        return False
+    return before is None or _lookup(before, field) != value
+
+
+def hook_matches(hook, data, before=None):
+    """Whether an event carrying data passes the fields and conditions of the hook.
+
+    data is the created or updated data of the request. A hook with fields only passes
+    if data changes one of them, a condition only if data contains its field. Without
+    the state before the update, every reported field and changed condition counts as
+    changed. A hook with fields or conditions never passes an event without data.
+    """
+    watched = hook.get("watched_fields")
+    conditions = hook.get("conditions") or []
+    if not watched and not conditions:
+        return True
+    if data is None:
+        return False
+
+    if watched and not any(_changed(data, before, field) for field in watched):
+        return False
+
+    for condition in conditions:
+        value = _lookup(data, condition["field"])
+        if value is _MISSING:
+            return False
+
+        op = condition.get("op", "eq")
+        if op == "eq" and value != condition.get("value"):
+            return False
+        if op == "ne" and value == condition.get("value"):
+            return False
+        if op == "in" and value not in (condition.get("value") or []):
+            return False
+        if op == "changed" and not _changed(data, before, condition["field"]):
+            return False
+
+    return True
+
+
+def matching_hooks(entity_name, event, data=None, before=None):
+    hooks = hook_registry.get(entity_name, event)
+    # a deletion changes every field, fields and conditions do not apply
+    if event == hooks_db.HookEventsEnum.POST_DELETE.value:
+        return hooks
+    return [hook for hook in hooks if hook_matches(hook, data, before)]
+
+
+def needs_before(entity_name, *events):
+    """Whether a hook of the events compares with the state before the update."""
+    return any(
+        (event in UPDATE_EVENTS and hook.get("watched_fields"))
+        or any(condition.get("op") == "changed" for condition in hook.get("conditions") or [])
+        for event in events
+        for hook in hook_registry.get(entity_name, event)
+    )
 
 
 def call_webhook(url, data):
     try:
         logging.info(f"Calling webhook with data: {data}")
-        response = post(url, json=data, timeout=(CONNECT_TIMEOUT, RESPONSE_TIMEOUT))
-        response.raise_for_status()
+        response = post_webhook(url, data)
         try:
-            # in async mode we don't care about the response
+            # pre hooks may answer with modified data
             data = response.json()
         except json.JSONDecodeError:
             pass
@@ -36,34 +226,45 @@ def call_webhook(url, data):
     return data
 
 
-def process_async_hook(entity_name, event, entity_id):
-    async_hooks = hooks_db.find_hooks({"entity": entity_name, "events": {"$in": [event]}})
+def process_async_hook(entity_name, event, entity_id, data=None, before=None):
+    hooks = matching_hooks(entity_name, event, data, before)
+    if not hooks:
+        return
 
-    for hook in async_hooks:
-        data = {
-            "entity": entity_name,
-            "entity_id": entity_id,
-            "event": event,
-        }
-        threading.Thread(target=call_webhook, args=(hook["webhook_url"], data)).start()
+    payload = {
+        "entity": entity_name,
+        "entity_id": entity_id,
+        "event": event,
+    }
+    hook_delivery.submit(
+        [
+            {
+                "hook_id": str(hook.get("_id")),
+                "webhook_url": hook["webhook_url"],
+                "batch": bool(hook.get("batch")),
+                "payload": payload,
+            }
+            for hook in hooks
+        ]
+    )
 
 
-def process_post_create(entity_name, entity_id):
-    process_async_hook(entity_name, hooks_db.HookEventsEnum.POST_CREATE.value, entity_id)
+def process_post_create(entity_name, entity_id, data=None):
+    process_async_hook(entity_name, hooks_db.HookEventsEnum.POST_CREATE.value, entity_id, data)
 
 
-def process_post_update(entity_name, entity_id):
-    process_async_hook(entity_name, hooks_db.HookEventsEnum.POST_UPDATE.value, entity_id)
+def process_post_update(entity_name, entity_id, data=None, before=None):
+    process_async_hook(
+        entity_name, hooks_db.HookEventsEnum.POST_UPDATE.value, entity_id, data, before
+    )
 
 
 def process_post_delete(entity_name, entity_id):
     process_async_hook(entity_name, hooks_db.HookEventsEnum.POST_DELETE.value, entity_id)
 
 
-def process_sync_hook(entity_name, event, data):
-    sync_hooks = hooks_db.find_hooks({"entity": entity_name, "events": {"$in": [event]}})
-
-    for hook in sync_hooks:
+def process_sync_hook(entity_name, event, data, before=None):
+    for hook in matching_hooks(entity_name, event, data, before):
         data = call_webhook(hook["webhook_url"], data)
 
     return data
@@ -73,8 +274,8 @@ def process_pre_create(entity_name, data):
     return process_sync_hook(entity_name, hooks_db.HookEventsEnum.PRE_CREATE.value, data)
 
 
-def process_pre_update(entity_name, data):
-    return process_sync_hook(entity_name, hooks_db.HookEventsEnum.PRE_UPDATE.value, data)
+def process_pre_update(entity_name, data, before=None):
+    return process_sync_hook(entity_name, hooks_db.HookEventsEnum.PRE_UPDATE.value, data, before)
 
 
 def perform_create(entity_name, fn, *args):
@@ -85,7 +286,8 @@ def perform_create(entity_name, fn, *args):
     args[-1] = data
 
     result = fn(*tuple(args))
-    process_post_create(entity_name, str(result.get("_id")))
+    change_feed.record(entity_name, "insert", [result.get("_id")])
+    process_post_create(entity_name, str(result.get("_id")), data)
 
     return result
 
@@ -99,23 +301,30 @@ def perform_update(entity_name, fn, *args):
     args[-1] = data
 
     result = fn(*tuple(args))
-    process_post_update(entity_name, str(result.get("_id")))
+    change_feed.record(entity_name, "update", [result.get("_id")], data)
+    process_post_update(entity_name, str(result.get("_id")), data)
 
     return result
 
 
+# change of the entity recorded for watchers, by method
+change_ops = {"post": "insert", "put": "insert", "patch": "update", "delete": "delete"}
+
 # put currently is not supported
 api_hooks_map = {
-    "post": (process_pre_create, process_post_create),
-    "put": (process_pre_create, process_post_create),
-    "patch": (process_pre_update, process_post_update),
-    "delete": (None, process_post_delete),
+    "post": (hooks_db.HookEventsEnum.PRE_CREATE, hooks_db.HookEventsEnum.POST_CREATE),
+    "put": (hooks_db.HookEventsEnum.PRE_CREATE, hooks_db.HookEventsEnum.POST_CREATE),
+    "patch": (hooks_db.HookEventsEnum.PRE_UPDATE, hooks_db.HookEventsEnum.POST_UPDATE),
+    "delete": (None, hooks_db.HookEventsEnum.POST_DELETE),
 }
 
 
 # doesn't work well with @arguments decorator
 # this decorator has to be the closest to the method
-def pre_post_hook(name=None, with_param_id=None):
+# load_before(**kwargs) returns the entity before the update, it is only called when a
+# hook has a changed condition
+# change_op overrides the recorded change, e.g. "update" for methods on nested documents
+def pre_post_hook(name=None, with_param_id=None, load_before=None, change_op=None):
     def decorator(fn):
         @wraps(fn)
         def wrapper(*args, **kwargs):
@@ -125,19 +334,23 @@ def pre_post_hook(name=None, with_param_id=None):
 
             data = args[1] if len(args) > 1 else request.json
 
-            pre_fn = api_hooks_map[method_name][0]
-            post_fn = api_hooks_map[method_name][1]
+            pre_event, post_event = api_hooks_map[method_name]
 
             entity_id = kwargs.get(with_param_id) if with_param_id else None
             entity_name = name if name else kwargs.get("resource")  # for custom resources
             if not entity_name:
                 raise ValueError("Couldn't determine entity name.")
 
-            if pre_fn:
+            events = [event.value for event in (pre_event, post_event) if event]
+            before = None
+            if load_before and needs_before(entity_name, *events):
+                before = load_before(**kwargs)
+
+            if pre_event:
                 if entity_id:
                     data["_id"] = entity_id
 
-                data = pre_fn(entity_name, data)
+                data = process_sync_hook(entity_name, pre_event.value, data, before)
 
             args = list(args)
             if data and len(args) > 1:
@@ -146,6 +359,11 @@ def pre_post_hook(name=None, with_param_id=None):
                 args.append(data)
 
             result = fn(*tuple(args), **kwargs)
+            changes = data if pre_event else None
+            hooked = matching_hooks(entity_name, post_event.value, changes, before)
+            if not hooked and not change_feed.recording:
+                return result
+
             result_id = str(result["_id"]) if isinstance(result, dict) else None
 
             # incase result was json encoded
@@ -160,7 +378,10 @@ def pre_post_hook(name=None, with_param_id=None):
                 result_id = entity_id
 
             if result_id:
-                post_fn(entity_name, result_id)
+                op = change_op or change_ops[method_name]
+                change_feed.record(entity_name, op, [result_id], changes)
+            if result_id and hooked:
+                process_async_hook(entity_name, post_event.value, result_id, changes, before)
 
             return result
 
@@ -0,0 +1,69 @@
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from jsonschema import exceptions, validators
+
+# Compiled validators kept per process, the least recently used is dropped beyond this
+SCHEMA_VALIDATOR_CACHE_SIZE = int(os.environ.get("SCHEMA_VALIDATOR_CACHE_SIZE", 256))
+
+
+def schema_hash(schema):
+    return hashlib.sha1(json.dumps(schema, sort_keys=True, default=str).encode()).hexdigest()
+
+
+def compile_schema(schema):
+    """Validator of a JSON schema, raises jsonschema.SchemaError if it is invalid."""
+    cls = validators.validator_for(schema)
+    cls.check_schema(schema)
+    return cls(schema)
+
+
+def validate(validator, instance):
+    """Same as jsonschema.validate with a compiled validator, raises the best matching error."""
+    error = exceptions.best_match(validator.iter_errors(instance))
+    if error is not None:
+        raise error
+
+
+class SchemaValidators:
+    """Compiled validators of the custom resource definitions, keyed by (type, schema hash).
+
+    jsonschema.validate checks the schema against its meta schema and builds a new
+    validator on every call, which costs more than validating a resource. The schema
+    hash is part of the key, so a definition that was deleted and registered again with
+    another schema, e.g. through another replica, never gets the old validator.
+    """
+
+    def __init__(self, max_size=SCHEMA_VALIDATOR_CACHE_SIZE):
+        self.max_size = max_size
+        self._validators = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, resource_type, schema):
+        key = (resource_type, schema_hash(schema))
+        with self._lock:
+            validator = self._validators.get(key)
+            if validator is not None:
+                self._validators.move_to_end(key)
+                return validator
+
+        validator = compile_schema(schema)
+        with self._lock:
+            self._validators[key] = validator
+            while len(self._validators) > self.max_size:
+                self._validators.popitem(last=False)
+        return validator
+
+    def validate(self, resource_type, schema, instance):
+        validate(self.get(resource_type, schema), instance)
+
+    def invalidate(self, resource_type):
+        with self._lock:
+            for key in [key for key in self._validators if key[0] == resource_type]:
+                del self._validators[key]
+
+
+schema_validators = SchemaValidators()
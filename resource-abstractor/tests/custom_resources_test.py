@@ -0,0 +1,200 @@
+import json
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+import mongomock
+from api.v1.custom_resources_blueprint import customblp
+from bson import ObjectId
+from db import custom_resources_db
+from flask import Flask
+from services import schema_validators
+from services.hook_service import HookRegistry
+from services.schema_validators import SchemaValidators
+
+DEFINITION = {
+    "resource_type": "database",
+    "schema": {
+        "type": "object",
+        "properties": {"port": {"type": "integer"}},
+        "required": ["port"],
+    },
+}
+
+
+@patch("services.hook_service.hooks_db.hooks_version", new=lambda: 0)
+@patch("services.hook_service.hooks_db.find_hooks", return_value=[])
+@patch("api.v1.custom_resources_blueprint.custom_resources_db")
+class CustomResourcesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.register_blueprint(customblp)
+        self.client = self.app.test_client()
+
+        validators = SchemaValidators()
+        patcher = patch("api.v1.custom_resources_blueprint.schema_validators", validators)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.validators = validators
+
+    def test_validator_compiled_once(self, mock_db, _):
+        mock_db.find_custom_resource_by_type.return_value = DEFINITION
+        mock_db.create_resource.side_effect = lambda _, data: data
+
+        with patch.object(
+            schema_validators, "compile_schema", wraps=schema_validators.compile_schema
+        ) as mock_compile:
+            for port in range(3):
+                response = self.client.post(
+                    "/api/v1/custom-resources/database", json={"port": port}
+                )
+                self.assertEqual(response.status_code, 200)
+
+        mock_compile.assert_called_once()
+
+    def test_invalid_resource(self, mock_db, _):
+        mock_db.find_custom_resource_by_type.return_value = DEFINITION
+
+        response = self.client.post("/api/v1/custom-resources/database", json={"port": "80"})
+
+        self.assertEqual(response.status_code, 400)
+        mock_db.create_resource.assert_not_called()
+
+    def test_changed_schema_not_served_from_cache(self, mock_db, _):
+        mock_db.find_custom_resource_by_type.return_value = DEFINITION
+        mock_db.create_resource.side_effect = lambda _, data: data
+        self.client.post("/api/v1/custom-resources/database", json={"port": 80})
+
+        # registered again with another schema, e.g. through another replica
+        mock_db.find_custom_resource_by_type.return_value = {
+            **DEFINITION,
+            "schema": {**DEFINITION["schema"], "required": ["host"]},
+        }
+        response = self.client.post("/api/v1/custom-resources/database", json={"port": 80})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_invalid_schema_rejected(self, mock_db, _):
+        response = self.client.post(
+            "/api/v1/custom-resources/",
+            json={"resource_type": "database", "schema": {"type": "no-such-type"}},
+        )
+
+        self.assertEqual(response.status_code, 400)
+        mock_db.create_custom_resource.assert_not_called()
+
+    def test_delete_definition_invalidates(self, mock_db, _):
+        mock_db.find_custom_resource_by_type.return_value = DEFINITION
+        self.validators.get("database", DEFINITION["schema"])
+
+        response = self.client.delete("/api/v1/custom-resources/database")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.validators._validators), 0)
+
+
+DEFINITION_WITH_INDEXES = {
+    **DEFINITION,
+    "indexes": [
+        {"keys": ["node"], "unique": True},
+        {"keys": ["seen_at"], "expire_after_seconds": 60},
+    ],
+}
+
+
+@patch("services.hook_service.hooks_db.hooks_version", new=lambda: 0)
+@patch("services.hook_service.hooks_db.find_hooks", return_value=[])
+@patch(
+    "api.v1.custom_resources_blueprint.custom_resources_db.find_custom_resource_by_type",
+    return_value=DEFINITION_WITH_INDEXES,
+)
+class BulkResourcesTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.register_blueprint(customblp)
+        self.client = self.app.test_client()
+
+        self.collection = mongomock.MongoClient().db["database"]
+        patcher = patch("db.custom_resources_db._get_collection", return_value=self.collection)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        custom_resources_db.create_resource_indexes("database", DEFINITION_WITH_INDEXES["indexes"])
+
+    def test_bulk_create_reports_invalid_and_duplicate_items(self, *_):
+        response = self.client.post(
+            "/api/v1/custom-resources/database/bulk",
+            json=[
+                {"node": "a", "port": 1},
+                {"node": "b", "port": "80"},
+                {"node": "a", "port": 2},
+                {"node": "c", "port": 3},
+            ],
+        )
+        response_data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response_data["inserted"]), 2)
+        self.assertEqual([error["index"] for error in response_data["errors"]], [1, 2])
+        self.assertEqual(sorted(self.collection.distinct("node")), ["a", "c"])
+        self.assertIsInstance(self.collection.find_one({"node": "a"})["seen_at"], datetime)
+
+    def test_bulk_upsert_by_key(self, *_):
+        existing = self.collection.insert_one({"node": "a", "port": 1}).inserted_id
+
+        response = self.client.put(
+            "/api/v1/custom-resources/database/bulk?key=node",
+            # mongomock numbers upserts by their order among the upserts, new items come first
+            json=[{"node": "b", "port": 3}, {"node": "a", "port": 2}, {"port": 4}],
+        )
+        response_data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response_data["updated"], [str(existing)])
+        self.assertEqual(len(response_data["inserted"]), 1)
+        self.assertEqual(
+            response_data["errors"], [{"index": 2, "message": "Invalid or missing node"}]
+        )
+        self.assertEqual(self.collection.find_one({"_id": existing})["port"], 2)
+
+    @patch("api.v1.custom_resources_blueprint.change_feed")
+    @patch("services.hook_service.hook_delivery")
+    def test_bulk_upsert_by_key_compares_each_item(self, mock_delivery, mock_feed, *_):
+        hook = {
+            "_id": "65d200f3812caeb85e21ee20",
+            "webhook_url": "http://hooks.local/ports",
+            "entity": "database",
+            "events": ["post_update"],
+            "conditions": [{"field": "port", "op": "changed"}],
+        }
+        self.collection.insert_many([{"node": "a", "port": 1}, {"node": "c", "port": 4}])
+        changed = str(self.collection.find_one({"node": "c"})["_id"])
+
+        with (
+            patch("services.hook_service.hook_registry", HookRegistry(max_age=0)),
+            patch("services.hook_service.hooks_db.find_hooks", return_value=[hook]),
+        ):
+            self.client.put(
+                "/api/v1/custom-resources/database/bulk?key=node",
+                json=[{"node": "a", "port": 1}, {"node": "c", "seen_at": "now", "port": 5}],
+            )
+
+        (events,) = mock_delivery.submit.call_args.args
+        self.assertEqual([event["payload"]["entity_id"] for event in events], [changed])
+        (_, updates), _ = mock_feed.record_updates.call_args
+        self.assertEqual(sorted(updates[ObjectId(changed)]), ["node", "port", "seen_at"])
+
+    def test_bulk_delete(self, *_):
+        existing = str(self.collection.insert_one({"node": "a", "port": 1}).inserted_id)
+        unknown = "65d200f3812caeb85e21ee12"
+
+        response = self.client.delete(
+            "/api/v1/custom-resources/database/bulk", json={"ids": [existing, unknown]}
+        )
+        response_data = json.loads(response.data)
+
+        self.assertEqual(response_data, {"deleted": [existing], "missing": [unknown]})
+        self.assertEqual(self.collection.count_documents({}), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
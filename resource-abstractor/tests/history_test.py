@@ -0,0 +1,102 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import mongomock
+from db import history_db, mongodb_client
+from pymongo.errors import CollectionInvalid
+
+START = 1767225600.0
+
+
+class HistoryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.history = mongomock.MongoClient().db["history"]
+        patcher = patch("db.history_db.db.mongo_history", self.history)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        history_db.record_samples(
+            history_db.history_sample(
+                history_db.ENTITY_JOB,
+                "job",
+                START + second,
+                {"cpu_percent": float(second), "memory_percent": 50.0},
+                instance=0,
+            )
+            for second in range(0, 60, 10)
+        )
+
+    def test_sample_without_metrics_is_skipped(self):
+        sample = history_db.history_sample(history_db.ENTITY_JOB, "job", START, {"logs": ""})
+
+        self.assertIsNone(sample)
+
+    def test_time_range(self):
+        result = list(
+            history_db.find_history(history_db.ENTITY_JOB, "job", START + 10, START + 30, 0)
+        )
+
+        self.assertEqual(
+            result,
+            [
+                {"timestamp": START + 10, "cpu_percent": 10.0, "memory_percent": 50.0},
+                {"timestamp": START + 20, "cpu_percent": 20.0, "memory_percent": 50.0},
+            ],
+        )
+
+    def test_downsampling(self):
+        result = list(
+            history_db.find_history(history_db.ENTITY_JOB, "job", START, START + 60, 0, bucket=30)
+        )
+
+        self.assertEqual([bucket["timestamp"] for bucket in result], [START, START + 30])
+        self.assertEqual(result[0]["cpu_percent_avg"], 10.0)
+        self.assertEqual(result[0]["cpu_percent_max"], 20.0)
+        self.assertEqual(result[1]["samples"], 3)
+
+    def test_limit_keeps_the_most_recent_samples(self):
+        result = list(
+            history_db.find_history(history_db.ENTITY_JOB, "job", START, START + 60, 0, limit=2)
+        )
+
+        self.assertEqual([sample["timestamp"] for sample in result], [START + 40, START + 50])
+
+    def test_other_instance_is_not_included(self):
+        result = list(history_db.find_history(history_db.ENTITY_JOB, "job", START, START + 60, 1))
+
+        self.assertEqual(result, [])
+
+
+class HistorySetupTestCase(unittest.TestCase):
+    def test_retention_of_existing_collection_is_updated(self):
+        database = MagicMock()
+        database.create_collection.side_effect = CollectionInvalid("exists")
+
+        mongodb_client._history_collection(database)
+
+        database.command.assert_called_once_with(
+            "collMod", "history", expireAfterSeconds=mongodb_client.HISTORY_RETENTION_SECONDS
+        )
+
+    def test_migration_runs_once(self):
+        migrations = mongomock.MongoClient().db["migrations"]
+        migrate = MagicMock()
+
+        mongodb_client._migrate_once(migrations, "drop_embedded_histories", migrate)
+        mongodb_client._migrate_once(migrations, "drop_embedded_histories", migrate)
+
+        migrate.assert_called_once()
+
+    def test_failed_migration_runs_again(self):
+        migrations = mongomock.MongoClient().db["migrations"]
+        migrate = MagicMock(side_effect=[RuntimeError("interrupted"), None])
+
+        with self.assertRaises(RuntimeError):
+            mongodb_client._migrate_once(migrations, "drop_embedded_histories", migrate)
+        mongodb_client._migrate_once(migrations, "drop_embedded_histories", migrate)
+
+        self.assertEqual(migrate.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
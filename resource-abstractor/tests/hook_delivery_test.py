@@ -0,0 +1,117 @@
+import time
+import unittest
+from unittest.mock import patch
+
+import mongomock
+from db import hook_outbox_db
+from requests import exceptions
+from services.hook_delivery import HookDelivery
+from services.hook_service import HookRegistry, process_post_update
+
+BATCHED_URL = "http://hooks.local/batched"
+SINGLE_URL = "http://hooks.local/single"
+
+
+def event(url, entity_id, batch):
+    return {
+        "webhook_url": url,
+        "batch": batch,
+        "payload": {"entity": "jobs", "entity_id": entity_id, "event": "post_update"},
+    }
+
+
+class HookDeliveryTestCase(unittest.TestCase):
+    def setUp(self):
+        self.outbox = mongomock.MongoClient().db["hook_outbox"]
+        patcher = patch("db.hook_outbox_db.db.mongo_hook_outbox", self.outbox)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.delivery = HookDelivery(workers=1, batch_size=10, max_attempts=2, base_delay=0)
+
+    @patch("services.hook_delivery.post_webhook")
+    def test_batching_hooks_receive_a_list(self, mock_post):
+        self.delivery.submit([event(BATCHED_URL, str(i), True) for i in range(3)])
+        self.delivery.submit([event(SINGLE_URL, "a", False), event(SINGLE_URL, "b", False)])
+
+        while self.delivery.deliver_next():
+            pass
+
+        calls = [call.args for call in mock_post.call_args_list]
+        self.assertEqual(len(calls), 3)
+        self.assertEqual([len(data) for url, data in calls if url == BATCHED_URL], [3])
+        self.assertEqual(
+            [data["entity_id"] for url, data in calls if url == SINGLE_URL], ["a", "b"]
+        )
+        self.assertEqual(self.outbox.count_documents({}), 0)
+        self.assertEqual(self.delivery.stats()["delivered"], 5)
+
+    @patch("services.hook_delivery.post_webhook", side_effect=exceptions.ConnectTimeout())
+    def test_failed_deliveries_are_retried(self, mock_post):
+        self.delivery.submit([event(SINGLE_URL, "a", False)])
+
+        self.assertTrue(self.delivery.deliver_next())
+        self.assertEqual(self.outbox.find_one()["status"], hook_outbox_db.STATUS_PENDING)
+        self.assertTrue(self.delivery.deliver_next())
+        self.assertFalse(self.delivery.deliver_next())
+
+        stats = self.delivery.stats()
+        self.assertEqual(mock_post.call_count, 2)
+        self.assertEqual((stats["retries"], stats["failed"]), (1, 1))
+        self.assertEqual((stats["pending"], stats["failed"]), (0, 1))
+
+    def test_claimed_events_are_not_claimed_twice(self):
+        self.delivery.submit([event(SINGLE_URL, "a", False)])
+
+        self.assertEqual(len(hook_outbox_db.claim_events(10, 60)), 1)
+        self.assertEqual(hook_outbox_db.claim_events(10, 60), [])
+
+    def test_worker_survives_unexpected_errors(self):
+        errors = [KeyError("webhook_url")]
+
+        def deliver_next():
+            if errors:
+                raise errors.pop()
+            return False
+
+        with patch.object(self.delivery, "deliver_next", deliver_next):
+            with patch("services.hook_delivery.HOOK_POLL_INTERVAL", 0.01):
+                self.delivery.start()
+                time.sleep(0.1)
+                alive = self.delivery.threads[0].is_alive()
+                self.delivery.stop(timeout=5)
+
+        self.assertTrue(alive)
+
+    def test_stop_joins_the_workers(self):
+        self.delivery.start()
+        threads = list(self.delivery.threads)
+
+        self.delivery.stop(timeout=5)
+
+        self.assertEqual(self.delivery.threads, [])
+        self.assertFalse(any(thread.is_alive() for thread in threads))
+
+
+@patch(
+    "services.hook_service.hooks_db.find_hooks",
+    return_value=[
+        {"_id": "h", "webhook_url": SINGLE_URL, "entity": "jobs", "events": ["post_update"]}
+    ],
+)
+@patch("services.hook_service.hooks_db.hooks_version", new=lambda: 0)
+class AsyncHookTestCase(unittest.TestCase):
+    @patch("services.hook_service.hook_delivery")
+    def test_post_hooks_go_through_the_outbox(self, mock_delivery, _):
+        with patch("services.hook_service.hook_registry", HookRegistry(max_age=0)):
+            process_post_update("jobs", "65d200f3812caeb85e21ee19")
+            process_post_update("resources", "65d200f3812caeb85e21ee19")
+
+        mock_delivery.submit.assert_called_once()
+        (submitted,) = mock_delivery.submit.call_args.args
+        self.assertEqual(submitted[0]["webhook_url"], SINGLE_URL)
+        self.assertEqual(submitted[0]["payload"]["entity_id"], "65d200f3812caeb85e21ee19")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,196 @@
+import time
+import unittest
+from unittest.mock import ANY, patch
+
+from api.v1.hooks_blueprint import hooksblp
+from api.v1.jobs_blueprint import jobsblp
+from flask import Flask
+from services.hook_service import (
+    HookRegistry,
+    hook_matches,
+    hook_registry,
+    process_pre_create,
+    process_pre_update,
+)
+
+HOOK = {
+    "_id": "65d200f3812caeb85e21ee19",
+    "hook_name": "deployments",
+    "webhook_url": "http://hooks.local/jobs",
+    "entity": "jobs",
+    "events": ["pre_update", "post_update"],
+}
+
+
+@patch("services.hook_service.hooks_db.hooks_version", new=lambda: 0)
+@patch("services.hook_service.hooks_db.find_hooks", return_value=[HOOK])
+class HookRegistryTestCase(unittest.TestCase):
+    def test_lookups_use_the_loaded_hooks(self, mock_find):
+        registry = HookRegistry(max_age=0)
+
+        self.assertEqual(registry.get("jobs", "post_update"), [HOOK])
+        self.assertEqual(registry.get("jobs", "post_create"), [])
+        self.assertEqual(registry.get("resources", "post_update"), [])
+        mock_find.assert_called_once()
+
+    def test_invalidate_reloads(self, mock_find):
+        registry = HookRegistry(max_age=0)
+        registry.get("jobs", "post_update")
+
+        mock_find.return_value = []
+        registry.invalidate()
+
+        self.assertEqual(registry.get("jobs", "post_update"), [])
+        self.assertEqual(mock_find.call_count, 2)
+
+    def test_hooks_changed_by_other_processes_reload(self, mock_find):
+        registry = HookRegistry(max_age=0, check_interval=0.01)
+        registry.get("jobs", "post_update")
+        registry.get("jobs", "post_update")
+
+        time.sleep(0.02)
+        with patch("services.hook_service.hooks_db.hooks_version", return_value=1):
+            registry.get("jobs", "post_update")
+
+        self.assertEqual(mock_find.call_count, 2)
+
+    def test_load_racing_an_invalidation_is_not_kept(self, mock_find):
+        registry = HookRegistry(max_age=0)
+
+        def find_hooks():
+            registry.invalidate()
+            return [HOOK]
+
+        mock_find.side_effect = find_hooks
+        registry.get("jobs", "post_update")
+        mock_find.side_effect = None
+        registry.get("jobs", "post_update")
+
+        self.assertEqual(mock_find.call_count, 2)
+
+    @patch("services.hook_service.call_webhook")
+    def test_hooks_are_called_for_registered_events(self, mock_call, _):
+        registry = HookRegistry(max_age=0)
+        mock_call.side_effect = lambda url, data: {**data, "hooked": True}
+
+        with patch("services.hook_service.hook_registry", registry):
+            self.assertEqual(process_pre_update("jobs", {"a": 1}), {"a": 1, "hooked": True})
+            self.assertEqual(process_pre_create("jobs", {"a": 1}), {"a": 1})
+
+        mock_call.assert_called_once_with(HOOK["webhook_url"], {"a": 1})
+
+
+@patch("services.hook_service.hooks_db.hooks_version", new=lambda: 0)
+@patch("services.hook_service.hooks_db.find_hooks", return_value=[])
+class HooksBlueprintTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.register_blueprint(hooksblp)
+        self.client = self.app.test_client()
+
+    @patch("api.v1.hooks_blueprint.hooks_db.create_hook", return_value=HOOK)
+    def test_changes_invalidate_the_registry(self, mock_create, mock_find):
+        hook_registry.get("jobs", "post_update")
+        calls = mock_find.call_count
+
+        response = self.client.post("/api/v1/hooks/", json={"entity": "jobs"})
+        hook_registry.get("jobs", "post_update")
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(mock_find.call_count, calls + 1)
+
+
+FAILED_HOOK = {
+    "_id": "65d200f3812caeb85e21ee20",
+    "webhook_url": "http://hooks.local/failures",
+    "entity": "jobs",
+    "events": ["post_update"],
+    "watched_fields": ["status"],
+    "conditions": [
+        {"field": "status", "op": "changed"},
+        {"field": "status", "op": "eq", "value": "FAILED"},
+    ],
+}
+JOB_ID = "65d200f3812caeb85e21ee19"
+
+
+class HookFilterTestCase(unittest.TestCase):
+    def test_fields(self):
+        self.assertFalse(hook_matches(FAILED_HOOK, {"cpu_percent": 3.5}))
+        self.assertTrue(hook_matches({"watched_fields": ["a.b"]}, {"a": {"b": 1}}))
+        self.assertFalse(hook_matches(FAILED_HOOK, None))
+        self.assertTrue(hook_matches(HOOK, None))
+
+    def test_unchanged_fields(self):
+        hook = {"watched_fields": ["status"]}
+        running = {"status": "RUNNING"}
+
+        self.assertFalse(hook_matches(hook, {**running, "cpu_percent": 3.5}, running))
+        self.assertTrue(hook_matches(hook, running, {"status": "FAILED"}))
+
+    def test_conditions(self):
+        running = {"status": "RUNNING"}
+        failed = {"status": "FAILED"}
+
+        self.assertTrue(hook_matches(FAILED_HOOK, failed, running))
+        self.assertFalse(hook_matches(FAILED_HOOK, failed, failed))
+        self.assertFalse(hook_matches(FAILED_HOOK, running, failed))
+        # unknown previous state counts as changed
+        self.assertTrue(hook_matches(FAILED_HOOK, failed))
+
+        hook = {"conditions": [{"field": "status", "op": "in", "value": ["DEAD", "FAILED"]}]}
+        self.assertTrue(hook_matches(hook, failed))
+        self.assertFalse(hook_matches({"conditions": [{"field": "status", "op": "ne"}]}, {}))
+
+
+@patch("services.hook_service.hooks_db.hooks_version", new=lambda: 0)
+@patch("services.hook_service.hooks_db.find_hooks", return_value=[FAILED_HOOK])
+@patch("services.hook_service.hook_delivery")
+class FilteredHooksEndpointTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.register_blueprint(jobsblp)
+        self.client = self.app.test_client()
+
+        patcher = patch("services.hook_service.hook_registry", HookRegistry(max_age=0))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch("api.v1.jobs_blueprint.jobs_db.update_job_instance", return_value={"_id": JOB_ID})
+    @patch("api.v1.jobs_blueprint.jobs_db.find_instance", return_value={"status": "RUNNING"})
+    def test_metric_reports_do_not_fire(self, mock_before, _, mock_delivery, __):
+        response = self.client.patch(f"/api/v1/jobs/{JOB_ID}/0", json={"cpu_percent": 3.5})
+        self.assertEqual(response.status_code, 200)
+        mock_delivery.submit.assert_not_called()
+
+        self.client.patch(f"/api/v1/jobs/{JOB_ID}/0", json={"status": "FAILED"})
+        mock_delivery.submit.assert_called_once()
+        self.assertEqual(mock_before.call_count, 2)
+
+    @patch("api.v1.jobs_blueprint.jobs_db.find_job_ids_by_name", return_value={"b": JOB_ID})
+    @patch("api.v1.jobs_blueprint.jobs_db.update_job_instances")
+    @patch("api.v1.jobs_blueprint.jobs_db.find_instances_by_name")
+    def test_bulk_reports_fire_for_matching_reports(
+        self, mock_before, mock_update, mock_ids, mock_delivery, _
+    ):
+        mock_before.return_value = {
+            ("a", 0): {"status": "RUNNING"},
+            ("b", 0): {"status": "RUNNING"},
+        }
+        mock_update.return_value = {"updated": [JOB_ID], "missing": []}
+
+        self.client.patch(
+            "/api/v1/jobs/instances",
+            json=[
+                {"job_name": "a", "instance_number": 0, "cpu_percent": 3.5},
+                {"job_name": "b", "instance_number": 0, "status": "FAILED"},
+            ],
+        )
+
+        mock_ids.assert_called_once_with({"b": ANY})
+        (events,) = mock_delivery.submit.call_args.args
+        self.assertEqual(events[0]["payload"]["entity_id"], JOB_ID)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,37 @@
+import unittest
+from unittest.mock import MagicMock
+
+from db.indexes import INDEXES, QUERY_SHAPES, apply_indexes, explain_query_shapes
+from pymongo.errors import OperationFailure
+
+
+class IndexCatalogTestCase(unittest.TestCase):
+    def test_failing_index_does_not_stop_the_others(self):
+        jobs = MagicMock()
+        jobs.create_indexes.side_effect = [OperationFailure("duplicate key")] + [None] * 10
+
+        apply_indexes({"jobs": jobs})
+
+        self.assertEqual(jobs.create_indexes.call_count, len(INDEXES["jobs"]))
+
+    def test_collection_scans_are_flagged(self):
+        def explain(_, query, verbosity):
+            if "job_name" in query["filter"]:
+                plan = {"stage": "FETCH", "inputStage": {"stage": "IXSCAN"}}
+            else:
+                plan = {"stage": "COLLSCAN"}
+            return {"queryPlanner": {"winningPlan": plan}}
+
+        collection = MagicMock()
+        collection.database.command.side_effect = explain
+        collections = {name: collection for name, _ in QUERY_SHAPES.values()}
+
+        report = explain_query_shapes(collections)
+
+        self.assertFalse(report["job_by_name"]["collscan"])
+        self.assertEqual(report["job_by_name"]["stages"], ["FETCH", "IXSCAN"])
+        self.assertTrue(report["candidate_by_ip"]["collscan"])
+
+
+if __name__ == "__main__":
+    unittest.main()
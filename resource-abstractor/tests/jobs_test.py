@@ -0,0 +1,263 @@
+import json
+import unittest
+from unittest.mock import MagicMock, patch
+
+import mongomock
+from api.v1.jobs_blueprint import jobsblp
+from db import jobs_db
+from flask import Flask
+
+JOB_ID = "65d200f3812caeb85e21ee19"
+
+
+@patch("services.hook_service.hooks_db.hooks_version", new=lambda: 0)
+@patch("services.hook_service.hooks_db.find_hooks", return_value=[])
+class JobsBlueprintTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.register_blueprint(jobsblp)
+        self.client = self.app.test_client()
+
+    @patch("api.v1.jobs_blueprint.jobs_db.update_job_instances")
+    def test_bulk_instance_reports(self, mock_update, _):
+        missing = [{"job_name": "app.ns.svc.ns", "instance_number": 1}]
+        mock_update.return_value = {"updated": ["65d200f3812caeb85e21ee19"], "missing": missing}
+
+        reports = [
+            {"job_name": "app.ns.svc.ns", "instance_number": 0, "cpu_percent": 1.5},
+            {"job_name": "app.ns.svc.ns", "instance_number": 1, "cpu_percent": 2.5},
+        ]
+        response = self.client.patch("/api/v1/jobs/instances", json=reports)
+        response_data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response_data["missing"], missing)
+        mock_update.assert_called_once_with(reports)
+
+    def test_bulk_instance_reports_requires_list(self, _):
+        response = self.client.patch("/api/v1/jobs/instances", json={"job_name": "x"})
+
+        self.assertEqual(response.status_code, 400)
+
+    @patch("api.v1.jobs_blueprint.jobs_db.find_jobs", return_value=[])
+    def test_filter_by_instance_status(self, mock_find, _):
+        response = self.client.get("/api/v1/jobs/?instance_status=FAILED&instance_status=DEAD")
+
+        self.assertEqual(response.status_code, 200)
+        mock_find.assert_called_once_with(
+            {"instance_list.status": {"$in": ["FAILED", "DEAD"]}}, None
+        )
+
+    @patch("api.v1.jobs_blueprint.jobs_db.find_jobs", return_value=[])
+    def test_field_projection(self, mock_find, _):
+        response = self.client.get("/api/v1/jobs/?fields=job_name,instance_list.status")
+
+        self.assertEqual(response.status_code, 200)
+        mock_find.assert_called_once_with({}, {"job_name": 1, "instance_list.status": 1})
+
+    def test_fields_and_exclude_cannot_be_combined(self, _):
+        response = self.client.get("/api/v1/jobs/?fields=job_name&exclude=instance_list")
+
+        self.assertEqual(response.status_code, 400)
+
+    @patch("api.v1.jobs_blueprint.jobs_db.expire_stale_instances")
+    def test_expire_stale_instances(self, mock_expire, _):
+        mock_expire.return_value = {"65d200f3812caeb85e21ee19": [0, 2]}
+
+        response = self.client.post(
+            "/api/v1/jobs/instances/expire",
+            json={"cutoff": 1700000000.0, "excluded_statuses": ["COMPLETED"]},
+        )
+        response_data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response_data, {"65d200f3812caeb85e21ee19": [0, 2]})
+        mock_expire.assert_called_once_with(1700000000.0, "No extra information", ["COMPLETED"])
+
+    def test_expire_stale_instances_requires_cutoff(self, _):
+        response = self.client.post("/api/v1/jobs/instances/expire", json={})
+
+        self.assertEqual(response.status_code, 422)
+
+    @patch("api.v1.jobs_blueprint.jobs_db.upsert_job_instance")
+    def test_upsert_instance_fields(self, mock_upsert, _):
+        mock_upsert.return_value = {"_id": JOB_ID, "instance_list": []}
+
+        response = self.client.patch(
+            f"/api/v1/jobs/{JOB_ID}/0/fields", json={"publicip": "1.2.3.4"}
+        )
+
+        self.assertEqual(response.status_code, 200)
+        job_id, instance_id, data = mock_upsert.call_args.args
+        self.assertEqual((job_id, instance_id, data["publicip"]), (JOB_ID, "0", "1.2.3.4"))
+
+    @patch("api.v1.jobs_blueprint.jobs_db.set_job_instance_status", return_value=None)
+    def test_instance_status(self, mock_status, _):
+        response = self.client.patch(f"/api/v1/jobs/{JOB_ID}/1/status", json={"status": "RUNNING"})
+
+        self.assertEqual(response.status_code, 404)
+        mock_status.assert_called_once_with(JOB_ID, "1", "RUNNING", None, None)
+
+    @patch("api.v1.jobs_blueprint.jobs_db.set_job_instance_status")
+    def test_instance_status_with_fields(self, mock_status, _):
+        mock_status.return_value = {"_id": JOB_ID}
+        data = {"status": "RUNNING", "fields": {"publicip": "1.2.3.4"}}
+
+        response = self.client.patch(f"/api/v1/jobs/{JOB_ID}/1/status", json=data)
+
+        self.assertEqual(response.status_code, 200)
+        mock_status.assert_called_once_with(JOB_ID, "1", "RUNNING", None, {"publicip": "1.2.3.4"})
+
+    def test_instance_status_requires_status(self, _):
+        response = self.client.patch(f"/api/v1/jobs/{JOB_ID}/1/status", json={})
+
+        self.assertEqual(response.status_code, 422)
+
+    @patch("api.v1.jobs_blueprint.jobs_db.place_job_instance")
+    def test_commit_placement(self, mock_place, _):
+        mock_place.return_value = {"_id": JOB_ID, "job_name": "app.ns.svc.ns"}
+        placement = {
+            "worker_id": "65d200f3812caeb85e21ee12",
+            "host_ip": "10.0.0.2",
+            "host_port": 50011,
+            "status": "NODE_SCHEDULED",
+        }
+
+        response = self.client.patch(
+            f"/api/v1/jobs/{JOB_ID}/0/placement?exclude=instance_list", json=placement
+        )
+
+        self.assertEqual(response.status_code, 200)
+        job_id, instance_id, data, status, projection = mock_place.call_args.args
+        self.assertEqual((job_id, instance_id, status), (JOB_ID, "0", "NODE_SCHEDULED"))
+        self.assertEqual(data["host_port"], 50011)
+        self.assertEqual(projection, {"instance_list": 0})
+
+    def test_commit_placement_requires_worker(self, _):
+        response = self.client.patch(
+            f"/api/v1/jobs/{JOB_ID}/0/placement", json={"status": "NODE_SCHEDULED"}
+        )
+
+        self.assertEqual(response.status_code, 422)
+
+
+class AtomicInstanceUpdatesTestCase(unittest.TestCase):
+    """The updates are single pipeline updates, mongomock cannot run pipelines."""
+
+    def setUp(self):
+        self.jobs = MagicMock()
+        patcher = patch("db.mongodb_client.mongo_jobs", self.jobs)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @patch("db.jobs_db.history_db.record_samples")
+    def test_upsert_instance_is_one_update(self, *_):
+        jobs_db.upsert_job_instance(JOB_ID, "2", {"_id": JOB_ID, "logs": "$not_a_path"})
+
+        self.jobs.find_one_and_update.assert_called_once()
+        pipeline = self.jobs.find_one_and_update.call_args.args[1]
+        self.assertIsInstance(pipeline, list)
+        instance_list = pipeline[0]["$set"]["instance_list"]["$cond"]
+        appended = instance_list[2]["$concatArrays"][1][0]["$mergeObjects"]
+        self.assertEqual(appended[0]["$literal"]["logs"], "$not_a_path")
+        self.assertNotIn("_id", appended[0]["$literal"])
+        self.assertEqual(appended[1], {"instance_number": 2})
+
+    def test_running_status_rolls_up_when_all_running(self):
+        jobs_db.set_job_instance_status(JOB_ID, 0, "RUNNING")
+
+        pipeline = self.jobs.find_one_and_update.call_args.args[1]
+        self.assertEqual(len(pipeline), 2)
+        rollup = pipeline[1]["$set"]["status"]["$cond"]
+        self.assertIn("$allElementsTrue", rollup[0])
+        self.assertEqual(rollup[1:], ["RUNNING", "$status"])
+
+    def test_other_status_sets_job_status(self):
+        jobs_db.set_job_instance_status(JOB_ID, 0, "FAILED", "exited")
+
+        pipeline = self.jobs.find_one_and_update.call_args.args[1]
+        instance = pipeline[0]["$set"]["instance_list"]["$map"]["in"]["$cond"][1]
+        self.assertEqual(
+            instance["$mergeObjects"][1],
+            {"$literal": {"status": "FAILED", "status_detail": "exited"}},
+        )
+        self.assertEqual(pipeline[1], {"$set": {"status": {"$literal": "FAILED"}}})
+
+    def test_status_sets_further_fields(self):
+        jobs_db.set_job_instance_status(JOB_ID, 0, "RUNNING", fields={"publicip": "1.2.3.4"})
+
+        self.jobs.find_one_and_update.assert_called_once()
+        pipeline = self.jobs.find_one_and_update.call_args.args[1]
+        instance = pipeline[0]["$set"]["instance_list"]["$map"]["in"]["$cond"][1]
+        self.assertEqual(
+            instance["$mergeObjects"][1],
+            {"$literal": {"publicip": "1.2.3.4", "status": "RUNNING"}},
+        )
+
+    def test_placement_is_one_update(self):
+        placement = {"worker_id": "w1", "host_ip": "10.0.0.2", "host_port": "50011"}
+        jobs_db.place_job_instance(JOB_ID, "1", placement, "NODE_SCHEDULED", {"job_name": 1})
+
+        self.jobs.find_one_and_update.assert_called_once()
+        pipeline = self.jobs.find_one_and_update.call_args.args[1]
+        appended = pipeline[0]["$set"]["instance_list"]["$cond"][2]["$concatArrays"][1][0]
+        fields = appended["$mergeObjects"][0]["$literal"]
+        self.assertEqual(fields["worker_id"], "w1")
+        self.assertEqual(fields["status"], "NODE_SCHEDULED")
+        self.assertEqual(pipeline[1], {"$set": {"status": {"$literal": "NODE_SCHEDULED"}}})
+        self.assertEqual(
+            self.jobs.find_one_and_update.call_args.kwargs["projection"], {"job_name": 1}
+        )
+
+
+class JobsListingTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.register_blueprint(jobsblp)
+        self.client = self.app.test_client()
+
+        jobs = mongomock.MongoClient().db["jobs"]
+        jobs.insert_many([{"job_name": f"app.ns.svc{i}.ns"} for i in range(5)])
+        patcher = patch("db.mongodb_client.mongo_jobs", jobs)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _pages(self, url):
+        jobs = []
+        after = None
+        while True:
+            response = self.client.get(url + (f"&after={after}" if after else ""))
+            jobs += json.loads(response.data)
+            after = response.headers.get("X-Next-After")
+            if after is None:
+                return jobs
+
+    def test_keyset_pages(self):
+        jobs = self._pages("/api/v1/jobs/?limit=2")
+
+        self.assertEqual([job["job_name"] for job in jobs], [f"app.ns.svc{i}.ns" for i in range(5)])
+
+    def test_keyset_pages_without_id(self):
+        jobs = self._pages("/api/v1/jobs/?limit=2&exclude=_id")
+
+        self.assertEqual([job["job_name"] for job in jobs], [f"app.ns.svc{i}.ns" for i in range(5)])
+        self.assertFalse(any("_id" in job for job in jobs))
+
+    def test_invalid_after(self):
+        response = self.client.get("/api/v1/jobs/?after=not-an-id")
+
+        self.assertEqual(response.status_code, 422)
+
+    def test_ndjson_stream(self):
+        response = self.client.get(
+            "/api/v1/jobs/?fields=job_name", headers={"Accept": "application/x-ndjson"}
+        )
+        lines = response.data.decode().splitlines()
+
+        self.assertEqual(response.mimetype, "application/x-ndjson")
+        self.assertEqual(len(lines), 5)
+        self.assertEqual(json.loads(lines[0])["job_name"], "app.ns.svc0.ns")
+
+
+if __name__ == "__main__":
+    unittest.main()
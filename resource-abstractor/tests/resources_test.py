@@ -0,0 +1,99 @@
+import json
+import unittest
+from unittest.mock import patch
+
+import mongomock
+from api.v1.resources_blueprint import resourcesblp
+from bson import ObjectId
+from flask import Flask
+from services.hook_service import HookRegistry
+
+
+@patch("services.hook_service.hooks_db.hooks_version", new=lambda: 0)
+@patch("services.hook_service.hooks_db.find_hooks", return_value=[])
+class ResourcesBlueprintTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.register_blueprint(resourcesblp)
+        self.client = self.app.test_client()
+
+    @patch("api.v1.resources_blueprint.candidates_db.update_candidates_information")
+    def test_bulk_update_candidates(self, mock_update, _):
+        mock_update.return_value = ["65d200f3812caeb85e21ee19"]
+
+        response = self.client.patch(
+            "/api/v1/resources/",
+            json=[
+                {"_id": "65d200f3812caeb85e21ee19", "cpu_percent": 12.5},
+                {"_id": "65d200f3812caeb85e21ee12", "cpu_percent": 3.0},
+            ],
+        )
+        response_data = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response_data["updated"], ["65d200f3812caeb85e21ee19"])
+        self.assertEqual(response_data["missing"], ["65d200f3812caeb85e21ee12"])
+        self.assertEqual(len(mock_update.call_args.args[0]), 2)
+
+
+STATUS_HOOK = {
+    "_id": "65d200f3812caeb85e21ee20",
+    "webhook_url": "http://hooks.local/status",
+    "entity": "resources",
+    "events": ["post_update"],
+    "watched_fields": ["status"],
+}
+
+
+@patch("services.hook_service.hook_delivery")
+class ResourcesBulkUpdateTestCase(unittest.TestCase):
+    def setUp(self):
+        self.app = Flask(__name__)
+        self.app.register_blueprint(resourcesblp)
+        self.client = self.app.test_client()
+
+        client = mongomock.MongoClient()
+        self.candidates = client.db["candidates"]
+        for target, replacement in [
+            ("db.candidates_db.db.mongo_candidates", self.candidates),
+            ("db.history_db.db.mongo_history", client.db["history"]),
+            ("services.hook_service.hook_registry", HookRegistry(max_age=0)),
+            ("services.hook_service.hooks_db.find_hooks", lambda: [STATUS_HOOK]),
+            ("services.hook_service.hooks_db.hooks_version", lambda: 0),
+        ]:
+            patcher = patch(target, replacement)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.candidate_id = str(
+            self.candidates.insert_one({"candidate_name": "node", "status": "ok"}).inserted_id
+        )
+
+    def test_bulk_update_through_the_db(self, _):
+        response = self.client.patch(
+            "/api/v1/resources/",
+            json=[
+                {"_id": self.candidate_id, "cpu_percent": 12.5},
+                {"_id": "65d200f3812caeb85e21ee12", "cpu_percent": 3.0},
+            ],
+        )
+        response_data = json.loads(response.data)
+
+        self.assertEqual(response_data["updated"], [self.candidate_id])
+        self.assertEqual(response_data["missing"], ["65d200f3812caeb85e21ee12"])
+        candidate = self.candidates.find_one({"_id": ObjectId(self.candidate_id)})
+        self.assertEqual(candidate["cpu_percent"], 12.5)
+
+    def test_hooks_fire_for_changed_fields_only(self, mock_delivery):
+        self.client.patch(
+            "/api/v1/resources/",
+            json=[{"_id": self.candidate_id, "cpu_percent": 12.5, "status": "ok"}],
+        )
+        mock_delivery.submit.assert_not_called()
+
+        self.client.patch("/api/v1/resources/", json=[{"_id": self.candidate_id, "status": "lost"}])
+        (events,) = mock_delivery.submit.call_args.args
+        self.assertEqual(events[0]["payload"]["entity_id"], self.candidate_id)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,147 @@
+import json
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock, patch
+
+import mongomock
+from api.v1.watch_blueprint import watchblp
+from bson.objectid import ObjectId
+from db import mongodb_client
+from flask import Flask
+from services.change_feed import ChangeFeed, _stream_event
+
+JOB_ID = "65d200f3812caeb85e21ee19"
+
+
+def change_id(seconds_ago):
+    return ObjectId.from_datetime(datetime.utcnow() - timedelta(seconds=seconds_ago))
+
+
+class ChangeLogTestCase(unittest.TestCase):
+    def setUp(self):
+        self.changes = mongomock.MongoClient().db["changes"]
+        patcher = patch("db.changes_db.db.mongo_changes", self.changes)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.feed = ChangeFeed()
+        self.feed.change_streams = False
+        patcher = patch("api.v1.watch_blueprint.change_feed", self.feed)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.app = Flask(__name__)
+        self.app.register_blueprint(watchblp)
+        self.client = self.app.test_client()
+
+    def test_record(self):
+        self.feed.record("job", "update", [ObjectId(JOB_ID)], {"_id": 1, "status": 1})
+
+        change = self.changes.find_one()
+        self.assertEqual(
+            (change["entity"], change["op"], change["id"], change["fields"]),
+            ("jobs", "update", JOB_ID, ["status"]),
+        )
+
+    def test_record_is_skipped_with_change_streams(self):
+        self.feed.change_streams = True
+        self.feed.record("jobs", "update", [JOB_ID])
+
+        self.assertEqual(self.changes.count_documents({}), 0)
+
+    def test_long_poll(self):
+        since = change_id(30)
+        first, second = change_id(20), change_id(10)
+        self.changes.insert_many(
+            [
+                {"_id": first, "entity": "jobs", "op": "insert", "id": JOB_ID, "fields": None},
+                {"_id": change_id(15), "entity": "apps", "op": "insert", "id": "x"},
+                {"_id": second, "entity": "jobs", "op": "update", "id": JOB_ID, "fields": ["a"]},
+            ]
+        )
+
+        response = self.client.get(f"/api/v1/watch/?entity=jobs&since={since}&timeout=0")
+        result = json.loads(response.data)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([event["token"] for event in result["events"]], [str(first), str(second)])
+        self.assertEqual(result["next"], str(second))
+
+        response = self.client.get(f"/api/v1/watch/?entity=jobs&since={second}&timeout=0")
+        self.assertEqual(json.loads(response.data), {"events": [], "next": str(second)})
+
+    def test_tokens(self):
+        expired = change_id(2 * 24 * 60 * 60)
+        response = self.client.get(f"/api/v1/watch/?entity=jobs&since={expired}&timeout=0")
+        self.assertEqual(response.status_code, 410)
+
+        response = self.client.get("/api/v1/watch/?entity=jobs&since=nope&timeout=0")
+        self.assertEqual(response.status_code, 400)
+
+    @patch("services.change_feed.custom_resources_db.check_custom_resource_exists")
+    def test_unknown_entity(self, mock_exists):
+        mock_exists.return_value = False
+        response = self.client.get("/api/v1/watch/?entity=unknown&timeout=0")
+
+        self.assertEqual(response.status_code, 404)
+
+
+class ChangeStreamEventTestCase(unittest.TestCase):
+    def test_compact_event(self):
+        change = {
+            "_id": {"_data": "8265"},
+            "operationType": "update",
+            "documentKey": {"_id": ObjectId(JOB_ID)},
+            "updateDescription": {
+                "updatedFields": {"instance_list.0.status": "FAILED"},
+                "removedFields": ["status_detail"],
+            },
+        }
+
+        self.assertEqual(
+            _stream_event("jobs", change),
+            {
+                "token": "8265",
+                "entity": "jobs",
+                "op": "update",
+                "id": JOB_ID,
+                "fields": ["instance_list.0.status", "status_detail"],
+            },
+        )
+
+
+class ChangesSetupTestCase(unittest.TestCase):
+    def test_missing_index_is_created(self):
+        database = mongomock.MongoClient().db
+
+        mongodb_client._changes_collection(database)
+
+        (index,) = [
+            index
+            for index in database["changes"].index_information().values()
+            if index["key"] == [("ts", 1)]
+        ]
+        self.assertEqual(index["expireAfterSeconds"], mongodb_client.CHANGES_RETENTION_SECONDS)
+
+    def test_retention_of_existing_index_is_updated(self):
+        database = MagicMock()
+        database["changes"].index_information.return_value = {
+            "_id_": {"key": [("_id", 1)]},
+            "ts_1": {"key": [("ts", 1)], "expireAfterSeconds": 1},
+        }
+
+        mongodb_client._changes_collection(database)
+
+        database["changes"].create_index.assert_not_called()
+        database.command.assert_called_once_with(
+            "collMod",
+            "changes",
+            index={
+                "keyPattern": {"ts": 1},
+                "expireAfterSeconds": mongodb_client.CHANGES_RETENTION_SECONDS,
+            },
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""Compares jsonschema.validate with the precompiled SLA validator on large SLAs.
+
+Run from the system-manager-python directory:
+    python benchmarks/sla_validation_benchmark.py [--microservices 1 10 100 500]
+"""
+
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+
+import jsonschema
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sla.schema import sla_schema  # noqa: E402
+from sla.v2_validator import validate_json_v2  # noqa: E402
+
+SLA_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "tests",
+    "service_level_agreements",
+    "sla_correct_1.json",
+)
+
+
+def synthetic_sla(microservices, applications=1):
+    with open(SLA_PATH) as f:
+        sla = json.load(f)
+    template = sla["applications"][0]
+    service = template["microservices"][0]
+    sla["applications"] = [
+        {
+            **copy.deepcopy(template),
+            "application_name": f"app{a}",
+            "microservices": [
+                {**copy.deepcopy(service), "microservice_name": f"svc{a}x{s}"}
+                for s in range(microservices)
+            ],
+        }
+        for a in range(applications)
+    ]
+    return sla
+
+
+def validate_uncompiled(sla):
+    # validate_json_v2 before the validator was compiled at import
+    jsonschema.validate(instance=sla, schema=sla_schema)
+
+
+def validate_compiled(sla):
+    assert validate_json_v2(sla) is None
+
+
+def throughput(fn, sla, seconds):
+    calls = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        fn(sla)
+        calls += 1
+    return calls / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--microservices", type=int, nargs="+", default=[1, 10, 100, 500])
+    parser.add_argument("--applications", type=int, default=1)
+    parser.add_argument("--seconds", type=float, default=2)
+    args = parser.parse_args()
+
+    print(f"{'services':>8} {'validate [SLA/s]':>17} {'compiled [SLA/s]':>17} {'speedup':>8}")
+    for size in args.microservices:
+        sla = synthetic_sla(size, args.applications)
+        uncompiled = throughput(validate_uncompiled, sla, args.seconds)
+        compiled = throughput(validate_compiled, sla, args.seconds)
+        print(f"{size:>8} {uncompiled:>17.1f} {compiled:>17.1f} {compiled / uncompiled:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
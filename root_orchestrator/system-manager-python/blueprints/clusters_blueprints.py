@@ -5,9 +5,9 @@ from ext_requests.cluster_requests import cluster_request_to_delete_job_by_ip
 from flask import request
 from flask.views import MethodView
 from flask_smorest import Blueprint, abort
-from oakestra_utils.types.statuses import convert_to_status
 from resource_abstractor_client import candidate_operations
-from services.instance_management import update_job_status
+from services.cluster_management import register_status_report
+from services.instance_management import update_jobs_status
 from utils.network import sanitize
 
 logger = logging.getLogger("system_manager")
@@ -29,6 +29,9 @@ cluster_info_schema = {
         "more": {"type": "object"},
         "worker_groups": {"type": "string"},
         "supported_addons": {"type": "array", "items": {"type": "string"}},
+        "report_seq": {"type": "integer"},
+        "report_base_seq": {"type": "integer"},
+        "report_full": {"type": "boolean"},
         "jobs": {
             "type": "array",
             "items": {
@@ -93,9 +96,15 @@ class ClusterController(MethodView):
     def post(self, *args, **kwargs):
         data = request.json
         cluster_id = kwargs["clusterid"]
-        jobs = data.get("jobs")
         logger.info(f"Received cluster update for {cluster_id}: {data}")
-        del data["jobs"]
+        # jobs is a delta since the report base_seq unless report_full is set
+        jobs = data.pop("jobs", None) or []
+        in_sync = register_status_report(
+            cluster_id,
+            data.pop("report_seq", None),
+            data.pop("report_base_seq", None),
+            data.pop("report_full", True),
+        )
         # Prevent the IP address from being overwritten by cluster updates
         # The IP is set during initial registration and should not change
         if "ip" in data:
@@ -110,19 +119,15 @@ class ClusterController(MethodView):
 
         # TODO(GB): fire an event to react to the cluster update
         # and move this logic somewhere else.
-        for j in jobs:
-            result = update_job_status(
-                job_id=j.get("_id"),
-                status=convert_to_status(j.get("status")),
-                status_detail=j.get("status_detail"),
-                instances=j.get("instance_list"),
-            )
+        for j, result in zip(jobs, update_jobs_status(jobs)):
             if result is None:
                 # cluster has outdated jobs, ask to undeploy
                 addr = sanitize(request.remote_addr)
                 cluster_request_to_delete_job_by_ip(j.get("_id"), -1, addr)
 
-        return "ok"
+        # deltas carry absolute values, so they are applied even when the cluster
+        # has to send a full report next
+        return {"resync": not in_sync}
 
 
 # Map candidate attributes to cluster attributes for compatibility with ext tools
@@ -23,3 +23,29 @@ def find_cluster_of_job(job_id, instance_num=-1):
             return candidate_operations.get_candidate_by_id(instance["cluster_id"])
 
     return None
+
+
+# cluster_id -> sequence number of the last status report applied for that cluster
+_last_report_seq = {}
+
+
+def register_status_report(cluster_id, seq, base_seq, full):
+    """Record a cluster status report, returns False if the cluster has to resynchronize.
+
+    Deltas contain every change since the report base_seq, applying one is consistent
+    as long as the base report (or a later one) has been applied here before.
+    """
+    if seq is None:
+        # cluster manager without delta reports, every report is complete
+        return True
+
+    last_seq = _last_report_seq.get(cluster_id)
+    if full:
+        _last_report_seq[cluster_id] = seq
+        return True
+
+    if last_seq is None or base_seq is None or base_seq > last_seq:
+        return False
+
+    _last_report_seq[cluster_id] = max(seq, last_seq)
+    return True
@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import threading
 from typing import List, Optional
@@ -10,6 +11,8 @@ from ext_requests.net_plugin_requests import (
 from ext_requests.scheduler_requests import scheduler_request_deploy
 from oakestra_utils.types.statuses import PositiveSchedulingStatus, Status, convert_to_status
 from resource_abstractor_client import app_operations, candidate_operations, job_operations
+from resource_abstractor_client.aio import client_helper as aio_client
+from resource_abstractor_client.aio import job_operations as aio_job_operations
 
 logger = logging.getLogger("system_manager")
 
@@ -31,6 +34,37 @@ def update_job_status(
     return job_operations.update_job_status(job_id, status, status_detail)
 
 
+async def _update_job_status_async(job_id, status, status_detail, instances):
+    job = await aio_job_operations.get_job_by_id(job_id)
+    if job is None:
+        return None
+
+    await asyncio.gather(
+        *(
+            aio_job_operations.update_job_instance(job_id, instance["instance_number"], instance)
+            for instance in instances
+        )
+    )
+    return await aio_job_operations.update_job_status(job_id, status, status_detail)
+
+
+def update_jobs_status(jobs: List[dict]) -> List[Optional[dict]]:
+    """update_job_status for every reported job, the jobs are updated concurrently.
+
+    Returns the updated jobs in order, None for jobs that do not exist.
+    """
+    updates = (
+        _update_job_status_async(
+            job.get("_id"),
+            convert_to_status(job.get("status")),
+            job.get("status_detail"),
+            job.get("instance_list") or [],
+        )
+        for job in jobs
+    )
+    return aio_client.run(aio_client.gather_bounded(updates))
+
+
 def update_job_status_and_instances(
     job_id: str,
     status: Status,
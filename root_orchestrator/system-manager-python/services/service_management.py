@@ -1,6 +1,7 @@
 import logging
 
 from ext_requests.net_plugin_requests import net_inform_service_deploy, net_inform_service_undeploy
+from requests.exceptions import RequestException
 from resource_abstractor_client import app_operations, job_operations
 from sla.versioned_sla_parser import SLAFormatError, parse_sla_json
 
@@ -152,8 +153,10 @@ def get_service(serviceid, username):
 
 
 def get_all_services():
-    services = job_operations.get_jobs()
-    if services is None:
+    try:
+        # fetched page by page, the resource abstractor never serializes all jobs at once
+        services = list(job_operations.iter_jobs())
+    except RequestException:
         return {"message": "failed to retrieve jobs/services"}, 500
     return services, 200
 
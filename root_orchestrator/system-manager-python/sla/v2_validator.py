@@ -2,10 +2,17 @@ import jsonschema
 
 from sla.schema import sla_schema
 
+# checked against its meta schema and compiled once, not on every registration
+sla_validator_cls = jsonschema.validators.validator_for(sla_schema)
+sla_validator_cls.check_schema(sla_schema)
+sla_validator = sla_validator_cls(sla_schema)
+
 
 def validate_json_v2(json_data):
     try:
-        jsonschema.validate(instance=json_data, schema=sla_schema)
+        error = jsonschema.exceptions.best_match(sla_validator.iter_errors(json_data))
+        if error is not None:
+            raise error
     except ValueError as err:
         return err
     except jsonschema.exceptions.ValidationError as err:
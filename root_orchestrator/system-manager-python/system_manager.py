@@ -21,6 +21,7 @@ from flask_smorest import Api
 from flask_socketio import SocketIO
 from flask_swagger_ui import get_swaggerui_blueprint
 from google.protobuf.json_format import MessageToDict
+from oakestra_utils.serialization import init_flask
 from proto.clusterRegistration_pb2 import SC1Message, SC2Message
 from proto.clusterRegistration_pb2_grpc import (
     add_register_clusterServicer_to_server,
@@ -38,6 +39,7 @@ UPLOAD_FOLDER = "files"
 ALLOWED_EXTENSIONS = {"txt", "json", "yml"}
 
 app = Flask(__name__)
+init_flask(app)
 
 app.config["OPENAPI_VERSION"] = "3.0.2"
 app.config["API_TITLE"] = "Oakestra root api"
@@ -0,0 +1,23 @@
+import unittest
+
+from services.cluster_management import register_status_report
+
+
+class ClusterStatusReportTestCase(unittest.TestCase):
+    def test_report_without_sequence_is_applied(self):
+        self.assertTrue(register_status_report("legacy", None, None, True))
+
+    def test_delta_before_full_report_requires_resync(self):
+        self.assertFalse(register_status_report("fresh", 4, 3, False))
+
+    def test_delta_after_full_report(self):
+        self.assertTrue(register_status_report("cluster", 1, None, True))
+        self.assertTrue(register_status_report("cluster", 2, 1, False))
+        # the previous report was not acknowledged, the next delta still builds on 1
+        self.assertTrue(register_status_report("cluster", 3, 1, False))
+
+    def test_delta_on_unknown_base_requires_resync(self):
+        self.assertTrue(register_status_report("gap", 1, None, True))
+        self.assertFalse(register_status_report("gap", 5, 4, False))
+        self.assertTrue(register_status_report("gap", 6, None, True))
+        self.assertTrue(register_status_report("gap", 7, 6, False))
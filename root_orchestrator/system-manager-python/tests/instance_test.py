@@ -1,4 +1,8 @@
 import unittest
+from unittest.mock import AsyncMock, patch
+
+from oakestra_utils.types.statuses import DeploymentStatus
+from services.instance_management import update_jobs_status
 
 
 class InstanceTestCase(unittest.TestCase):
@@ -13,3 +17,28 @@ class InstanceTestCase(unittest.TestCase):
 
     def test_scale_down(self):
         pass
+
+    @patch("services.instance_management.aio_job_operations")
+    def test_update_jobs_status(self, aio_job_operations):
+        existing = {"_id": "65d200f3812caeb85e21ee19"}
+        aio_job_operations.get_job_by_id = AsyncMock(
+            side_effect=lambda job_id: existing if job_id == existing["_id"] else None
+        )
+        aio_job_operations.update_job_instance = AsyncMock(return_value=existing)
+        aio_job_operations.update_job_status = AsyncMock(return_value=existing)
+
+        jobs = [
+            {
+                "_id": existing["_id"],
+                "status": "RUNNING",
+                "instance_list": [{"instance_number": 0}, {"instance_number": 1}],
+            },
+            {"_id": "65d200f3812caeb85e21ee20", "status": "RUNNING", "instance_list": []},
+        ]
+        result = update_jobs_status(jobs)
+
+        self.assertEqual(result, [existing, None])
+        self.assertEqual(aio_job_operations.update_job_instance.await_count, 2)
+        aio_job_operations.update_job_status.assert_awaited_once_with(
+            existing["_id"], DeploymentStatus.RUNNING, None
+        )